@@ -0,0 +1 @@
+# Helpers shared by the coordinator and the specialist agents
@@ -0,0 +1,23 @@
+# Shared argument handling for the list-taking (batch) tools
+#
+# TOOL_BATCH_LIMIT caps how many items one batch tool call looks up (default 50);
+# the rest are reported back as skipped so the model can ask for them separately.
+import os
+
+BATCH_LIMIT = int(os.environ.get("TOOL_BATCH_LIMIT", "50"))
+
+
+def batch_items(items, key=str.strip, limit=None):
+    """Drop blanks and duplicates (by ``key``), keep order; returns (items, skipped count)"""
+    if isinstance(items, str):
+        # A model sometimes passes "a, b, c" instead of a list
+        items = items.split(",")
+    seen = {}
+    for item in items:
+        normalized = key(str(item))
+        if normalized and normalized not in seen:
+            seen[normalized] = None
+    unique = list(seen)
+    limit = BATCH_LIMIT if limit is None else limit
+    return unique[:limit], max(0, len(unique) - limit)
+
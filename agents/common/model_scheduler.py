@@ -0,0 +1,341 @@
+# Process-wide scheduler for Gemini calls, shared by every agent in the process
+#
+# All model calls of a process go through one token bucket, so a burst of
+# sessions queues up instead of hitting the API at once and backing off in
+# lockstep. Waiting interactive calls are always served before background ones.
+# Identical prompts in flight at the same time share one API call (single-flight).
+# Calls that fail with 429/5xx or a network error are retried with full jitter.
+# A retry only happens within a total deadline and before any output was
+# streamed. A 429 halves the refill rate, and each success raises it again
+# towards MODEL_RPM.
+#
+#   MODEL_RPM               model calls per minute for this process (default 60)
+#   MODEL_BURST             calls allowed back to back before the rate applies (default 10)
+#   MODEL_RETRY_ATTEMPTS    attempts per call, including the first (default 4)
+#   MODEL_RETRY_DEADLINE    seconds after which a failing call is not retried any more (default 30)
+#   MODEL_RETRY_BASE_DELAY  first backoff ceiling in seconds, doubled per attempt (default 1)
+#   MODEL_RETRY_MAX_DELAY   largest backoff ceiling in seconds (default 8)
+#   MODEL_COALESCE          0 turns single-flight coalescing off (default on)
+#
+# Every agent process (and uvicorn worker) has its own scheduler, so MODEL_RPM
+# is that process's share of the project quota. stats() reports queue waits per
+# lane; the coordinator serves them on GET /health.
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import deque
+
+from agents.common import tracing
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# Lower goes first
+LANES = {INTERACTIVE: 0, BACKGROUND: 1}
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Lane of the model calls made in the current context (None: the model's own lane)
+current_lane = contextvars.ContextVar("model_lane", default=None)
+
+
+def _env_float(name, default):
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else default
+
+
+@contextlib.contextmanager
+def background():
+    """Run the model calls made inside the block in the background lane"""
+    token = current_lane.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class LaneStats:
+    """Queue-wait counters of one priority lane"""
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, waited):
+        self.calls += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.recent.append(waited)
+
+    def as_dict(self):
+        recent = sorted(self.recent)
+        return {
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "wait_avg_ms": 1000 * self.wait_total / self.calls if self.calls else 0.0,
+            "wait_p95_ms": 1000 * tracing.percentile(recent, 0.95),
+            "wait_max_ms": 1000 * self.wait_max,
+        }
+
+
+class TokenBucket:
+    """Token bucket with priority lanes and an adaptive (AIMD) refill rate"""
+
+    def __init__(self, per_minute, burst, min_per_minute=None):
+        self.max_rate = per_minute / 60
+        self.min_rate = (min_per_minute or max(1.0, per_minute / 16)) / 60
+        self.rate = self.max_rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self.lanes = {lane: LaneStats() for lane in LANES}
+        self._waiters = []
+        self._order = itertools.count()
+        self._timer = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, lane=INTERACTIVE):
+        """Wait for a token; waiting calls of a higher-priority lane go first"""
+        started = time.monotonic()
+        stats = self.lanes[lane]
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (LANES[lane], next(self._order), future))
+            stats.waiting += 1
+            self._schedule()
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Cancelled after being granted a token: hand it back
+                if future.done() and not future.cancelled():
+                    self.tokens = min(self.burst, self.tokens + 1)
+                    self._schedule()
+                raise
+            finally:
+                stats.waiting -= 1
+        waited = time.monotonic() - started
+        stats.record(waited)
+        return waited
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        # Drop cancelled waiters so they don't hold the timer
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        self._schedule()
+
+    def on_throttled(self):
+        """The API answered 429: halve the rate and drain the burst"""
+        self.throttled += 1
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def stats(self):
+        return {
+            "rate_per_min": round(60 * self.rate, 1),
+            "max_rate_per_min": round(60 * self.max_rate, 1),
+            "throttled": self.throttled,
+            "lanes": {lane: stats.as_dict() for lane, stats in self.lanes.items()},
+        }
+
+
+def retryable(error):
+    """Whether a failed model call is worth retrying"""
+    import httpx
+    from google.genai import errors
+
+    if isinstance(error, errors.APIError):
+        return error.code in RETRY_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+def is_throttled(error):
+    from google.genai import errors
+
+    return isinstance(error, errors.APIError) and error.code == 429
+
+
+def request_key(model, llm_request, stream):
+    """Single-flight key of a model request, or None if it can't be serialized"""
+    try:
+        body = llm_request.model_dump_json(exclude={"tools_dict", "live_connect_config"})
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(f"{model}|{stream}|{body}".encode()).hexdigest()
+
+
+class ModelScheduler:
+    """Rate limiting, jittered retries and single-flight coalescing for model calls"""
+
+    def __init__(self, per_minute=None, burst=None, attempts=None, deadline=None, base_delay=None,
+                 max_delay=None, coalesce=None):
+        self.bucket = TokenBucket(
+            per_minute or _env_float("MODEL_RPM", 60.0),
+            burst or _env_float("MODEL_BURST", 10.0),
+        )
+        self.attempts = max(1, int(attempts or _env_float("MODEL_RETRY_ATTEMPTS", 4)))
+        self.deadline = deadline if deadline is not None else _env_float("MODEL_RETRY_DEADLINE", 30.0)
+        self.base_delay = base_delay if base_delay is not None else _env_float("MODEL_RETRY_BASE_DELAY", 1.0)
+        self.max_delay = max_delay if max_delay is not None else _env_float("MODEL_RETRY_MAX_DELAY", 8.0)
+        if coalesce is None:
+            coalesce = os.environ.get("MODEL_COALESCE", "1").strip().lower() not in ("0", "false", "no")
+        self.coalesce = coalesce
+        self.calls = 0
+        self.in_flight = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
+        self._flights = {}
+
+    async def run(self, call, key=None, lane=INTERACTIVE):
+        """Yield the responses of ``call()`` (an async iterator factory), scheduled.
+
+        Callers with the same ``key`` while a call is in flight get that call's
+        responses replayed instead of making their own.
+        """
+        lane = current_lane.get() or lane
+        flight = self._flights.get(key) if key and self.coalesce else None
+        if flight is not None:
+            self.coalesced += 1
+            responses = await asyncio.shield(flight)
+            # None: the leading call was cancelled, so make our own
+            if responses is not None:
+                for response in responses:
+                    yield response
+                return
+
+        if not key or not self.coalesce or key in self._flights:
+            async for response in self._attempts(call, lane):
+                yield response
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        responses = []
+        completed = False
+        try:
+            async for response in self._attempts(call, lane):
+                responses.append(response)
+                yield response
+            completed = True
+        except Exception as exc:
+            flight.set_exception(exc)
+            # Marks the exception retrieved when nobody was waiting for it
+            flight.exception()
+            raise
+        finally:
+            # A leader that stopped early (cancelled, or closed by its caller) lets the others call themselves
+            if not flight.done():
+                flight.set_result(responses if completed else None)
+            del self._flights[key]
+
+    async def _attempts(self, call, lane):
+        """Rate-limited attempts with full-jitter backoff, within the retry deadline"""
+        deadline = time.monotonic() + self.deadline
+        llm_span = tracing.current_span.get()
+        if llm_span is not None and llm_span.kind != "llm":
+            llm_span = None
+        for attempt in range(1, self.attempts + 1):
+            waited = await self.bucket.acquire(lane)
+            if llm_span is not None:
+                llm_span.add("queue_wait_ms", round(1000 * waited, 1))
+            self.calls += 1
+            self.in_flight += 1
+            streamed = False
+            try:
+                async for response in call():
+                    streamed = True
+                    yield response
+                self.bucket.on_success()
+                return
+            except Exception as exc:
+                if is_throttled(exc):
+                    self.bucket.on_throttled()
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                # Output already went to the caller, or no time left: give up
+                if streamed or not retryable(exc) or attempt == self.attempts or time.monotonic() + delay > deadline:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                if llm_span is not None:
+                    llm_span.add("retries")
+            finally:
+                self.in_flight -= 1
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            **self.bucket.stats(),
+        }
+
+
+@functools.cache
+def get_scheduler():
+    """The process-wide scheduler (settings read on first use, after .env files are loaded)"""
+    return ModelScheduler()
+
+
+@functools.cache
+def _scheduled_gemini_class():
+    from google.adk.models.google_llm import Gemini
+
+    class ScheduledGemini(Gemini):
+        """Gemini whose calls go through the process-wide ModelScheduler"""
+
+        lane: str = INTERACTIVE
+
+        async def generate_content_async(self, llm_request, stream=False):
+            parent = super().generate_content_async
+            key = request_key(self.model, llm_request, stream)
+            async for response in get_scheduler().run(lambda: parent(llm_request, stream), key, self.lane):
+                yield response
+
+    return ScheduledGemini
+
+
+def scheduled_gemini(model, lane=INTERACTIVE, **kwargs):
+    """A Gemini model for LlmAgent that is rate limited, retried and coalesced by the scheduler"""
+    return _scheduled_gemini_class()(model=model, lane=lane, **kwargs)
+
+
+def scheduler_stats():
+    """Scheduler counters, or None before the first model call"""
+    return get_scheduler().stats() if get_scheduler.cache_info().currsize else None
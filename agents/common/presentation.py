@@ -0,0 +1,443 @@
+# Presentation layer for the specialist tools
+#
+# Tools return compact dicts; the emoji-decorated text a human reads is rendered
+# here. TOOL_OUTPUT picks what a tool call hands back to its LLM:
+#   text (default) - the rendered text, as before
+#   json           - the dict itself, which costs far fewer prompt tokens at the
+#                    specialist and again at the coordinator after the A2A hop;
+#                    the final answer is worded once, at the edge
+#
+#   @presented("stock_level")
+#   @cached_tool(ttl=30, depends_on=("inventory", "catalog"))
+#   def check_stock_level(product_name: str) -> dict: ...
+#
+# Failures are dicts with an "error" message (and optionally a "hint"). Lists of
+# records are sent as tables ({"columns": [...], "rows": [[...], ...]}) so their
+# keys aren't repeated for every row.
+import functools
+import os
+from datetime import date
+
+from agents.common.batch import BATCH_LIMIT
+
+# kind -> renderer(data) -> str
+RENDERERS = {}
+
+# inventory status -> (emoji, label); anything else reads as in stock
+STOCK_STATUS_LABELS = {
+    "out_of_stock": ("❌", "Out of Stock"),
+    "low_stock": ("⚠️", "Low Stock"),
+}
+IN_STOCK_LABEL = ("✅", "In Stock")
+
+PACKAGE_STATUS_EMOJIS = {
+    "processing": "📦",
+    "in_transit": "🚚",
+    "out_for_delivery": "🛵",
+    "delivered": "✅"
+}
+
+PACKAGE_STATUS_DESCRIPTIONS = {
+    "processing": "Your package is being prepared for shipment",
+    "in_transit": "Your package is on the way to its destination",
+    "out_for_delivery": "Your package is out for delivery today",
+    "delivered": "Your package has been successfully delivered"
+}
+
+CATEGORY_LABELS = {"electronics": "📱 Electronics", "audio": "🎧 Audio", "tablets": "📟 Tablets"}
+
+# Appended to specialist instructions with TOOL_OUTPUT=json
+STRUCTURED_REPLY_NOTE = "\n    Tools return JSON. Reply with the facts only, tersely, no emojis (overrides the above).\n"
+
+
+def structured_output():
+    # Read per call, so a TOOL_OUTPUT from a .env file loaded after import still applies
+    return os.environ.get("TOOL_OUTPUT", "text").strip().lower() == "json"
+
+
+def agent_instruction(instruction):
+    """Specialist instruction, asking for terse replies when tools return JSON"""
+    return instruction + STRUCTURED_REPLY_NOTE if structured_output() else instruction
+
+
+def renderer(kind):
+    """Register the text renderer for a kind of tool result"""
+
+    def decorator(func):
+        RENDERERS[kind] = func
+        return func
+
+    return decorator
+
+
+def render(kind, data):
+    """Human-readable text for a tool result"""
+    if not isinstance(data, dict):
+        return data
+    if "error" in data and kind not in ERROR_AWARE:
+        return render_error(data)
+    return RENDERERS[kind](data)
+
+
+def render_error(data):
+    text = f"❌ {data['error']}"
+    if data.get("hint"):
+        text += f"\n\n💡 {data['hint']}"
+    return text
+
+
+def presented(kind):
+    """Return the tool's dict as-is with TOOL_OUTPUT=json, else its rendered text"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            data = func(*args, **kwargs)
+            return data if structured_output() else render(kind, data)
+
+        wrapper.kind = kind
+        return wrapper
+
+    return decorator
+
+
+def as_text(tool, result):
+    """Render a result returned by a presented tool (no-op for text results)"""
+    kind = getattr(tool, "kind", None)
+    return render(kind, result) if kind and isinstance(result, dict) else result
+
+
+def table(items):
+    """Compact a list of dicts into columns + rows (missing fields are null)"""
+    columns = list(dict.fromkeys(key for item in items for key in item))
+    return {"columns": columns, "rows": [[item.get(column) for column in columns] for item in items]}
+
+
+def records(data):
+    """The dicts of a table built by table(), without null fields"""
+    columns = data['columns']
+    return [{column: value for column, value in zip(columns, row) if value is not None} for row in data['rows']]
+
+
+def skipped_note(skipped):
+    return f"\n\n⏭️ {skipped} more not looked up (limit {BATCH_LIMIT} per call), ask again for the rest." if skipped else ""
+
+
+# Inventory
+
+@renderer("stock_level")
+def render_stock_level(data):
+    status_emoji, status_msg = STOCK_STATUS_LABELS.get(data['status'], IN_STOCK_LABEL)
+    return f"""
+{status_emoji} **{data['product']} - Stock Status**
+📦 Current Stock: {data['stock']} units
+🔒 Reserved: {data['reserved']} units
+🛒 Available: {data['available']} units
+📊 Status: {status_msg}
+🔄 Reorder Level: {data['reorder_level']} units
+📅 Next Restock: {data['next_restock']}
+"""
+
+
+@renderer("stock_levels")
+def render_stock_levels(data):
+    items = records(data['items'])
+    lines = []
+    for item in items:
+        if "query" in item:
+            lines.append(f"  ❓ '{item['query']}': not found in catalog")
+        elif "error" in item:
+            lines.append(f"  ❓ {item['product']}: {item['error']}")
+        else:
+            status_emoji, status_msg = STOCK_STATUS_LABELS.get(item['status'], IN_STOCK_LABEL)
+            line = f"  {status_emoji} {item['product']}: {item['available']} available ({status_msg})"
+            if "next_restock" in item:
+                line += f" - Restock: {item['next_restock']}"
+            lines.append(line)
+    heading = f"📦 **Stock Status - {len(items)} products**"
+    return heading + "\n" + "\n".join(lines) + skipped_note(data.get("skipped"))
+
+
+@renderer("restock_schedule")
+def render_restock_schedule(data):
+    return f"""
+📦 **{data['product']} - Restock Schedule**
+📅 Next Restock: {data['next_restock']}
+🔄 Reorder Level: {data['reorder_level']} units
+📊 Current Stock: {data['stock']} units
+💡 Status: Will reorder when stock drops below {data['reorder_level']} units
+"""
+
+
+@renderer("low_stock_items")
+def render_low_stock_items(data):
+    if not data['total']:
+        return "✅ All items have sufficient stock levels."
+    items = records(data['items'])
+    if "most_urgent" in data:
+        heading = f"⚠️ **Low Stock Alert - {len(items)} Most Urgent of {data['total']}** ⚠️"
+    else:
+        heading = f"⚠️ **Low Stock Alert** ⚠️ (page {data['page']} of {data['pages']}, {data['total']} items)"
+    lines = [
+        f"  • {item['product']}: {item['stock']} units ({item['status'].replace('_', ' ').title()}) - Restock: {item.get('next_restock')}"
+        for item in items
+    ]
+    return f"{heading}\n\n" + "\n".join(lines)
+
+
+@renderer("reservation")
+def render_reservation(data):
+    return f"""
+🔒 **Reserved {data['quantity']} x {data['product']}**
+🧾 Reservation ID: {data['reservation_id']}
+⏳ Expires in {data['expires_in_minutes']} minutes unless committed or released
+"""
+
+
+@renderer("reservation_update")
+def render_reservation_update(data):
+    reservation_id = data['reservation_id']
+    if data['state'] == "committed":
+        return f"✅ Reservation {reservation_id} committed: {data['quantity']} units sold."
+    if data['state'] == "expired":
+        return f"⌛ Reservation {reservation_id} had already expired, its units are available again."
+    return f"↩️ Reservation {reservation_id} released: {data['quantity']} units available again."
+
+
+@renderer("reorder_forecast")
+def render_reorder_forecast(data):
+    items = records(data['items'])
+    if not items:
+        return f"✅ None of the {data['skus']} SKUs is selling, so nothing is due to run out."
+    lines = []
+    for item in items:
+        emoji = "⚠️" if item['runs_out_before_restock'] else "✅"
+        restock = f" (restock {item['next_restock']})" if "next_restock" in item else " (no restock booked)"
+        lines.append(
+            f"  {emoji} {item['product']}: {item['available']} available, {item['daily_sales']}/day"
+            f" - {item['days_of_cover']} days of cover, out by {item['stockout_date']}{restock}"
+        )
+    heading = f"📉 **Reorder Forecast - {len(items)} products with the least cover**"
+    return (f"{heading}\n" + "\n".join(lines)
+            + f"\n\n⚠️ {data['at_risk']} of {data['skus']} SKUs run out before their next restock.")
+
+
+@renderer("inventory_summary")
+def render_inventory_summary(data):
+    groups = records(data['groups'])
+    lines = []
+    for group in groups:
+        cover = f"{group['days_of_cover']} days of cover" if "days_of_cover" in group else "not selling"
+        lines.append(
+            f"  • {group['group']}: {group['skus']} SKUs, {group['available']} available, {group['daily_sales']}/day, {cover}"
+            f" | ⚠️ {group['low_stock']} low, ❌ {group['out_of_stock']} out, {group['at_risk']} at risk"
+        )
+    heading = f"📊 **Inventory by {data['group_by']} - {sum(group['skus'] for group in groups)} SKUs**"
+    return heading + "\n" + "\n".join(lines)
+
+
+@renderer("status_recompute")
+def render_status_recompute(data):
+    counts = " | ".join(
+        f"{STOCK_STATUS_LABELS.get(status, IN_STOCK_LABEL)[0]} {STOCK_STATUS_LABELS.get(status, IN_STOCK_LABEL)[1]}: {count}"
+        for status, count in data['statuses'].items()
+    )
+    text = f"🔄 **Stock statuses recomputed for {data['skus']} SKUs**\n{counts}\n"
+    if not data['changed']:
+        return text + "✅ Every stored status matches stock, reserved units and reorder level."
+    if data['applied']:
+        text += f"📝 Updated {data['changed']} stored statuses:\n"
+    else:
+        text += f"📝 {data['changed']} stored statuses are out of date (not changed, ask to apply them):\n"
+    lines = []
+    for change in records(data['changes']):
+        stored = STOCK_STATUS_LABELS.get(change.get('stored'), IN_STOCK_LABEL)[1] if change.get('stored') else "none"
+        lines.append(f"  • {change['product']}: {stored} → {STOCK_STATUS_LABELS.get(change['derived'], IN_STOCK_LABEL)[1]}")
+    more = data['changed'] - len(lines)
+    return text + "\n".join(lines) + (f"\n  … and {more} more" if more > 0 else "")
+
+
+# Product catalog
+
+@renderer("product_details")
+def render_product_details(data):
+    if "error" in data:
+        similar = data.get("similar")
+        if not similar:
+            return f"❌ {data['error']}"
+        suggestions = "\n".join([f"  • {p['name']} - ${p['price']}" for p in similar])
+        return f"❌ {data['error']}\n\n🔍 Similar products:\n{suggestions}"
+
+    features = "\n".join([f"  • {feature}" for feature in data.get('features', [])])
+    return f"""
+📱 **{data['name']}** - ${data['price']}
+🏷️  Brand: {data['brand']}
+📂 Category: {data['category']}
+
+📝 Description: {data['description']}
+
+⚙️ Specifications: {data['specifications']}
+
+✨ Features:
+{features}
+
+💡 Need stock information? Ask our inventory agent!
+"""
+
+
+@renderer("products_details")
+def render_products_details(data):
+    items = records(data['items'])
+    lines = []
+    for item in items:
+        if "error" in item:
+            hint = f" (did you mean {item['suggestion']}?)" if item.get("suggestion") else ""
+            lines.append(f"  ❌ '{item['query']}': {item['error']}{hint}")
+        else:
+            lines.append(
+                f"  📱 **{item['name']}** - ${item['price']} | {item['brand']} {item['category']} | {item['specifications']}"
+            )
+    heading = f"🛍️ **Product Details - {len(items)} products**"
+    return heading + "\n" + "\n".join(lines) + skipped_note(data.get("skipped"))
+
+
+@renderer("product_search")
+def render_product_search(data):
+    if "error" in data:
+        categories = ", ".join(data.get("categories", []))
+        return f"❌ {data['error']}\n\n📂 Available categories: {categories}"
+    product_list = "\n".join([
+        f"  • {p['name']} (${p['price']}) - {p['description']}..."
+        for p in records(data['results'])
+    ])
+    return f"🔍 Found {data['total']} products:\n{product_list}"
+
+
+@renderer("categories")
+def render_categories(data):
+    categories = [CATEGORY_LABELS.get(key, f"🛍️ {key.title()}") for key in data['categories']]
+    return "🛍️ Available Categories:\n" + "\n".join([f"  • {cat}" for cat in categories])
+
+
+# Shipping
+
+@renderer("shipping_estimate")
+def render_shipping_estimate(data):
+    if "error" in data:
+        available_methods = ", ".join([m.title() for m in data.get("methods", [])])
+        return f"❌ {data['error']}\n\n🚚 Available methods: {available_methods}"
+    days = data['days']
+    delivery_date = date.fromisoformat(data['delivery_date'])
+    return f"""
+🚚 **Shipping to {data['zip_code']}**
+📦 Method: {data['method'].title()} ({data['carrier']})
+🗺️ Zone: {data['zone']}
+💰 Cost: ${data['cost']}
+⏱️ Delivery Time: {days} business day{'s' if days != 1 else ''}
+📅 Expected Delivery: {delivery_date.strftime('%A, %B %d, %Y')}
+📝 {data['description']}
+"""
+
+
+@renderer("shipping_quotes")
+def render_shipping_quotes(data):
+    by_zip = {}
+    for quote in records(data['quotes']):
+        by_zip.setdefault(quote['zip_code'], []).append(quote)
+    blocks = []
+    for zip_code, quotes in by_zip.items():
+        if "error" in quotes[0]:
+            blocks.append(f"❓ {zip_code}: {quotes[0]['error']}")
+            continue
+        lines = [
+            f"  • {quote['method'].title()} ({quote['carrier']}): ${quote['cost']} - "
+            f"{quote['days']} business day{'s' if quote['days'] != 1 else ''}, arrives {quote.get('delivery_date') or 'N/A'}"
+            for quote in quotes
+        ]
+        blocks.append(f"📍 **{zip_code}** (zone {quotes[0]['zone']})\n" + "\n".join(lines))
+    heading = f"🚚 **Shipping Quotes - {len(by_zip)} ZIP codes**"
+    return heading + "\n\n" + "\n\n".join(blocks) + skipped_note(data.get("skipped"))
+
+
+@renderer("package")
+def render_package(data):
+    if "error" in data:
+        text = render_error({"error": data['error']})
+        if data.get("suggestions"):
+            text += "\n\n🔍 Did you mean: " + ", ".join(data['suggestions'])
+        return text + (f"\n\n💡 {data['hint']}" if data.get("hint") else "")
+    emoji = PACKAGE_STATUS_EMOJIS.get(data['status'], '📦')
+    description = PACKAGE_STATUS_DESCRIPTIONS.get(data['status'], '')
+    text = f"""
+{emoji} **Package Tracking: {data['tracking_number']}**
+📊 Status: {data['status'].replace('_', ' ').title()}
+{description}
+📍 Current Location: {data['location']}
+📅 Last Update: {data['timestamp']}
+🚚 Carrier: {data['carrier']}
+📦 Estimated Delivery: {data.get('estimated_delivery', 'N/A')}
+"""
+    if "history" in data:
+        events = "\n".join(
+            f"  • {event['timestamp']}: {event['status'].replace('_', ' ').title()} - {event['location']}"
+            for event in records(data['history'])
+        )
+        text += f"🕓 History:\n{events}\n"
+    return text
+
+
+@renderer("package_list")
+def render_package_list(data):
+    selection = " / ".join(
+        value for value in (data.get('status') and data['status'].replace('_', ' ').title(), data.get('carrier')) if value
+    )
+    if not data['total']:
+        return f"📭 No packages found for {selection}."
+    lines = []
+    for item in records(data['items']):
+        emoji = PACKAGE_STATUS_EMOJIS.get(item['status'], '📦')
+        lines.append(
+            f"  {emoji} {item['tracking_number']}: {item['status'].replace('_', ' ').title()} - {item['location']} "
+            f"({item['carrier']}, ETA {item.get('estimated_delivery') or 'N/A'})"
+        )
+    heading = f"🚚 **Packages - {selection}** (page {data['page']} of {data['pages']}, {data['total']} packages)"
+    return heading + "\n" + "\n".join(lines)
+
+
+@renderer("packages")
+def render_packages(data):
+    items = records(data['items'])
+    lines = []
+    for item in items:
+        if "error" in item:
+            lines.append(f"  ❓ {item['tracking_number']}: {item['error']}")
+            continue
+        emoji = PACKAGE_STATUS_EMOJIS.get(item['status'], '📦')
+        lines.append(
+            f"  {emoji} {item['tracking_number']}: {item['status'].replace('_', ' ').title()} - {item['location']} "
+            f"({item['carrier']}, ETA {item.get('estimated_delivery') or 'N/A'})"
+        )
+    heading = f"🚚 **Package Tracking - {len(items)} packages**"
+    return heading + "\n" + "\n".join(lines) + skipped_note(data.get("skipped"))
+
+
+@renderer("shipping_options")
+def render_shipping_options(data):
+    options = []
+    for details in records(data['options']):
+        method = details['method']
+        options.append(
+            f"  • **{method.title()}**: ${details['cost']} - {details['days']} day{'s' if details['days'] != 1 else ''} via {details['carrier']}\n    {details['description']}"
+        )
+    return "🚚 **Available Shipping Options**\n\n" + "\n\n".join(options)
+
+
+@renderer("free_shipping")
+def render_free_shipping(data):
+    if data['qualifies']:
+        return f"🎉 Congratulations! Your order of ${data['order_total']:.2f} qualifies for FREE shipping!"
+    return f"📦 Add ${data['needed']:.2f} more to your order to qualify for FREE shipping!"
+
+
+# Kinds whose renderer formats its own errors (extra context such as suggestions)
+ERROR_AWARE = {"product_details", "product_search", "shipping_estimate", "package"}
@@ -0,0 +1,66 @@
+# Launch helper for the specialist A2A servers
+#
+# AGENT_WORKERS=N (or "auto" for one per CPU core) runs N uvicorn worker
+# processes per agent, all accepting on the same port. Workers don't share
+# memory, so with more than one worker the default in-process catalog is
+# replaced by a shared SQLite file (AGENT_SHARED_DB, default shared_catalog.db)
+# seeded with the demo data, and inventory tool results are not cached
+# per worker, so every worker sees the same stock (unless CHANGE_BUS_SOCKET is
+# set: then workers drop cached results when another one writes, see
+# mock_data.change_bus).
+import os
+
+from mock_data.bulk_loader import seed_mock_data
+from mock_data.store import SQLiteStore
+
+DEFAULT_SHARED_DB = "shared_catalog.db"
+
+
+def worker_count():
+    """Worker processes per agent from AGENT_WORKERS (number or "auto", default 1)"""
+    value = os.environ.get("AGENT_WORKERS", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def ensure_shared_store(workers):
+    """Point CATALOG_STORE at a shared SQLite file when several workers would each hold their own copy"""
+    backend = os.environ.get("CATALOG_STORE", "memory").partition(":")[0].lower()
+    if workers <= 1 or backend != "memory":
+        return
+    path = os.path.abspath(os.environ.get("AGENT_SHARED_DB", DEFAULT_SHARED_DB))
+    if not os.path.exists(path):
+        # Seed a private file and link it into place, so agents starting at the
+        # same time never open a half-seeded database
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        store = SQLiteStore(temp_path)
+        seed_mock_data(store)
+        store.connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        store.close()
+        try:
+            os.link(temp_path, path)
+            print(f"🌱 Seeded shared catalog store {path}")
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    os.environ["CATALOG_STORE"] = f"sqlite:{path}"
+    # The change bus tells every worker when another one writes, otherwise don't cache stock
+    if not os.environ.get("CHANGE_BUS_SOCKET"):
+        os.environ.setdefault("TOOL_CACHE_BYPASS", "inventory")
+
+
+def run_agent(get_app, app_import, port, host="0.0.0.0"):
+    """Serve an agent's A2A app, with AGENT_WORKERS worker processes on one port"""
+    import uvicorn
+
+    workers = worker_count()
+    if workers == 1:
+        uvicorn.run(get_app(), host=host, port=port)
+        return
+    ensure_shared_store(workers)
+    print(f"👥 Starting {workers} workers on port {port}")
+    # Workers import the app themselves, so uvicorn needs its import string (and
+    # this process, which only supervises them, never builds one)
+    uvicorn.run(app_import, host=host, port=port, workers=workers)
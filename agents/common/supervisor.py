@@ -0,0 +1,185 @@
+# Process supervisor for the specialist A2A servers
+#
+# Starts every agent at once, polls each agent card until the server answers
+# (with an overall deadline), restarts agents that crash with exponential
+# backoff, and stops the whole process group on shutdown so nothing is left
+# running after start_system.py exits.
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
+
+
+class AgentSpec:
+    """How to launch one agent server and where its agent card is served"""
+
+    def __init__(self, name, command, port, host="localhost", cwd=None):
+        self.name = name
+        self.command = command
+        self.port = port
+        self.cwd = cwd
+        self.card_url = f"http://{host}:{port}{AGENT_CARD_PATH}"
+
+
+class AgentProcess:
+    """A running (or restarting) agent server and its startup/restart history"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.process = None
+        self.started_at = None
+        self.ready_at = None
+        self.restarts = 0
+        self.backoff = 0.0
+        self.next_start = 0.0
+        self.failed = False
+
+    @property
+    def startup_time(self):
+        return self.ready_at - self.started_at if self.ready_at is not None else None
+
+
+def card_ready(url, timeout=0.5):
+    """Whether the agent card at ``url`` is being served"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError, OSError):
+        return False
+
+
+class Supervisor:
+    """Start agents in parallel, wait for readiness, restart crashes, shut down cleanly"""
+
+    def __init__(self, specs, ready_timeout=60.0, poll_interval=0.2, min_backoff=0.5, max_backoff=30.0,
+                 max_restarts=5, stable_after=60.0):
+        self.agents = {spec.name: AgentProcess(spec) for spec in specs}
+        self.ready_timeout = ready_timeout
+        self.poll_interval = poll_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_restarts = max_restarts
+        # An agent that stays up this long gets its backoff and restart count reset
+        self.stable_after = stable_after
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _spawn(self, agent):
+        # Own process group, so shutdown also stops anything the agent spawned
+        agent.process = subprocess.Popen(agent.spec.command, cwd=agent.spec.cwd, start_new_session=True)
+        agent.started_at = time.monotonic()
+        agent.ready_at = None
+
+    def start(self):
+        """Launch every agent at once"""
+        self.started_at = time.monotonic()
+        for agent in self.agents.values():
+            self._spawn(agent)
+
+    def _schedule_restart(self, agent, code):
+        if agent.restarts >= self.max_restarts:
+            if not agent.failed:
+                agent.failed = True
+                print(f"❌ {agent.spec.name} exited with code {code}, giving up after {agent.restarts} restarts")
+            return
+        agent.backoff = min(self.max_backoff, agent.backoff * 2 or self.min_backoff)
+        agent.next_start = time.monotonic() + agent.backoff
+        agent.restarts += 1
+        agent.process = None
+        print(f"⚠️ {agent.spec.name} exited with code {code}, restarting in {agent.backoff:g}s")
+
+    def _check(self, agent):
+        """Restart a crashed agent once its backoff has passed; True if it is running"""
+        if agent.failed:
+            return False
+        if agent.process is None:
+            if time.monotonic() >= agent.next_start:
+                self._spawn(agent)
+            return agent.process is not None
+        code = agent.process.poll()
+        if code is None:
+            if agent.ready_at is not None and time.monotonic() - agent.ready_at > self.stable_after:
+                agent.backoff = 0.0
+                agent.restarts = 0
+            return True
+        self._schedule_restart(agent, code)
+        return False
+
+    def wait_ready(self):
+        """Poll every agent card until all agents answer, or raise TimeoutError at the deadline"""
+        deadline = time.monotonic() + self.ready_timeout
+        pending = {name for name, agent in self.agents.items() if agent.ready_at is None}
+        while pending:
+            with self._lock:
+                for name in list(pending):
+                    agent = self.agents[name]
+                    if self._check(agent) and card_ready(agent.spec.card_url):
+                        agent.ready_at = time.monotonic()
+                        pending.discard(name)
+                    elif agent.failed:
+                        raise RuntimeError(f"{name} failed to start")
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"agents not ready after {self.ready_timeout:g}s: {', '.join(sorted(pending))}")
+            time.sleep(self.poll_interval)
+
+    def report(self):
+        """Print how long each agent took to become ready"""
+        for name, agent in self.agents.items():
+            if agent.startup_time is not None:
+                note = f" after {agent.restarts} restart(s)" if agent.restarts else ""
+                print(f"⏱️ {name} ready on port {agent.spec.port} in {agent.startup_time:.2f}s{note}")
+        total = max((agent.ready_at for agent in self.agents.values() if agent.ready_at), default=self.started_at)
+        print(f"✅ All agents started in {total - self.started_at:.2f}s")
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            with self._lock:
+                for agent in self.agents.values():
+                    # A restarted agent counts as ready again once its card answers
+                    if self._check(agent) and agent.ready_at is None and card_ready(agent.spec.card_url):
+                        agent.ready_at = time.monotonic()
+                        if agent.restarts:
+                            print(f"🔁 {agent.spec.name} back up in {agent.startup_time:.2f}s")
+
+    def watch(self, interval=1.0):
+        """Keep restarting crashed agents in a background thread"""
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True, name="agent-supervisor")
+        self._watcher.start()
+
+    def shutdown(self, timeout=5.0):
+        """Stop watching and terminate every agent (SIGTERM, then SIGKILL after ``timeout``)"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            running = [agent.process for agent in self.agents.values() if agent.process and agent.process.poll() is None]
+            for process in running:
+                self._terminate(process)
+            deadline = time.monotonic() + timeout
+            for process in running:
+                try:
+                    process.wait(max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    self._terminate(process, kill=True)
+                    process.wait()
+        if running:
+            print(f"🛑 Stopped {len(running)} agent(s)")
+
+    @staticmethod
+    def _terminate(process, kill=False):
+        try:
+            if sys.platform == "win32":
+                process.kill() if kill else process.terminate()
+            else:
+                os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,131 @@
+# LRU + TTL result cache for agent tool functions
+#
+#   @cached_tool(ttl=30, depends_on=("inventory", "catalog"))
+#   def check_stock_level(product_name: str) -> str: ...
+#
+# Each decorated tool gets its own size-bounded LRU. Entries expire after the
+# tool's TTL and are dropped as soon as a record in one of the ``depends_on``
+# domains changes (mock_data.store.notify_change), so stock-sensitive tools never
+# serve availability from before an invalidation.
+#
+# TOOL_CACHE_BYPASS=inventory,... turns caching off for tools depending on those
+# domains, e.g. when several worker processes write the same shared store.
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from mock_data.store import add_change_listener
+
+# tool name -> ToolCache
+TOOL_CACHES = {}
+BYPASS_DOMAINS = {domain.strip() for domain in os.environ.get("TOOL_CACHE_BYPASS", "").split(",") if domain.strip()}
+
+
+class ToolCache:
+    """Size-bounded LRU with a TTL and per-domain invalidation for one tool"""
+
+    def __init__(self, name, ttl, maxsize, depends_on):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.depends_on = tuple(depends_on)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on every invalidation; results computed under an older generation are not stored
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for ``key``, or (False, None) on a miss"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def cached_tool(ttl=60.0, maxsize=256, depends_on=()):
+    """Cache a tool's results per argument set (LRU of ``maxsize``, ``ttl`` seconds)"""
+
+    def decorator(func):
+        cache = ToolCache(func.__name__, ttl, maxsize, depends_on)
+        TOOL_CACHES[func.__name__] = cache
+        signature = inspect.signature(func)
+        if BYPASS_DOMAINS.intersection(depends_on):
+            func.cache = cache
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = tuple(bound.arguments.items())
+                hash(key)
+            except TypeError:
+                # Unhashable arguments (e.g. lists) are not cached
+                return func(*args, **kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+            generation = cache.generation
+            value = func(*args, **kwargs)
+            cache.put(key, value, generation)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def invalidate(domain=None, key=None):
+    """Drop cached results of every tool that depends on ``domain`` (all tools if None)"""
+    for cache in TOOL_CACHES.values():
+        if domain is None or domain in cache.depends_on:
+            cache.clear()
+
+
+def cache_stats():
+    """Hit/miss counters per cached tool"""
+    return {name: cache.stats() for name, cache in TOOL_CACHES.items()}
+
+
+add_change_listener(invalidate)
@@ -0,0 +1,547 @@
+# Lightweight end-to-end latency tracing
+#
+#   TRACE_EXPORT=jsonl:traces.jsonl        append finished spans to a JSONL file
+#   TRACE_EXPORT=otlp:http://localhost:4318 POST them (OTLP/HTTP JSON) to a collector
+#   TRACE_SERVICE=<name>                    service name on the spans (set per agent otherwise)
+#
+# Tracing is off when TRACE_EXPORT is unset. Spans live in a context variable, so
+# nested work (the coordinator turn, its model calls, tool calls and A2A requests)
+# links up by itself. A2A requests carry a W3C ``traceparent`` header, which the
+# specialist servers pick up (TraceMiddleware), so one trace id spans every process.
+# Model calls record token counts, the time spent queued in the model scheduler
+# and retries (the scheduler's, or google-genai's under HttpRetryOptions).
+#
+#   python -m agents.common.tracing report traces.jsonl     p50/p95/p99 per span kind
+#   python -m agents.common.tracing collect --port 4318     OTLP collector stand-in writing JSONL
+import argparse
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+SERVICE = os.environ.get("TRACE_SERVICE", "")
+# Logger google-genai uses for "Retrying ..." before each retry sleep
+GENAI_RETRY_LOGGER = "google_genai._api_client"
+
+_exporter = None
+_configured = False
+_config_lock = threading.Lock()
+# function_call_id -> open tool span (tool callbacks can run concurrently)
+_tool_spans = {}
+
+
+class Span:
+    """One timed operation; finished spans go to the configured exporter"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "parent", "name", "kind", "service", "start",
+                 "_started", "duration_ms", "status", "attributes")
+
+    def __init__(self, name, kind, parent=None, trace_id=None, parent_id=None, service=None, attributes=None):
+        self.trace_id = parent.trace_id if parent else trace_id or f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else parent_id
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.service = service or SERVICE or (parent.service if parent else "")
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        self.status = "ok"
+        self.attributes = dict(attributes or {})
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, name, amount=1):
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def elapsed_ms(self):
+        return round(1000 * (time.perf_counter() - self._started), 1)
+
+    def end(self, error=None):
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = 1000 * (time.perf_counter() - self._started)
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = str(error) or type(error).__name__
+        if _exporter is not None:
+            _exporter.export(self)
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": self.service,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(header):
+    """(trace_id, parent span_id) from a W3C traceparent header, or (None, None)"""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+class JsonlExporter:
+    """Appends one JSON line per span; single O_APPEND writes keep lines whole across processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def export(self, span):
+        os.write(self._fd, (json.dumps(span.as_dict(), default=str) + "\n").encode())
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(span):
+    """A span in the OTLP/JSON trace format"""
+    attributes = dict(span.attributes, **{"span.kind": span.kind})
+    start_ns = int(span.start * 1e9)
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 3 if span.kind == "a2a" else 2 if span.kind == "server" else 1,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int(span.duration_ms * 1e6)),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+        "status": {"code": 2 if span.status == "error" else 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+class OtlpExporter:
+    """Batches spans and POSTs them to ``<endpoint>/v1/traces`` from a background thread"""
+
+    def __init__(self, endpoint, batch_size=256, interval=2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span):
+        with self._lock:
+            self._pending.append(span)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            spans, self._pending = self._pending, []
+        by_service = defaultdict(list)
+        for span in spans:
+            by_service[span.service].append(otlp_span(span))
+        if not by_service:
+            return
+        body = {"resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service or "unknown"}}]},
+                "scopeSpans": [{"scope": {"name": "agents.common.tracing"}, "spans": otlp_spans}],
+            }
+            for service, otlp_spans in by_service.items()
+        ]}
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except OSError:
+            self.dropped += len(spans)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+
+def create_exporter(spec):
+    """Exporter for a ``jsonl:<path>`` / ``otlp:<url>`` spec (None to disable)"""
+    if not spec:
+        return None
+    backend, _, target = spec.partition(":")
+    backend = backend.lower()
+    if backend == "jsonl":
+        return JsonlExporter(target or "traces.jsonl")
+    if backend == "otlp":
+        exporter = OtlpExporter(target or "http://localhost:4318")
+        atexit.register(exporter.close)
+        return exporter
+    raise ValueError(f"Unknown TRACE_EXPORT backend {backend!r} (use jsonl:<path> or otlp:<url>)")
+
+
+class _RetryCounter(logging.Handler):
+    """Counts google-genai retry attempts on the current model-call span"""
+
+    def emit(self, record):
+        span = current_span.get()
+        if span is not None and span.kind == "llm" and str(record.msg).startswith("Retrying"):
+            span.add("retries")
+
+
+def configure(spec=None, service=None):
+    """Set up the exporter from TRACE_EXPORT (read on first use, after .env files are loaded)"""
+    global _exporter, _configured, SERVICE
+    with _config_lock:
+        if service:
+            SERVICE = service
+        if _configured and spec is None:
+            return _exporter
+        _exporter = create_exporter(spec if spec is not None else os.environ.get("TRACE_EXPORT", ""))
+        _configured = True
+        if _exporter is not None:
+            retry_logger = logging.getLogger(GENAI_RETRY_LOGGER)
+            if not any(isinstance(handler, _RetryCounter) for handler in retry_logger.handlers):
+                retry_logger.addHandler(_RetryCounter(logging.INFO))
+                if retry_logger.getEffectiveLevel() > logging.INFO:
+                    retry_logger.setLevel(logging.INFO)
+        return _exporter
+
+
+def enabled():
+    return (_exporter if _configured else configure()) is not None
+
+
+@contextlib.contextmanager
+def span(name, kind, **attributes):
+    """Time the block as a child of the current span (no-op when tracing is off)"""
+    if not enabled():
+        yield None
+        return
+    new_span = Span(name, kind, parent=current_span.get(), attributes=attributes)
+    token = current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as exc:
+        new_span.end(error=exc)
+        raise
+    finally:
+        _restore(token)
+        new_span.end()
+
+
+def _restore(token):
+    try:
+        current_span.reset(token)
+    except ValueError:
+        # An async generator closed from another context (e.g. during garbage collection)
+        pass
+
+
+def start_span(name, kind, **attributes):
+    """A child of the current span that the caller ends itself (None when tracing is off)"""
+    if not enabled():
+        return None
+    return Span(name, kind, parent=current_span.get(), attributes=attributes)
+
+
+def annotate(**attributes):
+    """Set attributes on the current span, if there is one"""
+    current = current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+class TraceMiddleware:
+    """ASGI middleware: one ``server`` span per HTTP request, continuing the caller's trace"""
+
+    def __init__(self, app, service=None):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        trace_id, parent_id = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        server_span = Span(
+            f"{scope['method']} {scope['path']}", "server", trace_id=trace_id, parent_id=parent_id,
+            service=self.service, attributes={"path": scope["path"]},
+        )
+        token = current_span.set(server_span)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                server_span.set(status_code=message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            server_span.end(error=exc)
+            raise
+        finally:
+            _restore(token)
+            server_span.end()
+
+
+def instrument_app(app, service):
+    """Add TraceMiddleware to a Starlette/FastAPI app and name this process's spans"""
+    configure(service=service)
+    app.add_middleware(TraceMiddleware, service=service)
+    return app
+
+
+# ADK agent callbacks: model calls and tool calls become spans
+
+def _before_model(callback_context, llm_request):
+    parent = current_span.get()
+    model = llm_request.model or ""
+    llm_span = Span(f"llm {model}".strip(), "llm", parent=parent,
+                    attributes={"agent": callback_context.agent_name, "model": model})
+    # Set, not a token reset: the model call and after_model run later in the same task
+    current_span.set(llm_span)
+    return None
+
+
+def _finish_model(error=None, llm_response=None):
+    llm_span = current_span.get()
+    if llm_span is None or llm_span.kind != "llm":
+        return
+    if llm_response is not None:
+        if llm_response.partial:
+            llm_span.attributes.setdefault("first_chunk_ms", llm_span.elapsed_ms())
+            return
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            llm_span.set(
+                prompt_tokens=usage.prompt_token_count or 0,
+                output_tokens=usage.candidates_token_count or 0,
+                total_tokens=usage.total_token_count or 0,
+            )
+        if llm_response.error_code:
+            error = llm_response.error_message or llm_response.error_code
+    current_span.set(llm_span.parent)
+    llm_span.end(error=error)
+
+
+def _after_model(callback_context, llm_response):
+    _finish_model(llm_response=llm_response)
+    return None
+
+
+def _model_error(callback_context, llm_request, error):
+    _finish_model(error=error)
+    return None
+
+
+def _before_tool(tool, args, tool_context):
+    tool_span = Span(tool.name, "tool", parent=current_span.get(),
+                     attributes={"agent": tool_context.agent_name})
+    _tool_spans[tool_context.function_call_id] = tool_span
+    return None
+
+
+def _after_tool(tool, args, tool_context, tool_response):
+    tool_span = _tool_spans.pop(tool_context.function_call_id, None)
+    if tool_span is not None:
+        error = tool_response.get("error") if isinstance(tool_response, dict) else None
+        if error:
+            tool_span.set(result_error=str(error))
+        tool_span.end()
+    return None
+
+
+def _tool_error(tool, args, tool_context, error):
+    tool_span = _tool_spans.pop(tool_context.function_call_id, None)
+    if tool_span is not None:
+        tool_span.end(error=error)
+    return None
+
+
+def agent_callbacks():
+    """LlmAgent callback kwargs that trace model and tool calls ({} when tracing is off)"""
+    if not enabled():
+        return {}
+    return {
+        "before_model_callback": _before_model,
+        "after_model_callback": _after_model,
+        "on_model_error_callback": _model_error,
+        "before_tool_callback": _before_tool,
+        "after_tool_callback": _after_tool,
+        "on_tool_error_callback": _tool_error,
+    }
+
+
+# CLI: report and collector stand-in
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted ``values``"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def read_spans(path):
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def report(paths, by="kind"):
+    """p50/p95/p99 duration per span kind (or name/service), with token and retry totals"""
+    durations = defaultdict(list)
+    tokens = defaultdict(lambda: [0, 0])
+    retries = defaultdict(int)
+    errors = defaultdict(int)
+    traces = set()
+    for path in paths:
+        for record in read_spans(path):
+            key = record["kind"] if by == "kind" else f"{record['kind']}:{record[by]}"
+            durations[key].append(record["duration_ms"])
+            attributes = record.get("attributes") or {}
+            tokens[key][0] += attributes.get("prompt_tokens", 0)
+            tokens[key][1] += attributes.get("output_tokens", 0)
+            retries[key] += attributes.get("retries", 0)
+            errors[key] += record.get("status") == "error"
+            traces.add(record["trace_id"])
+
+    print(f"{len(traces)} traces, {sum(len(values) for values in durations.values())} spans")
+    print(f"{by:<40} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>6} {'tokens in/out':>15} {'retries':>7}")
+    for key in sorted(durations, key=lambda key: -percentile(sorted(durations[key]), 0.5)):
+        values = sorted(durations[key])
+        prompt_tokens, output_tokens = tokens[key]
+        token_text = f"{prompt_tokens}/{output_tokens}" if prompt_tokens or output_tokens else "-"
+        print(
+            f"{key[:40]:<40} {len(values):>6} {percentile(values, 0.50):>9.1f} {percentile(values, 0.95):>9.1f} "
+            f"{percentile(values, 0.99):>9.1f} {values[-1]:>9.1f} {errors[key]:>6} {token_text:>15} {retries[key]:>7}"
+        )
+
+
+def _from_otlp(body):
+    """Spans in the JSONL record format from an OTLP/JSON request body"""
+    kinds = {1: "internal", 2: "server", 3: "a2a"}
+    for resource_spans in body.get("resourceSpans", []):
+        service = next(
+            (attribute["value"].get("stringValue", "") for attribute in resource_spans.get("resource", {}).get("attributes", [])
+             if attribute["key"] == "service.name"),
+            "",
+        )
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for otlp in scope_spans.get("spans", []):
+                attributes = {
+                    attribute["key"]: next(iter(attribute["value"].values()), None)
+                    for attribute in otlp.get("attributes", [])
+                }
+                for key, value in attributes.items():
+                    if isinstance(value, str) and value.lstrip("-").isdigit() and key.endswith(("tokens", "retries", "status_code")):
+                        attributes[key] = int(value)
+                start_ns, end_ns = int(otlp["startTimeUnixNano"]), int(otlp["endTimeUnixNano"])
+                yield {
+                    "trace_id": otlp["traceId"],
+                    "span_id": otlp["spanId"],
+                    "parent_id": otlp.get("parentSpanId"),
+                    "name": otlp["name"],
+                    "kind": attributes.pop("span.kind", kinds.get(otlp.get("kind"), "internal")),
+                    "service": service,
+                    "start": start_ns / 1e9,
+                    "duration_ms": (end_ns - start_ns) / 1e6,
+                    "status": "error" if otlp.get("status", {}).get("code") == 2 else "ok",
+                    "attributes": attributes,
+                }
+
+
+def collect(host, port, output):
+    """Minimal OTLP/HTTP JSON receiver that appends the spans to a JSONL file"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            lines = [json.dumps(record) + "\n" for record in _from_otlp(body)]
+            with lock, open(output, "a") as file:
+                file.writelines(lines)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"📡 Collecting OTLP spans on http://{host}:{port}/v1/traces into {output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trace report and OTLP collector stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="latency percentiles per span kind")
+    report_parser.add_argument("paths", nargs="+", help="JSONL span files")
+    report_parser.add_argument("--by", choices=("kind", "name", "service"), default="kind")
+    collect_parser = commands.add_parser("collect", help="receive OTLP/HTTP JSON spans into a JSONL file")
+    collect_parser.add_argument("--host", default="127.0.0.1")
+    collect_parser.add_argument("--port", type=int, default=4318)
+    collect_parser.add_argument("--output", default="traces.jsonl")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        report(args.paths, args.by)
+    else:
+        collect(args.host, args.port, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,9 @@
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # The ADK loader finds the coordinator as ``agent``; loaded on first access, so the
+    # fast-path router, response cache and memory modules import without the coordinator
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,110 +1,280 @@
+import asyncio
+import functools
 import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.agents.remote_a2a_agent import RemoteA2aAgent, AGENT_CARD_WELL_KNOWN_PATH
 
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.memory import InMemoryMemoryService
-from google.adk.tools import load_memory, preload_memory
+from agents.common import tracing
+from agents.common.model_scheduler import scheduled_gemini
+from agents.customer_support_agent.fast_path import FastPathRouter
+from agents.customer_support_agent.http_pool import get_http_client
+from agents.customer_support_agent.response_cache import create_response_cache
 
-from google.genai import types
+if TYPE_CHECKING:
+    from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+    from google.adk.runners import Runner
 
 load_dotenv()
+tracing.configure(service="customer_support_agent")
+
+# ADK, the Gemini client, the remote agents and the runners are built on first use
+# (get_runner(), get_agent(), ... or the module attributes of the same names), so
+# importing this module stays cheap.
+
+APP_NAME = "CustomerSupportApp"
+USER_ID = "demo_user"
+
+# Specialist agents reachable over A2A: name -> (agent card URL, description)
+REMOTE_AGENTS = {
+    "product_catalog_agent": (
+        "http://localhost:8001/.well-known/agent-card.json",
+        "Provides detailed product information from mock catalog",
+    ),
+    "inventory_agent": (
+        "http://localhost:8002/.well-known/agent-card.json",
+        "Manages inventory levels and restocking schedules using mock data",
+    ),
+    "shipping_agent": (
+        "http://localhost:8003/.well-known/agent-card.json",
+        "Provides shipping estimates and package tracking using mock data",
+    ),
+}
+
+
+def create_remote_agent(name: str) -> "RemoteA2aAgent":
+    """Create a RemoteA2aAgent for one of the specialist agents (on the shared connection pool)"""
+    from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+
+    agent_card, description = REMOTE_AGENTS[name]
+    return RemoteA2aAgent(
+        name=name, description=description, agent_card=agent_card, httpx_client=get_http_client()
+    )
+
+# Answers simple tracking/shipping/stock questions without any model call
+fast_path_router = FastPathRouter()
+
+# Opt-in (RESPONSE_CACHE=1) cache of final answers for near-duplicate questions
+response_cache = create_response_cache()
+# Last question per session, used to scope follow-up questions in the cache
+last_queries = OrderedDict()
+MAX_TRACKED_SESSIONS = 10000
+
+
+@functools.cache
+def streaming_run_config():
+    """Run config that streams model output chunk by chunk instead of waiting for the final response"""
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+
+    return RunConfig(streaming_mode=StreamingMode.SSE)
 
 
+async def get_or_create_session(app_name: str, user_id: str, session_id: str):
+    """Fetch a session, creating it on first use"""
+    session_service = get_session_service()
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        session = await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    return session
 
-# Create remote agents for A2A communication
-product_catalog_agent = RemoteA2aAgent(
-    name="product_catalog_agent",
-    description="Provides detailed product information from mock catalog",
-    agent_card="http://localhost:8001/.well-known/agent-card.json"
-)
 
-inventory_agent = RemoteA2aAgent(
-    name="inventory_agent", 
-    description="Manages inventory levels and restocking schedules using mock data",
-    agent_card="http://localhost:8002/.well-known/agent-card.json"
-)
+async def record_turn(runner_instance, user_id, session_id, query, answer):
+    """Add a turn answered outside the runner to the session and memory, so follow-up questions see it"""
+    from google.adk.events import Event
+    from google.genai import types
 
-shipping_agent = RemoteA2aAgent(
-    name="shipping_agent",
-    description="Provides shipping estimates and package tracking using mock data", 
-    agent_card="http://localhost:8003/.well-known/agent-card.json"
-)
+    session = await get_or_create_session(runner_instance.app_name, user_id, session_id)
+    invocation_id = Event.new_id()
+    for author, role, text in (("user", "user", query), (runner_instance.agent.name, "model", answer)):
+        await runner_instance.session_service.append_event(session, Event(
+            invocation_id=invocation_id, author=author, content=types.Content(role=role, parts=[types.Part(text=text)])
+        ))
+    # What auto_save_to_memory does after a runner turn
+    if runner_instance.memory_service is not None:
+        await runner_instance.memory_service.add_session_to_memory(session)
+
+
+def event_text(event) -> str:
+    """Visible text of an ADK event ("" for tool calls and thoughts)"""
+    if not event.content or not event.content.parts:
+        return ""
+    text = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+    return "" if text == "None" else text
+
+
+async def respond(
+        runner_instance: "Runner", query: str, session_id: str = "default", user_id: str = USER_ID,
+        fast_path: bool = True, parallel: bool = True
+):
+    """Answer one query, yielding the response text as soon as each chunk is produced"""
+    # One "turn" span per query: the model, tool and A2A spans of the answer nest under it
+    with tracing.span("turn", "turn", session_id=session_id, user_id=user_id) as turn_span:
+        chunks = 0
+        async for chunk in _answer(runner_instance, query, session_id, user_id, fast_path, parallel):
+            if turn_span is not None and not chunks:
+                turn_span.set(first_chunk_ms=turn_span.elapsed_ms())
+            chunks += 1
+            yield chunk
+
+
+async def _answer(runner_instance, query, session_id, user_id, fast_path, parallel):
+    from google.genai import types
+
+    context = last_queries.pop(session_id, "")
+    last_queries[session_id] = query
+    if len(last_queries) > MAX_TRACKED_SESSIONS:
+        last_queries.popitem(last=False)
+
+    # Deterministic fast path: direct tool call, LLM only for ambiguous input
+    if fast_path:
+        answer = fast_path_router.route(query)
+        if answer is not None:
+            tracing.annotate(route="fast_path")
+            yield answer
+            await record_turn(runner_instance, user_id, session_id, query, answer)
+            return
+    if response_cache is not None:
+        cached = response_cache.get(query, session_id, context, user_id)
+        if cached is not None:
+            tracing.annotate(route="cache")
+            yield cached
+            await record_turn(runner_instance, user_id, session_id, query, cached)
+            return
+        snapshot = response_cache.snapshot(query, session_id, context, user_id)
+    answers = []
+
+    # Composite order queries: ask the specialists concurrently, merge as they answer
+    requests = fast_path_router.order_requests(query) if parallel else None
+    if requests:
+        tracing.annotate(route="fan_out")
+        failed = False
+        separator = ""
+        shown = []
+        async for agent_name, answer, error in fan_out(requests, session_id, user_id=user_id):
+            if error:
+                failed = True
+                answer = f"⚠️ {agent_name} unavailable ({error})"
+            elif not answer:
+                continue
+            else:
+                answers.append(answer)
+            shown.append(answer)
+            yield separator + answer
+            separator = "\n\n"
+        await record_turn(runner_instance, user_id, session_id, query, "\n\n".join(shown))
+        if response_cache is not None and not failed:
+            response_cache.put(snapshot, "\n\n".join(answers))
+        return
+
+    tracing.annotate(route="llm")
+    session = await get_or_create_session(runner_instance.app_name, user_id, session_id)
+    query_content = types.Content(role="user", parts=[types.Part(text=query)])
+
+    # Partial events carry the text as it is generated; the final event repeats it in full
+    streamed = False
+    async for event in runner_instance.run_async(
+        user_id=user_id, session_id=session.id, new_message=query_content, run_config=streaming_run_config()
+    ):
+        text = event_text(event)
+        if event.partial:
+            if text:
+                if not streamed and answers:
+                    yield "\n"
+                streamed = True
+                yield text
+            continue
+        if event.is_final_response() and text:
+            if not streamed:
+                yield ("\n" if answers else "") + text
+            answers.append(text)
+        streamed = False
+
+    if response_cache is not None:
+        response_cache.put(snapshot, "\n".join(answers))
 
-print("✅ Connected to all specialized agents via A2A")
 
 async def run_session(
-        runner_instance: Runner, user_queries: list[str] | str, session_id: str = "default"
+        runner_instance: "Runner", user_queries: list[str] | str, session_id: str = "default",
+        fast_path: bool = True, parallel: bool = True, user_id: str = USER_ID
 ):
     """Helper function to run queries in a session and display responses"""
     print(f"\n### Session: {session_id}")
 
-    # Create or retrieve existing session
-    try:
-        session = await session_service.create_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
-    except:
-        session = await session_service.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
-
     # Convert single query to list
     if isinstance(user_queries, str):
         user_queries = [user_queries]
 
-    # Process each query
+    # Process each query, printing the answer as it streams in
     for query in user_queries:
         print(f"\nUser > {query}")
-        query_content = types.Content(role="user", parts=[types.Part(text=query)])
+        print("Model: > ", end="", flush=True)
+        async for chunk in respond(runner_instance, query, session_id, user_id, fast_path, parallel):
+            print(chunk, end="", flush=True)
+        print()
 
-        # Stream agent response
-        async for event in runner_instance.run_async(
-            user_id=USER_ID, session_id=session.id, new_message=query_content
-        ):
-            if event.is_final_response() and event.content and event.content.parts:
-                text = event.content.parts[0].text
-                if text and text != "None":
-                    print(f"Model: > {text}")
 
+# Per-agent timeouts (seconds) for concurrent fan-out
+FANOUT_TIMEOUTS = {
+    "product_catalog_agent": 30.0,
+    "inventory_agent": 30.0,
+    "shipping_agent": 30.0,
+}
 
-print("✅ Helper functions defined.")        
 
-retry_config = types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],  # Retry on these HTTP errors
-)
+async def ask_remote_agent(agent_name: str, question: str, session_id: str, user_id: str = USER_ID) -> str:
+    """Send one question to a specialist over A2A and return its final answer"""
+    from google.genai import types
 
-memory_service = (
-    InMemoryMemoryService()
-)
+    fanout_runner = get_fanout_runners()[agent_name]
+    session = await get_or_create_session(fanout_runner.app_name, user_id, session_id)
 
-APP_NAME = "CustomerSupportApp"
-USER_ID = "demo_user"
+    content = types.Content(role="user", parts=[types.Part(text=question)])
+    answer = []
+    async for event in fanout_runner.run_async(
+        user_id=user_id, session_id=session.id, new_message=content
+    ):
+        if event.is_final_response() and event.content and event.content.parts:
+            answer.extend(part.text for part in event.content.parts if part.text and part.text != "None")
+    return "\n".join(answer)
 
-async def auto_save_to_memory(callback_context):
-    """Automatically save session to memory after each agent turn."""
-    await callback_context._invocation_context.memory_service.add_session_to_memory(
-        callback_context._invocation_context.session
-    )
 
-print("Callback created.")
+async def fan_out(
+        requests: dict[str, str], session_id: str = "default", timeouts: dict[str, float] | None = None,
+        user_id: str = USER_ID
+):
+    """Ask several specialists concurrently, yielding (agent_name, answer, error) as each finishes.
 
-print("🚀 Starting Customer Support Agent (Mock Coordinator)...")
-# Create Customer Support Agent with all sub-agents and auto memory
-customer_support_agent = LlmAgent(
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        api_key=os.environ.get("GOOGLE_API_KEY")
-    ),
-    name="customer_support_agent",
-    description="Comprehensive customer support that coordinates product info, inventory, and shipping using mock demonstration data.",
-    instruction="""
+    Every agent gets its own timeout; an agent that times out or fails yields an
+    error instead of an answer, and anything still running is cancelled if the
+    caller stops early. Wall-clock time is bounded by the slowest agent.
+    """
+    timeouts = {**FANOUT_TIMEOUTS, **(timeouts or {})}
+    pending = {
+        asyncio.create_task(
+            asyncio.wait_for(ask_remote_agent(name, question, session_id, user_id), timeouts[name])
+        ): name
+        for name, question in requests.items()
+    }
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    yield name, task.result(), None
+                except asyncio.TimeoutError:
+                    yield name, None, f"timed out after {timeouts[name]:g}s"
+                except Exception as exc:
+                    yield name, None, str(exc) or type(exc).__name__
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+INSTRUCTION = """
     You are a comprehensive customer support agent coordinating multiple specialized agents.
     This is a DEMONSTRATION SYSTEM using mock data for testing purposes.
     
@@ -139,6 +309,10 @@ customer_support_agent = LlmAgent(
     For COMPLETE ORDER SUPPORT → Use ALL relevant agents
     Example: "I want to buy Samsung Galaxy S24 - tell me price, stock, and shipping"
     
+    For SEVERAL ITEMS (a cart, all of a customer's orders) → ask the specialist
+    about all of them in ONE message; each one has a batch tool for lists
+    Example: "Are iPhone 15 Pro, iPad Air and Sony WH-1000XM5 in stock?"
+    
     💡 **Sample Data Available:**
     • Products: iPhone 15 Pro, Samsung Galaxy S24, MacBook Pro, Sony Headphones, iPad Air
     • Tracking: TRK123456789, TRK987654321, TRK456789123
@@ -146,29 +320,97 @@ customer_support_agent = LlmAgent(
     
     Always be friendly, helpful, and coordinate seamlessly between agents.
     Mention this is a demo system when appropriate.
-    """,
-    sub_agents=[product_catalog_agent, inventory_agent, shipping_agent],
-    tools=[preload_memory],
-    after_agent_callback=auto_save_to_memory
-)
+    """
+
+
+async def auto_save_to_memory(callback_context):
+    """Automatically save session to memory after each agent turn (only events added since the last save)."""
+    await callback_context._invocation_context.memory_service.add_session_to_memory(
+        callback_context._invocation_context.session
+    )
 
-print("✅ Customer Support Agent created with all sub-agents and autp memory!")
 
-session_service = InMemorySessionService()
+def create_agent():
+    """Build the coordinator with the three specialists as sub-agents and auto memory"""
+    from google.adk.agents import LlmAgent
+    from google.adk.tools import preload_memory
 
-runner = Runner(
-    agent=customer_support_agent,
-    app_name=APP_NAME,
-    session_service=session_service,
-    memory_service=memory_service
-)
+    return LlmAgent(
+        model=scheduled_gemini("gemini-2.5-flash-lite", api_key=os.environ.get("GOOGLE_API_KEY")),
+        name="customer_support_agent",
+        description="Comprehensive customer support that coordinates product info, inventory, and shipping using mock demonstration data.",
+        instruction=INSTRUCTION,
+        sub_agents=[create_remote_agent(name) for name in REMOTE_AGENTS],
+        tools=[preload_memory],
+        after_agent_callback=auto_save_to_memory,
+        **tracing.agent_callbacks()
+    )
+
+
+@functools.cache
+def get_memory_service():
+    """Capped, compacting memory (MEMORY_BACKEND=sqlite persists it across restarts)"""
+    from agents.customer_support_agent.memory import create_memory_service
+
+    return create_memory_service()
+
+
+@functools.cache
+def get_session_service():
+    """LRU-bounded sessions with idle expiry (SESSION_DB_URL switches to a database)"""
+    from agents.customer_support_agent.memory import create_session_service
+
+    return create_session_service()
+
+
+@functools.cache
+def get_agent():
+    """The coordinator agent, built once"""
+    return create_agent()
+
+
+@functools.cache
+def get_runner():
+    """Runner for the coordinator agent"""
+    from google.adk.runners import Runner
+
+    return Runner(
+        agent=get_agent(),
+        app_name=APP_NAME,
+        session_service=get_session_service(),
+        memory_service=get_memory_service()
+    )
+
+
+@functools.cache
+def get_fanout_runners():
+    """One runner per specialist for concurrent fan-out (an agent can only have one parent,
+    so these use their own RemoteA2aAgent instances)"""
+    from google.adk.runners import Runner
+
+    return {
+        name: Runner(
+            agent=create_remote_agent(name),
+            app_name=f"{APP_NAME}_{name}",
+            session_service=get_session_service(),
+        )
+        for name in REMOTE_AGENTS
+    }
 
-print("Runner created.")
-print("Cusomter agent created with a2a agents and memory saving.")
 
+# Lazily built module attributes (``root_agent`` is what the ADK CLI looks for)
+LAZY_ATTRIBUTES = {
+    "root_agent": get_agent,
+    "customer_support_agent": get_agent,
+    "runner": get_runner,
+    "fanout_runners": get_fanout_runners,
+    "session_service": get_session_service,
+    "memory_service": get_memory_service,
+}
 
-# Export for ADK CLI
-root_agent = customer_support_agent
 
-print("🎯 Customer Support Agent ready to coordinate!")
-print("💬 Try asking: 'I want to buy an iPhone 15 Pro - tell me about it, check stock, and shipping to 94105'")
\ No newline at end of file
+def __getattr__(name):
+    factory = LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
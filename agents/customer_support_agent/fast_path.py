@@ -0,0 +1,185 @@
+# Deterministic fast path for simple intents, in front of the coordinator LLM
+#
+# "track TRK123456789", "shipping to 94105" or "is iPad Air in stock" are answered
+# by calling the specialist tool directly, skipping the coordinator's model call,
+# the A2A hop and the specialist's own model call. Several tracking numbers or
+# several products in a stock question go to the batch tools in one call.
+# Anything ambiguous (several intents, unknown entities) falls through to the LLM path.
+# With TOOL_OUTPUT=json the tools return dicts, which are rendered to text here.
+#
+# Check the routing of known tricky questions with:
+#   python -m agents.customer_support_agent.fast_path --check
+import argparse
+import re
+import sys
+from collections import Counter, namedtuple
+
+from agents.common import tracing
+from agents.common.presentation import as_text
+from agents.inventory_agent.tools import check_stock_level, check_stock_levels
+from agents.shipping_agent.tools import get_shipping_estimates, track_package, track_packages
+from mock_data.sample_data import find_products_in_text, list_shipping_options
+
+TRACKING_RE = re.compile(r"\b([A-Z]{3}\d{9})\b", re.IGNORECASE)
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+WORD_RE = re.compile(r"[a-z]+")
+
+TRACK_WORDS = {"track", "tracking", "where", "status", "package", "parcel", "shipment", "order"}
+SHIPPING_WORDS = {"ship", "shipping", "deliver", "delivery", "send", "arrive"}
+STOCK_WORDS = {"stock", "available", "availability", "inventory", "left"}
+
+# Words that point at another specialist or a multi-part question
+PRODUCT_WORDS = {"price", "cost", "much", "spec", "specs", "specifications", "feature", "features",
+                 "compare", "recommend", "similar", "cheaper", "describe", "about", "buy"}
+RESTOCK_WORDS = {"restock", "restocked", "reorder", "when"}
+PRICE_WORDS = {"price", "cost", "much", "spec", "specs", "specifications", "feature", "features", "details", "about"}
+ORDER_WORDS = {"buy", "order", "purchase", "checkout"}
+
+FastPathMatch = namedtuple("FastPathMatch", "intent tool args")
+
+# (question, (intent, args) it must be routed to, or None for the LLM path)
+CHECK_CASES = (
+    ("Is the iPad Air in stock?", ("stock_level", ("iPad Air",))),
+    ("Is the iPhone 15 Pro in stock?", ("stock_level", ("iPhone 15 Pro",))),
+    # Models the catalog doesn't have: a lookup of the shorter name would answer for the wrong SKU
+    ("Is the iPhone 15 Pro Max in stock?", None),
+    ("is the iphone 15 pro max in stock", None),
+    ("Is the MacBook Pro 16 in stock?", None),
+    ("Are the iPad Air and Samsung Galaxy S24 in stock?", ("stock_levels", (["Samsung Galaxy S24", "iPad Air"],))),
+    ("Track TRK123456789", ("track_package", ("TRK123456789",))),
+)
+
+
+class FastPathRouter:
+    """Rule/regex + keyword intent classifier that calls specialist tools directly"""
+
+    def __init__(self, tools=None):
+        self.tools = tools or {
+            "track_package": track_package,
+            "track_packages": track_packages,
+            "shipping_estimate": get_shipping_estimates,
+            "stock_level": check_stock_level,
+            "stock_levels": check_stock_levels,
+        }
+        self.hits = Counter()
+        self.misses = 0
+
+    def classify(self, query):
+        """Return a FastPathMatch for an unambiguous simple intent, else None"""
+        words = set(WORD_RE.findall(query.lower()))
+        tracking_numbers = {number.upper() for number in TRACKING_RE.findall(query)}
+        zip_codes = set(ZIP_RE.findall(query))
+
+        if tracking_numbers:
+            if zip_codes or words & (STOCK_WORDS | PRODUCT_WORDS):
+                return None
+            # A bare tracking number is a tracking request too
+            if words - {"trk", "and"} and not words & TRACK_WORDS:
+                return None
+            if len(tracking_numbers) > 1:
+                return FastPathMatch("track_packages", self.tools["track_packages"], (sorted(tracking_numbers),))
+            return FastPathMatch("track_package", self.tools["track_package"], (tracking_numbers.pop(),))
+
+        products = find_products_in_text(query)
+
+        if zip_codes:
+            if len(zip_codes) > 1 or products or not words & SHIPPING_WORDS:
+                return None
+            if words & (STOCK_WORDS | TRACK_WORDS | (PRODUCT_WORDS - {"cost", "much"})):
+                return None
+            methods = [method for method in list_shipping_options() if method in words]
+            if len(methods) > 1:
+                return None
+            method = methods[0] if methods else "standard"
+            return FastPathMatch("shipping_estimate", self.tools["shipping_estimate"], (zip_codes.pop(), method))
+
+        if words & STOCK_WORDS and products:
+            if words & (SHIPPING_WORDS | PRODUCT_WORDS | RESTOCK_WORDS):
+                return None
+            if len(products) > 1:
+                names = [product['name'] for product in products]
+                return FastPathMatch("stock_levels", self.tools["stock_levels"], (names,))
+            return FastPathMatch("stock_level", self.tools["stock_level"], (products[0]['name'],))
+
+        return None
+
+    def order_requests(self, query):
+        """Per-agent sub-questions for a composite order query about one product.
+
+        Returns ``{agent_name: question}`` when the query asks about two or more of
+        price/details, stock and shipping (or wants to buy the product), else None.
+        """
+        words = set(WORD_RE.findall(query.lower()))
+        if TRACKING_RE.search(query):
+            return None
+        products = find_products_in_text(query)
+        if len(products) != 1:
+            return None
+        name = products[0]['name']
+        zip_codes = ZIP_RE.findall(query)
+
+        wants_all = bool(words & ORDER_WORDS)
+        requests = {}
+        if wants_all or words & PRICE_WORDS:
+            requests["product_catalog_agent"] = f"Give me the price and key details of {name}."
+        if wants_all or words & STOCK_WORDS:
+            requests["inventory_agent"] = f"Is {name} in stock, and how many units are available?"
+        if wants_all or words & SHIPPING_WORDS or zip_codes:
+            if len(zip_codes) == 1:
+                requests["shipping_agent"] = f"What are the shipping costs and delivery estimates to {zip_codes[0]}?"
+            else:
+                requests["shipping_agent"] = "What shipping options are available, with costs and delivery times?"
+        return requests if len(requests) >= 2 else None
+
+    def route(self, query):
+        """Answer ``query`` directly if it is a simple intent, else return None"""
+        match = self.classify(query)
+        if match is None:
+            self.misses += 1
+            return None
+        self.hits[match.intent] += 1
+        with tracing.span(match.tool.__name__, "tool", intent=match.intent, fast_path=True):
+            return as_text(match.tool, match.tool(*match.args))
+
+    @property
+    def hit_rate(self):
+        total = sum(self.hits.values()) + self.misses
+        return sum(self.hits.values()) / total if total else 0.0
+
+    def stats(self):
+        """Hit/miss counters and hit rate"""
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "by_intent": dict(self.hits),
+        }
+
+
+def check(router=None):
+    """CHECK_CASES whose routing differs from the expected one, as messages"""
+    router = router or FastPathRouter()
+    failures = []
+    for query, expected in CHECK_CASES:
+        match = router.classify(query)
+        found = (match.intent, match.args) if match else None
+        if found != expected:
+            failures.append(f"{query!r}: expected {expected}, got {found}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic fast path of the customer support agent")
+    parser.add_argument("--check", action="store_true", help="check the routing of CHECK_CASES")
+    args = parser.parse_args(argv)
+    if args.check:
+        failures = check()
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"✅ {len(CHECK_CASES)} fast path routes as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# Shared, pooled HTTP client for all RemoteA2aAgent connections
+#
+# One httpx.AsyncClient (and so one connection pool with keep-alive) is shared by
+# every remote agent in the coordinator process. The transport caps connections
+# per host, caches agent cards with a TTL (refreshed in the background), and keeps
+# pool metrics so the limits can be sized for real traffic.
+#
+# Settings (environment variables):
+#   A2A_MAX_CONNECTIONS_PER_HOST  concurrent requests per agent host (default 20)
+#   A2A_MAX_KEEPALIVE             idle keep-alive connections kept open (default 20)
+#   A2A_KEEPALIVE_EXPIRY          seconds an idle connection is kept (default 30)
+#   A2A_HTTP2                     "1" to negotiate HTTP/2 (needs the h2 package)
+#   A2A_CARD_TTL                  seconds an agent card is cached (default 300)
+#   A2A_TIMEOUT                   request timeout in seconds (default 600)
+#   A2A_REPLICAS                  extra replicas per agent host, spread by least outstanding
+#                                 requests, e.g. "localhost:8002=localhost:8012,localhost:8022"
+#                                 (several agents separated by ";")
+import asyncio
+import os
+import time
+from collections import defaultdict
+
+import httpx
+
+from agents.common import tracing
+
+AGENT_CARD_SUFFIXES = ("/.well-known/agent-card.json", "/.well-known/agent.json")
+# Seconds a replica that refused a connection is tried last
+REPLICA_COOLDOWN = 10.0
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def parse_replicas(spec):
+    """``"host:port=replica,replica;..."`` -> {host:port: [host:port, replica, ...]}"""
+    replicas = {}
+    for entry in (spec or "").split(";"):
+        primary, _, others = entry.partition("=")
+        primary = primary.strip()
+        if primary:
+            replicas[primary] = [primary] + [other.strip() for other in others.split(",") if other.strip()]
+    return replicas
+
+
+class PoolConfig:
+    """Connection pool settings, read from the environment by default"""
+
+    def __init__(self, max_connections_per_host=None, max_keepalive=None, keepalive_expiry=None,
+                 http2=None, card_ttl=None, timeout=None, replicas=None):
+        self.max_connections_per_host = max_connections_per_host or int(_env_float("A2A_MAX_CONNECTIONS_PER_HOST", 20))
+        self.max_keepalive = max_keepalive or int(_env_float("A2A_MAX_KEEPALIVE", 20))
+        self.keepalive_expiry = keepalive_expiry or _env_float("A2A_KEEPALIVE_EXPIRY", 30)
+        self.http2 = http2 if http2 is not None else os.environ.get("A2A_HTTP2", "0") == "1"
+        self.card_ttl = card_ttl or _env_float("A2A_CARD_TTL", 300)
+        self.timeout = timeout or _env_float("A2A_TIMEOUT", 600)
+        self.replicas = replicas if replicas is not None else parse_replicas(os.environ.get("A2A_REPLICAS"))
+
+
+class HostStats:
+    """Per-host request and pool-wait counters"""
+
+    def __init__(self):
+        self.in_use = 0
+        self.waiting = 0
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self):
+        return {
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "wait_avg_ms": 1000 * self.wait_total / self.requests if self.requests else 0.0,
+            "wait_max_ms": 1000 * self.wait_max,
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its per-host slot once the body is closed"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class AgentCardCache:
+    """TTL cache of agent card responses, refreshed in the background before expiry"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, url):
+        """Cached (status, headers, body) for ``url`` and whether it is past its TTL"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None, True
+        fetched_at, response = entry
+        return response, time.monotonic() - fetched_at > self.ttl
+
+    def put(self, url, response):
+        self.entries[url] = (time.monotonic(), response)
+
+    def invalidate(self, url=None):
+        if url is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(url, None)
+
+    def stats(self):
+        return {"cards": len(self.entries), "hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """httpx transport with per-host limits, agent-card caching and pool metrics"""
+
+    def __init__(self, config):
+        self.config = config
+        limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=config.max_keepalive,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        http2 = config.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️ A2A_HTTP2=1 but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        self._transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        self._slots = {}
+        self.hosts = defaultdict(HostStats)
+        self.cards = AgentCardCache(config.card_ttl)
+        self._refreshing = set()
+        # Rotates the tie-break between equally loaded replicas
+        self._turn = 0
+        # replica -> time until which it is tried last (it refused a connection)
+        self._down_until = {}
+
+    def _slot(self, host):
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = asyncio.Semaphore(self.config.max_connections_per_host)
+        return slot
+
+    def _outstanding(self, host):
+        stats = self.hosts.get(host)
+        return stats.in_use + stats.waiting if stats else 0
+
+    def _replicas_by_load(self, host):
+        """Replicas of ``host``, least outstanding requests first"""
+        replicas = self.config.replicas.get(host)
+        if not replicas:
+            return [host]
+        self._turn += 1
+        count = len(replicas)
+        rotated = [replicas[(self._turn + offset) % count] for offset in range(count)]
+        now = time.monotonic()
+        return sorted(rotated, key=lambda replica: (self._down_until.get(replica, 0) > now, self._outstanding(replica)))
+
+    async def _send(self, request):
+        """Send to the least loaded replica, trying the next one if it refuses connections"""
+        url, host_header = request.url, request.headers.get("Host")
+        host = f"{url.host}:{url.port}"
+        candidates = self._replicas_by_load(host)
+        for position, target in enumerate(candidates):
+            # Rebuilt from the original URL every attempt, so an earlier failover doesn't stick
+            if target == host:
+                request.url = url
+                request.headers["Host"] = host_header
+            else:
+                target_host, _, target_port = target.rpartition(":")
+                request.url = url.copy_with(host=target_host, port=int(target_port))
+                request.headers["Host"] = target
+            try:
+                return await self._send_to(request, target)
+            except httpx.ConnectError:
+                self._down_until[target] = time.monotonic() + REPLICA_COOLDOWN
+                if position == len(candidates) - 1:
+                    raise
+
+    async def _send_to(self, request, host):
+        """Send through the pool, holding a per-host slot until the body is closed"""
+        stats = self.hosts[host]
+        slot = self._slot(host)
+
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            await slot.acquire()
+        finally:
+            stats.waiting -= 1
+        waited = time.perf_counter() - started
+        stats.requests += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        stats.in_use += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                stats.in_use -= 1
+                slot.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def _fetch_card(self, request):
+        url = str(request.url)
+        response = await self._send(request)
+        body = await response.aread()
+        await response.aclose()
+        # The body is already decoded, so only the content type carries over
+        headers = [("content-type", response.headers.get("content-type", "application/json"))]
+        if response.status_code == 200:
+            self.cards.put(url, (response.status_code, headers, body))
+        return response.status_code, headers, body
+
+    async def _refresh_card(self, request):
+        url = str(request.url)
+        try:
+            await self._fetch_card(request)
+            self.cards.refreshes += 1
+        except httpx.HTTPError:
+            pass
+        finally:
+            self._refreshing.discard(url)
+
+    async def _traced_send(self, request):
+        """Send as an ``a2a`` span, passing its traceparent on; the span ends when the body is closed"""
+        a2a_span = tracing.start_span(
+            f"a2a {request.url.host}:{request.url.port}", "a2a", method=request.method, path=request.url.path,
+        )
+        if a2a_span is None:
+            return await self._send(request)
+        request.headers["traceparent"] = a2a_span.traceparent()
+        try:
+            response = await self._send(request)
+        except BaseException as exc:
+            a2a_span.end(error=exc)
+            raise
+        a2a_span.set(status_code=response.status_code, replica=f"{request.url.host}:{request.url.port}")
+        response.stream = _ReleasingStream(response.stream, a2a_span.end)
+        return response
+
+    async def handle_async_request(self, request):
+        if request.method != "GET" or not request.url.path.endswith(AGENT_CARD_SUFFIXES):
+            return await self._traced_send(request)
+
+        url = str(request.url)
+        cached, expired = self.cards.get(url)
+        if cached is None:
+            self.cards.misses += 1
+            status, headers, body = await self._fetch_card(request)
+        else:
+            self.cards.hits += 1
+            status, headers, body = cached
+            if expired and url not in self._refreshing:
+                # Serve the cached card now and refresh it in the background
+                self._refreshing.add(url)
+                asyncio.get_running_loop().create_task(self._refresh_card(request))
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def idle_connections(self):
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", [])
+        return sum(1 for connection in connections if connection.is_idle())
+
+    def metrics(self):
+        """Pool metrics: per-host in-use/waiting/wait time, idle connections, card cache"""
+        return {
+            "http2": self.http2,
+            "idle_connections": self.idle_connections(),
+            "hosts": {host: stats.as_dict() for host, stats in self.hosts.items()},
+            "agent_cards": self.cards.stats(),
+        }
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+_client = None
+_transport = None
+
+
+def get_http_client(config=None):
+    """Process-wide pooled AsyncClient shared by every remote agent"""
+    global _client, _transport
+    if _client is None:
+        config = config or PoolConfig()
+        _transport = PooledTransport(config)
+        _client = httpx.AsyncClient(transport=_transport, timeout=httpx.Timeout(timeout=config.timeout))
+    return _client
+
+
+def pool_metrics():
+    """Metrics of the shared client's pool (empty before first use)"""
+    return _transport.metrics() if _transport is not None else {}
+
+
+async def close_http_client():
+    global _client, _transport
+    if _client is not None:
+        await _client.aclose()
+        _client = _transport = None
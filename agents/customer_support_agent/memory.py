@@ -0,0 +1,430 @@
+# Bounded session and memory services for the coordinator
+#
+# BoundedSessionService keeps at most N sessions (LRU, idle ones expire) and a
+# window of recent events per session. CompactingMemoryService saves only the
+# events added since the last save, caps memory per user and globally, and folds
+# the oldest turns into short summaries instead of keeping them verbatim. Its
+# records live in memory or in SQLite, so a restart keeps context without
+# replaying whole sessions. Searches (preload_memory) go through MemoryIndex, see
+# memory_index.py for the top-k / token budget settings.
+#
+# Settings (environment variables):
+#   MEMORY_BACKEND        memory (default) or sqlite
+#   MEMORY_DB_PATH        SQLite file for MEMORY_BACKEND=sqlite (default memory.db)
+#   MEMORY_MAX_PER_USER   memory records kept per user before compaction (default 200)
+#   MEMORY_MAX_TOTAL      memory records kept across all users (default 20000)
+#   SESSION_DB_URL        use ADK's DatabaseSessionService with this URL instead
+#   SESSION_MAX           live sessions kept in memory (default 1000)
+#   SESSION_IDLE_TIMEOUT  seconds before an idle session is evicted (default 3600)
+#   SESSION_MAX_EVENTS    events kept per session, older turns live on in memory (default 200)
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.customer_support_agent.memory_index import HashingVectorizer, MemoryIndex
+
+SUMMARY_CHARS = 600
+SUMMARY_SNIPPET_CHARS = 80
+
+
+class MemoryRecord:
+    """One saved message (or a summary of several) in a user's memory"""
+
+    __slots__ = ("record_id", "session_id", "author", "text", "timestamp", "is_summary")
+
+    def __init__(self, record_id, session_id, author, text, timestamp, is_summary=False):
+        self.record_id = record_id
+        self.session_id = session_id
+        self.author = author
+        self.text = text
+        self.timestamp = timestamp
+        self.is_summary = is_summary
+
+
+def event_text(event):
+    """Text parts of an ADK event joined together"""
+    if not event.content or not event.content.parts:
+        return ""
+    return " ".join(part.text for part in event.content.parts if part.text).strip()
+
+
+def summarize(records):
+    """Short extractive summary of several memory records"""
+    start = datetime.fromtimestamp(records[0].timestamp).strftime("%Y-%m-%d")
+    end = datetime.fromtimestamp(records[-1].timestamp).strftime("%Y-%m-%d")
+    snippets = []
+    for record in records:
+        text = record.text
+        if record.is_summary:
+            # Keep the gist of an older summary, without its header
+            text = text.split(": ", 1)[-1]
+        snippet = text if len(text) <= SUMMARY_SNIPPET_CHARS else text[:SUMMARY_SNIPPET_CHARS].rsplit(" ", 1)[0] + "…"
+        snippets.append(f"{record.author}: {snippet}" if not record.is_summary else snippet)
+    summary = f"Summary of {len(records)} earlier messages ({start} to {end}): " + " | ".join(snippets)
+    return summary[:SUMMARY_CHARS]
+
+
+class InMemoryRecords:
+    """Memory records and save cursors held in process memory"""
+
+    def __init__(self):
+        self.users = OrderedDict()
+        self.cursors = {}
+        self._next_id = 0
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def get_cursor(self, user_key, session_id):
+        return self.cursors.get((user_key, session_id))
+
+    def set_cursor(self, user_key, session_id, event_id):
+        self.cursors[(user_key, session_id)] = event_id
+
+    def append(self, user_key, records):
+        self.users.setdefault(user_key, []).extend(records)
+        self.users.move_to_end(user_key)
+
+    def records(self, user_key):
+        return list(self.users.get(user_key, ()))
+
+    def count(self, user_key):
+        return len(self.users.get(user_key, ()))
+
+    def total(self):
+        return sum(len(records) for records in self.users.values())
+
+    def oldest(self, user_key, limit):
+        return self.users.get(user_key, [])[:limit]
+
+    def replace(self, user_key, records, summary):
+        """Swap the given (oldest) records for one summary record"""
+        remaining = self.users[user_key][len(records):]
+        self.users[user_key] = [summary] + remaining
+
+    def least_recent_user(self):
+        return next(iter(self.users), None)
+
+    def drop_oldest(self, user_key, limit):
+        records = self.users.get(user_key, [])
+        dropped = [record.record_id for record in records[:limit]]
+        del records[:limit]
+        if not records:
+            self.users.pop(user_key, None)
+            for key in [key for key in self.cursors if key[0] == user_key]:
+                del self.cursors[key]
+        return dropped
+
+
+MEMORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT,
+    author TEXT,
+    text TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    is_summary INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS memories_user ON memories (app_name, user_id, id);
+CREATE TABLE IF NOT EXISTS memory_cursors (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    last_event_id TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+"""
+
+
+class SqliteRecords:
+    """Memory records and save cursors persisted in SQLite"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(MEMORY_SCHEMA)
+
+    def new_id(self):
+        return None
+
+    def get_cursor(self, user_key, session_id):
+        row = self.conn.execute(
+            "SELECT last_event_id FROM memory_cursors WHERE app_name = ? AND user_id = ? AND session_id = ?",
+            (*user_key, session_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, user_key, session_id, event_id):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memory_cursors (app_name, user_id, session_id, last_event_id) VALUES (?, ?, ?, ?)",
+                (*user_key, session_id, event_id),
+            )
+
+    def append(self, user_key, records):
+        with self.conn:
+            for record in records:
+                cursor = self.conn.execute(
+                    "INSERT INTO memories (app_name, user_id, session_id, author, text, timestamp, is_summary) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*user_key, record.session_id, record.author, record.text, record.timestamp,
+                     int(record.is_summary)),
+                )
+                record.record_id = cursor.lastrowid
+
+    def _records(self, sql, params):
+        return [
+            MemoryRecord(row[0], row[1], row[2], row[3], row[4], bool(row[5]))
+            for row in self.conn.execute(sql, params)
+        ]
+
+    def records(self, user_key):
+        return self._records(
+            "SELECT id, session_id, author, text, timestamp, is_summary FROM memories "
+            "WHERE app_name = ? AND user_id = ? ORDER BY id",
+            user_key,
+        )
+
+    def count(self, user_key):
+        return self.conn.execute(
+            "SELECT count(*) FROM memories WHERE app_name = ? AND user_id = ?", user_key
+        ).fetchone()[0]
+
+    def total(self):
+        return self.conn.execute("SELECT count(*) FROM memories").fetchone()[0]
+
+    def oldest(self, user_key, limit):
+        return self._records(
+            "SELECT id, session_id, author, text, timestamp, is_summary FROM memories "
+            "WHERE app_name = ? AND user_id = ? ORDER BY id LIMIT ?",
+            (*user_key, limit),
+        )
+
+    def replace(self, user_key, records, summary):
+        ids = [record.record_id for record in records]
+        with self.conn:
+            self.conn.execute(f"DELETE FROM memories WHERE id IN ({', '.join('?' for _ in ids)})", ids)
+            # Reuse the oldest id so the summary keeps its place at the start of the history
+            self.conn.execute(
+                "INSERT INTO memories (id, app_name, user_id, session_id, author, text, timestamp, is_summary) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                (ids[0], *user_key, summary.session_id, summary.author, summary.text, summary.timestamp),
+            )
+        summary.record_id = ids[0]
+
+    def least_recent_user(self):
+        row = self.conn.execute(
+            "SELECT app_name, user_id FROM memories GROUP BY app_name, user_id ORDER BY max(id) LIMIT 1"
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def drop_oldest(self, user_key, limit):
+        dropped = [record.record_id for record in self.oldest(user_key, limit)]
+        with self.conn:
+            self.conn.execute(
+                f"DELETE FROM memories WHERE id IN ({', '.join('?' for _ in dropped)})", dropped
+            )
+            if not self.count(user_key):
+                self.conn.execute("DELETE FROM memory_cursors WHERE app_name = ? AND user_id = ?", user_key)
+        return dropped
+
+
+class CompactingMemoryService(BaseMemoryService):
+    """Memory service with incremental saves, per-user/global caps and summary compaction"""
+
+    def __init__(self, records=None, max_per_user=200, max_total=20000, index=None):
+        self.store = records or InMemoryRecords()
+        self.index = index or MemoryIndex()
+        self.max_per_user = max_per_user
+        self.max_total = max_total
+        self._lock = threading.Lock()
+
+    def _new_events(self, user_key, session):
+        """Events added to ``session`` since its last save"""
+        cursor = self.store.get_cursor(user_key, session.id)
+        events = session.events
+        if cursor is None:
+            return events
+        for position in range(len(events) - 1, -1, -1):
+            if events[position].id == cursor:
+                return events[position + 1:]
+        # The saved event is no longer in the session window, everything left is newer
+        return events
+
+    async def add_session_to_memory(self, session):
+        user_key = (session.app_name, session.user_id)
+        with self._lock:
+            new_events = self._new_events(user_key, session)
+            if not new_events:
+                return
+            records = [
+                MemoryRecord(self.store.new_id(), session.id, event.author, text, event.timestamp or time.time())
+                for event in new_events
+                for text in (event_text(event),)
+                if text
+            ]
+            if records:
+                self.store.append(user_key, records)
+                self.index.add(user_key, records)
+            self.store.set_cursor(user_key, session.id, new_events[-1].id)
+            self._compact(user_key)
+            self._enforce_global_cap()
+
+    def _compact(self, user_key):
+        """Fold the oldest half of an over-cap user's memory into one summary"""
+        count = self.store.count(user_key)
+        if count <= self.max_per_user:
+            return
+        oldest = self.store.oldest(user_key, count - self.max_per_user // 2 + 1)
+        if len(oldest) < 2:
+            return
+        summary = MemoryRecord(
+            self.store.new_id(), None, "memory", summarize(oldest), oldest[-1].timestamp, is_summary=True
+        )
+        self.store.replace(user_key, oldest, summary)
+        self.index.remove(user_key, [record.record_id for record in oldest])
+        self.index.add(user_key, [summary])
+
+    def _enforce_global_cap(self):
+        excess = self.store.total() - self.max_total
+        while excess > 0:
+            user_key = self.store.least_recent_user()
+            if user_key is None:
+                break
+            dropped = self.store.drop_oldest(user_key, min(excess, self.store.count(user_key)))
+            if self.store.count(user_key):
+                self.index.remove(user_key, dropped)
+            else:
+                self.index.drop_user(user_key)
+            excess -= len(dropped)
+
+    def _memory_entry(self, record):
+        role = "user" if record.author == "user" else "model"
+        return MemoryEntry(
+            content=types.Content(role=role, parts=[types.Part(text=record.text)]),
+            author=record.author,
+            timestamp=datetime.fromtimestamp(record.timestamp).isoformat(),
+        )
+
+    async def search_memory(self, *, app_name, user_id, query):
+        user_key = (app_name, user_id)
+        with self._lock:
+            if not self.index.loaded(user_key):
+                # First search since startup: index whatever the store already holds
+                self.index.load(user_key, self.store.records(user_key))
+            records = self.index.search(user_key, query)
+        return SearchMemoryResponse(memories=[self._memory_entry(record) for record in records])
+
+
+class BoundedSessionService(InMemorySessionService):
+    """In-memory sessions with an LRU cap, idle expiry and a per-session event window"""
+
+    def __init__(self, max_sessions=1000, idle_timeout=3600, max_events=200):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_events = max_events
+        self._last_used = OrderedDict()
+        self.evictions = 0
+
+    def _touch(self, app_name, user_id, session_id):
+        key = (app_name, user_id, session_id)
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    def _evict(self):
+        """Drop least recently used sessions over the cap, and idle ones"""
+        deadline = time.monotonic() - self.idle_timeout
+        while self._last_used:
+            key, last_used = next(iter(self._last_used.items()))
+            if len(self._last_used) <= self.max_sessions and last_used >= deadline:
+                break
+            del self._last_used[key]
+            app_name, user_id, session_id = key
+            self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+            self.evictions += 1
+
+    def _trim(self, app_name, user_id, session_id):
+        """Keep the most recent events, cutting at the start of a user turn"""
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if session is None or len(session.events) <= self.max_events:
+            return
+        cut = len(session.events) - self.max_events
+        while cut < len(session.events) and session.events[cut].author != "user":
+            cut += 1
+        if cut < len(session.events):
+            del session.events[:cut]
+
+    async def create_session(self, *, app_name, user_id, state=None, session_id=None, **kwargs):
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id, **kwargs
+        )
+        self._touch(app_name, user_id, session.id)
+        self._evict()
+        return session
+
+    async def get_session(self, *, app_name, user_id, session_id, **kwargs):
+        session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, **kwargs)
+        if session is not None:
+            self._touch(app_name, user_id, session_id)
+        return session
+
+    async def append_event(self, session, event):
+        event = await super().append_event(session, event)
+        if (session.app_name, session.user_id, session.id) in self._last_used:
+            self._touch(session.app_name, session.user_id, session.id)
+            self._trim(session.app_name, session.user_id, session.id)
+        return event
+
+    async def delete_session(self, *, app_name, user_id, session_id, **kwargs):
+        self._last_used.pop((app_name, user_id, session_id), None)
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id, **kwargs)
+
+
+def create_memory_service():
+    """Memory service configured from MEMORY_* environment variables"""
+    records = None
+    if os.environ.get("MEMORY_BACKEND", "memory") == "sqlite":
+        records = SqliteRecords(os.environ.get("MEMORY_DB_PATH", "memory.db"))
+    vectorizer = None
+    if os.environ.get("MEMORY_VECTORS") == "hash":
+        vectorizer = HashingVectorizer(int(os.environ.get("MEMORY_VECTOR_DIM", 512)))
+    index = MemoryIndex(
+        top_k=int(os.environ.get("MEMORY_TOP_K", 5)),
+        token_budget=int(os.environ.get("MEMORY_TOKEN_BUDGET", 400)),
+        vectorizer=vectorizer,
+    )
+    return CompactingMemoryService(
+        records=records,
+        max_per_user=int(os.environ.get("MEMORY_MAX_PER_USER", 200)),
+        max_total=int(os.environ.get("MEMORY_MAX_TOTAL", 20000)),
+        index=index,
+    )
+
+
+def create_session_service():
+    """Session service configured from SESSION_* environment variables"""
+    db_url = os.environ.get("SESSION_DB_URL")
+    if db_url:
+        from google.adk.sessions import DatabaseSessionService
+
+        return DatabaseSessionService(db_url=db_url)
+    return BoundedSessionService(
+        max_sessions=int(os.environ.get("SESSION_MAX", 1000)),
+        idle_timeout=float(os.environ.get("SESSION_IDLE_TIMEOUT", 3600)),
+        max_events=int(os.environ.get("SESSION_MAX_EVENTS", 200)),
+    )
@@ -0,0 +1,187 @@
+# Indexed retrieval over saved memory records, used by preload_memory
+#
+# Each user's records get an inverted index (token -> record ids with term
+# frequencies) scored with BM25, plus optional hashed bag-of-words vectors
+# (no model download, CPU only) blended in with cosine similarity. Search
+# touches only the postings of the query's tokens and returns at most top-k
+# records within a token budget, so the preloaded context stays the same size
+# however long a user's history gets.
+#
+# Settings (environment variables):
+#   MEMORY_TOP_K         records preloaded per turn (default 5)
+#   MEMORY_TOKEN_BUDGET  approximate tokens preloaded per turn (default 400)
+#   MEMORY_VECTORS       "hash" to add hashed vectors to the keyword score
+#   MEMORY_VECTOR_DIM    dimensions of the hashed vectors (default 512)
+import math
+import zlib
+from array import array
+from collections import Counter, defaultdict
+
+from mock_data.catalog_index import tokenize
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Weight of the cosine similarity next to the (normalized) BM25 score
+VECTOR_WEIGHT = 0.5
+MIN_VECTOR_SCORE = 0.2
+# Rough characters per token, plus the per-entry "Time:"/author lines preload_memory adds
+CHARS_PER_TOKEN = 4
+ENTRY_OVERHEAD_TOKENS = 12
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def trim_to_tokens(text, tokens):
+    """Cut ``text`` to about ``tokens`` tokens on a word boundary"""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+class HashingVectorizer:
+    """Signed feature hashing of unigrams and bigrams into an L2-normalized vector"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def transform(self, tokens):
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = array("f", bytes(4 * self.dim))
+        for feature in features:
+            digest = zlib.crc32(feature.encode())
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            for position in range(self.dim):
+                vector[position] /= norm
+        return vector
+
+
+class UserIndex:
+    """Inverted index (and optional vectors) over one user's memory records"""
+
+    def __init__(self, vectorizer=None):
+        self.vectorizer = vectorizer
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.records = {}
+        self.vectors = {}
+        self.total_length = 0
+
+    def add(self, record):
+        tokens = tokenize(record.text)
+        for token, count in Counter(tokens).items():
+            self.postings[token][record.record_id] = count
+        self.lengths[record.record_id] = len(tokens)
+        self.total_length += len(tokens)
+        self.records[record.record_id] = record
+        if self.vectorizer is not None:
+            self.vectors[record.record_id] = self.vectorizer.transform(tokens)
+
+    def remove(self, record_id):
+        record = self.records.pop(record_id, None)
+        if record is None:
+            return
+        for token in set(tokenize(record.text)):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(record_id, None)
+                if not postings:
+                    del self.postings[token]
+        self.total_length -= self.lengths.pop(record_id)
+        self.vectors.pop(record_id, None)
+
+    def scores(self, query):
+        """Relevance score per matching record id"""
+        tokens = tokenize(query)
+        count = len(self.records)
+        if not tokens or not count:
+            return {}
+        average_length = self.total_length / count or 1.0
+        scores = defaultdict(float)
+        for token in set(tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for record_id, frequency in postings.items():
+                length_norm = K1 * (1 - B + B * self.lengths[record_id] / average_length)
+                scores[record_id] += idf * frequency * (K1 + 1) / (frequency + length_norm)
+
+        if self.vectorizer is not None:
+            best = max(scores.values(), default=0.0) or 1.0
+            for record_id in scores:
+                scores[record_id] /= best
+            query_vector = self.vectorizer.transform(tokens)
+            for record_id, vector in self.vectors.items():
+                similarity = sum(a * b for a, b in zip(query_vector, vector))
+                if similarity >= MIN_VECTOR_SCORE or record_id in scores:
+                    scores[record_id] += VECTOR_WEIGHT * similarity
+        return scores
+
+
+class MemoryIndex:
+    """Per-user memory indexes with top-k, token-budgeted search"""
+
+    def __init__(self, top_k=5, token_budget=400, vectorizer=None):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.vectorizer = vectorizer
+        self.users = {}
+
+    def loaded(self, user_key):
+        return user_key in self.users
+
+    def load(self, user_key, records):
+        index = self.users[user_key] = UserIndex(self.vectorizer)
+        for record in records:
+            index.add(record)
+
+    def add(self, user_key, records):
+        index = self.users.get(user_key)
+        if index is not None:
+            for record in records:
+                index.add(record)
+
+    def remove(self, user_key, record_ids):
+        index = self.users.get(user_key)
+        if index is not None:
+            for record_id in record_ids:
+                index.remove(record_id)
+
+    def drop_user(self, user_key):
+        self.users.pop(user_key, None)
+
+    def search(self, user_key, query):
+        """Best records for ``query``: at most top_k, within the token budget, oldest first"""
+        index = self.users.get(user_key)
+        if index is None:
+            return []
+        scores = index.scores(query)
+        # Ties go to the more recent record
+        ranked = sorted(scores, key=lambda record_id: (-scores[record_id], -index.records[record_id].timestamp))
+
+        selected = []
+        budget = self.token_budget
+        for record_id in ranked:
+            if len(selected) >= self.top_k or budget <= ENTRY_OVERHEAD_TOKENS:
+                break
+            record = index.records[record_id]
+            cost = estimate_tokens(record.text) + ENTRY_OVERHEAD_TOKENS
+            if cost > budget:
+                if selected:
+                    continue
+                # The best match alone is over budget: keep its beginning
+                text = trim_to_tokens(record.text, budget - ENTRY_OVERHEAD_TOKENS)
+                cost = estimate_tokens(text) + ENTRY_OVERHEAD_TOKENS
+                record = type(record)(
+                    record.record_id, record.session_id, record.author, text, record.timestamp, record.is_summary
+                )
+            selected.append(record)
+            budget -= cost
+        selected.sort(key=lambda record: record.timestamp)
+        return selected
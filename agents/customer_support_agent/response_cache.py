@@ -0,0 +1,189 @@
+# Opt-in response cache in front of run_session()
+#
+# Near-duplicate questions ("iphone 15 pro price", "How much is the iPhone 15 Pro?")
+# normalize to the same key, so only the first one goes through the coordinator
+# LLM and the A2A hops. Each entry remembers the versions of the data domains its
+# answer depends on and is dropped as soon as one of them changes.
+#
+# Only questions about a named product, SKU or tracking number are cached. Ones
+# that talk about the customer ("my order") or refer back to the conversation
+# are kept per user and session, so one customer never gets another's answer.
+#
+# Enable with RESPONSE_CACHE=1 (RESPONSE_CACHE_SIZE / RESPONSE_CACHE_MAX_CHARS bound memory).
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from mock_data.sample_data import find_products_in_text
+from mock_data.store import add_change_listener, data_version
+
+TRACKING_RE = re.compile(r"\b([A-Z]{3}\d{9})\b", re.IGNORECASE)
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+SKU_RE = re.compile(r"\bsku\s*[#:-]?\s*(\d+)\b", re.IGNORECASE)
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+ALL_DOMAINS = ("catalog", "inventory", "shipping", "tracking")
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "did", "can", "could", "would", "will",
+    "i", "me", "my", "you", "your", "we", "please", "tell", "what", "whats", "how", "about", "of",
+    "for", "to", "in", "on", "at", "and", "or", "with", "there", "any", "some", "hi", "hello", "hey",
+    "want", "know", "like", "give", "show", "check", "s",
+}
+
+SYNONYMS = {
+    "much": "price", "cost": "price", "costs": "price", "pricing": "price", "priced": "price", "expensive": "price",
+    "available": "stock", "availability": "stock", "inventory": "stock", "instock": "stock",
+    "shipping": "ship", "shipped": "ship", "delivery": "ship", "deliver": "ship", "delivered": "ship",
+    "tracking": "track", "where": "track", "specs": "spec", "specifications": "spec", "features": "feature",
+    "restocked": "restock", "restocking": "restock",
+}
+
+# Queries that refer back to the conversation can only be reused within their session
+ANAPHORA = {"it", "its", "this", "that", "these", "those", "them", "they", "one", "same", "above"}
+# Nor can queries about the customer themselves (stopwords too, so they don't change the key)
+PERSONAL = {"i", "im", "me", "my", "mine", "myself", "we", "us", "our", "ours", "you", "your", "yours"}
+# Entities that make an answer worth caching: the same for everyone who asks about them
+CACHEABLE_ENTITIES = ("product:", "tracking:")
+
+
+def normalize_query(query):
+    """Canonical key and data dependencies for a query.
+
+    Case and punctuation are folded, product names and SKUs become ``product:<id>``,
+    tracking numbers and zip codes become typed entities, stopwords are dropped and
+    synonyms are mapped to one word. Returns ``(key, domains, contextual)``, where
+    the key is empty if the query names no product, SKU or tracking number.
+    """
+    entities = []
+    domains = set()
+    text = query
+
+    for number in TRACKING_RE.findall(text):
+        entities.append(f"tracking:{number.upper()}")
+        domains.add("tracking")
+    text = TRACKING_RE.sub(" ", text)
+
+    for zip_code in ZIP_RE.findall(text):
+        entities.append(f"zip:{zip_code}")
+        domains.add("shipping")
+    text = ZIP_RE.sub(" ", text)
+
+    for product_id in SKU_RE.findall(text):
+        entities.append(f"product:{int(product_id)}")
+        domains.update(("catalog", "inventory"))
+    text = SKU_RE.sub(" ", text)
+
+    text_lower = text.lower()
+    for product in find_products_in_text(text):
+        entities.append(f"product:{product['id']}")
+        domains.update(("catalog", "inventory"))
+        text_lower = text_lower.replace(product['name'].lower(), " ")
+
+    words = WORD_RE.findall(text_lower.replace("'", ""))
+    contextual = any(word in ANAPHORA or word in PERSONAL for word in words)
+    terms = {SYNONYMS.get(word, word) for word in words if word not in STOPWORDS and word not in ANAPHORA}
+    if "ship" in terms:
+        domains.add("shipping")
+    if "stock" in terms or "restock" in terms:
+        domains.add("inventory")
+    if "track" in terms:
+        domains.add("tracking")
+
+    if not any(entity.startswith(CACHEABLE_ENTITIES) for entity in entities):
+        return "", tuple(sorted(domains)) or ALL_DOMAINS, contextual
+    key = " ".join(sorted(set(entities)) + sorted(terms))
+    return key, tuple(sorted(domains)) or ALL_DOMAINS, contextual
+
+
+class ResponseCache:
+    """Bounded LRU of final answers keyed on normalized query + data versions"""
+
+    def __init__(self, max_entries=1024, max_chars=2_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        add_change_listener(self.invalidate)
+
+    def key_for(self, query, session_id=None, context="", user_id=None):
+        """Cache key and domains for a query; personal and follow-up ones are scoped to the user's session"""
+        key, domains, contextual = normalize_query(query)
+        if not key:
+            return None, domains
+        if contextual:
+            key = f"{user_id}|{session_id}|{context}|{key}"
+        return key, domains
+
+    def get(self, query, session_id=None, context="", user_id=None):
+        key, _ = self.key_for(query, session_id, context, user_id)
+        with self._lock:
+            entry = self.entries.get(key) if key else None
+            if entry is not None:
+                answer, domains, versions = entry
+                if versions == tuple(data_version(domain) for domain in domains):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return answer
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def snapshot(self, query, session_id=None, context="", user_id=None):
+        """Key, domains and current data versions, taken before the answer is computed"""
+        key, domains = self.key_for(query, session_id, context, user_id)
+        return key, domains, tuple(data_version(domain) for domain in domains)
+
+    def put(self, snapshot, answer):
+        """Store an answer computed after ``snapshot``; changes made meanwhile make it stale"""
+        key, domains, versions = snapshot
+        if not key or not answer or len(answer) > self.max_chars:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (answer, domains, versions)
+            self.chars += len(answer)
+            while len(self.entries) > self.max_entries or self.chars > self.max_chars:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        answer, _, _ = self.entries.pop(key)
+        self.chars -= len(answer)
+
+    def invalidate(self, domain=None, key=None):
+        """Evict every answer that depends on ``domain`` (all answers if None)"""
+        with self._lock:
+            stale = [
+                cache_key for cache_key, (_, domains, _) in self.entries.items()
+                if domain is None or domain in domains
+            ]
+            for cache_key in stale:
+                self._drop(cache_key)
+            self.invalidations += len(stale)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "chars": self.chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def create_response_cache():
+    """ResponseCache if RESPONSE_CACHE=1, else None"""
+    if os.environ.get("RESPONSE_CACHE", "0") != "1":
+        return None
+    return ResponseCache(
+        max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 1024)),
+        max_chars=int(os.environ.get("RESPONSE_CACHE_MAX_CHARS", 2_000_000)),
+    )
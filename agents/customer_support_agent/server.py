@@ -0,0 +1,213 @@
+# HTTP / WebSocket front end for the customer support coordinator
+#
+#   POST /sessions                        -> {"session_id", "user_id"}
+#   POST /sessions/{session_id}/messages  {"message", "user_id"?, "stream"?}
+#        streams the answer as server-sent events ({"text": chunk} ... {"done": true})
+#        or returns {"answer"} when "stream" is false
+#   WS   /sessions/{session_id}/ws        send {"message"} or plain text, receive
+#        {"type": "delta", "text"} chunks then {"type": "done"}
+#   GET  /health                          load and cache counters
+#
+# Many sessions run concurrently; messages of one session run in order. At most
+# SERVER_MAX_WORKERS answers are generated at once and SERVER_MAX_QUEUE more may
+# wait, anything beyond that is rejected with 429 (Retry-After) right away.
+#
+# Run with: python start_system.py --serve   (SERVER_HOST / SERVER_PORT, default 127.0.0.1:8000)
+import asyncio
+import json
+import os
+import time
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from agents.customer_support_agent.agent import (
+    APP_NAME, fast_path_router, get_or_create_session, get_runner, respond, response_cache,
+)
+from agents.common.model_scheduler import scheduler_stats
+from agents.common.tracing import instrument_app
+from agents.customer_support_agent.http_pool import pool_metrics
+from mock_data.change_bus import bus_stats, start_client
+
+
+class ServerBusy(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class AdmissionGate:
+    """Bounded worker concurrency with a bounded wait queue and per-session ordering"""
+
+    def __init__(self, max_workers=8, max_queue=32):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._workers = asyncio.Semaphore(max_workers)
+        self._session_locks = weakref.WeakValueDictionary()
+        self.active = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+
+    def admit(self):
+        """Raise ServerBusy when every worker is busy and the queue is full"""
+        # A streamed request only counts as waiting once its response starts, so a
+        # burst can briefly overshoot max_queue; it still waits for a worker
+        if self.active + self.waiting >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ServerBusy()
+
+    @asynccontextmanager
+    async def slot(self, session_id):
+        """Wait for the session's previous message and a free worker"""
+        started = time.perf_counter()
+        self.waiting += 1
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        try:
+            await lock.acquire()
+            try:
+                await self._workers.acquire()
+            except BaseException:
+                lock.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.wait_total += time.perf_counter() - started
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.served += 1
+            self._workers.release()
+            lock.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "wait_avg_ms": 1000 * self.wait_total / self.served if self.served else 0.0,
+        }
+
+
+def busy_response():
+    return JSONResponse(
+        {"error": "server busy, retry shortly"}, status_code=429, headers={"Retry-After": "1"}
+    )
+
+
+def create_app(runner_instance=None, max_workers=None, max_queue=None):
+    """FastAPI app serving the coordinator over HTTP (SSE) and WebSocket"""
+    runner_instance = runner_instance or get_runner()
+    gate = AdmissionGate(
+        max_workers=max_workers or int(os.environ.get("SERVER_MAX_WORKERS", 8)),
+        max_queue=max_queue if max_queue is not None else int(os.environ.get("SERVER_MAX_QUEUE", 32)),
+    )
+    app = FastAPI(title="Customer Support")
+    app.state.gate = gate
+    # Cached answers are dropped when stock, prices or tracking change in any agent
+    start_client()
+
+    @app.post("/sessions")
+    async def create_session(request: Request):
+        body = await request.json() if await request.body() else {}
+        session_id = uuid.uuid4().hex
+        # Memory is per user, so anonymous sessions don't share it
+        user_id = body.get("user_id") or session_id
+        await get_or_create_session(APP_NAME, user_id, session_id)
+        return {"session_id": session_id, "user_id": user_id}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def post_message(session_id: str, request: Request):
+        body = await request.json()
+        message = (body.get("message") or "").strip()
+        if not message:
+            return JSONResponse({"error": "message is required"}, status_code=400)
+        user_id = body.get("user_id") or session_id
+        try:
+            gate.admit()
+        except ServerBusy:
+            return busy_response()
+
+        if not body.get("stream", True):
+            async with gate.slot(session_id):
+                chunks = [chunk async for chunk in respond(runner_instance, message, session_id, user_id)]
+            return {"session_id": session_id, "answer": "".join(chunks)}
+
+        async def events():
+            async with gate.slot(session_id):
+                try:
+                    async for chunk in respond(runner_instance, message, session_id, user_id):
+                        yield f"data: {json.dumps({'text': chunk})}\n\n"
+                except Exception as exc:
+                    yield f"data: {json.dumps({'error': str(exc) or type(exc).__name__})}\n\n"
+                yield f"data: {json.dumps({'done': True})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.websocket("/sessions/{session_id}/ws")
+    async def chat_socket(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        try:
+            while True:
+                raw = await websocket.receive_text()
+                try:
+                    payload = json.loads(raw)
+                except ValueError:
+                    payload = {"message": raw}
+                if not isinstance(payload, dict):
+                    payload = {"message": raw}
+                message = str(payload.get("message") or "").strip()
+                if not message:
+                    await websocket.send_json({"type": "error", "status": 400, "error": "message is required"})
+                    continue
+                user_id = payload.get("user_id") or session_id
+                try:
+                    gate.admit()
+                except ServerBusy:
+                    await websocket.send_json({"type": "error", "status": 429, "error": "server busy, retry shortly"})
+                    continue
+                async with gate.slot(session_id):
+                    try:
+                        async for chunk in respond(runner_instance, message, session_id, user_id):
+                            await websocket.send_json({"type": "delta", "text": chunk})
+                    except WebSocketDisconnect:
+                        raise
+                    except Exception as exc:
+                        await websocket.send_json({"type": "error", "status": 500, "error": str(exc) or type(exc).__name__})
+                        continue
+                await websocket.send_json({"type": "done"})
+        except WebSocketDisconnect:
+            pass
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "server": gate.stats(),
+            "fast_path": fast_path_router.stats(),
+            "response_cache": response_cache.stats() if response_cache is not None else None,
+            "a2a_pool": pool_metrics(),
+            "model_scheduler": scheduler_stats(),
+            "change_bus": bus_stats(),
+        }
+
+    return instrument_app(app, "customer_support_agent")
+
+
+def serve(host=None, port=None):
+    """Run the server with uvicorn (blocking)"""
+    import uvicorn
+
+    host = host or os.environ.get("SERVER_HOST", "127.0.0.1")
+    port = int(port or os.environ.get("SERVER_PORT", 8000))
+    print(f"🌐 Customer Support server on http://{host}:{port}")
+    uvicorn.run(create_app(), host=host, port=port)
@@ -1,119 +1,36 @@
+import functools
 import os
+
 from dotenv import load_dotenv
-from google.adk.agents import LlmAgent
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
-from google.adk.models.google_llm import Gemini
-from google.genai import types
-import sys
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from mock_data.sample_data import find_product, get_inventory_status, MOCK_INVENTORY
+from agents.common.model_scheduler import scheduled_gemini
+from agents.common.presentation import agent_instruction
+from agents.common.tracing import agent_callbacks, instrument_app
+from agents.inventory_agent.tools import (
+    check_stock_level, check_stock_levels, check_restock_schedule, get_low_stock_items, reserve_stock, commit_stock, release_stock,
+    get_reorder_forecast, get_inventory_summary, recompute_stock_statuses,
+)
+from mock_data.change_bus import start_client
 
 load_dotenv()
 
-print("🚀 Starting Inventory Agent (Mock)...")
+PORT = 8002
 
-def check_stock_level(product_name: str) -> str:
-    """Check current stock levels for a product"""
-    product = find_product(product_name)
-    
-    if not product:
-        return f"❌ Product '{product_name}' not found in catalog."
-    
-    inventory = get_inventory_status(product['id'])
-    
-    if inventory:
-        available_stock = inventory['stock'] - inventory['reserved']    
-        
-        # Determine status emoji and message
-        if inventory['status'] == 'out_of_stock':
-            status_emoji = "❌"
-            status_msg = "Out of Stock"
-        elif inventory['status'] == 'low_stock':
-            status_emoji = "⚠️"
-            status_msg = "Low Stock"
-        else:
-            status_emoji = "✅"
-            status_msg = "In Stock"
-        
-        return f"""
-{status_emoji} **{product['name']} - Stock Status**
-📦 Current Stock: {inventory['stock']} units
-🔒 Reserved: {inventory['reserved']} units
-🛒 Available: {available_stock} units
-📊 Status: {status_msg}
-🔄 Reorder Level: {inventory['reorder_level']} units
-📅 Next Restock: {inventory['next_restock']}
-"""
-    else:
-        return f"❌ No inventory data found for {product['name']}"
-
-def check_restock_schedule(product_name: str) -> str:
-    """Check when a product will be restocked"""
-    product = find_product(product_name)
-    
-    if not product:
-        return f"❌ Product '{product_name}' not found."
-    
-    inventory = get_inventory_status(product['id'])
-    
-    if inventory:
-        return f"""
-📦 **{product['name']} - Restock Schedule**
-📅 Next Restock: {inventory['next_restock']}
-🔄 Reorder Level: {inventory['reorder_level']} units
-📊 Current Stock: {inventory['stock']} units
-💡 Status: Will reorder when stock drops below {inventory['reorder_level']} units
-"""
-    else:
-        return f"❌ No restock information available for {product['name']}"
-
-def get_low_stock_items() -> str:
-    """Get list of items with low stock"""
-    low_stock_items = []
-    
-    for product_id, inventory in MOCK_INVENTORY.items():
-        if inventory['status'] in ['low_stock', 'out_of_stock']:
-            # Use the find_product function to get product name
-            product = None
-            for test_name in ["iPhone 15 Pro", "Samsung Galaxy S24", "MacBook Pro 14\"", "Sony WH-1000XM5", "iPad Air"]:
-                test_product = find_product(test_name)
-                if test_product and test_product['id'] == product_id:
-                    product = test_product
-                    break
-            
-            if product:
-                low_stock_items.append({
-                    'name': product['name'],
-                    'current_stock': inventory['stock'],
-                    'status': inventory['status'],
-                    'next_restock': inventory['next_restock']
-                })
-    
-    if low_stock_items:
-        items_text = "\n".join([
-            f"  • {item['name']}: {item['current_stock']} units ({item['status'].replace('_', ' ').title()}) - Restock: {item['next_restock']}"
-            for item in low_stock_items
-        ])
-        return f"⚠️ **Low Stock Alert** ⚠️\n\n{items_text}"
-    else:
-        return "✅ All items have sufficient stock levels."
-
-# Create Inventory Agent
-inventory_agent = LlmAgent(
-    model=Gemini(
-        model="gemini-1.5-flash", 
-        api_key=os.environ.get("GOOGLE_API_KEY")
-    ),
-    name="inventory_agent",
-    description="Manages inventory tracking, stock levels, and restocking schedules using mock data.",
-    instruction="""
+INSTRUCTION = """
     You are an inventory management specialist using demonstration data.
     
     Your capabilities:
     • Check current stock levels and availability status
+      (use check_stock_levels for several products, e.g. a whole cart, in one call)
     • Provide restocking schedules and dates
-    • Identify low stock and out-of-stock items
+    • Identify low stock and out-of-stock items (paged, or the most urgent by restock date)
+    • Reserve units for a checkout, then commit (sold) or release the reservation
+      (reservations expire on their own if neither happens; reuse the same
+      idempotency key when retrying a reservation so it isn't made twice)
+    • Forecast which products run out soonest at their sales rate (get_reorder_forecast),
+      summarize the whole inventory by category or brand (get_inventory_summary) and
+      recompute stored stock statuses (recompute_stock_statuses; only pass apply=True
+      when the user asks to update them)
     
     Stock Status Meanings:
     ✅ In Stock: Plenty available
@@ -122,21 +39,56 @@ inventory_agent = LlmAgent(
     
     Always provide clear stock status with emojis for better readability.
     Mention that this is demo inventory data.
-    """,
-    tools=[check_stock_level, check_restock_schedule, get_low_stock_items]
-)
+    """
 
-print("✅ Inventory Agent created!")
 
-# Create A2A app
-app = to_a2a(inventory_agent, port=8002)
-agent = inventory_agent
+def create_agent():
+    """Build the Inventory LlmAgent (loads ADK and the Gemini client on first call)"""
+    from google.adk.agents import LlmAgent
 
+    return LlmAgent(
+        model=scheduled_gemini("gemini-1.5-flash", api_key=os.environ.get("GOOGLE_API_KEY")),
+        name="inventory_agent",
+        description="Manages inventory tracking, stock levels, and restocking schedules using mock data.",
+        instruction=agent_instruction(INSTRUCTION),
+        tools=[
+            check_stock_level, check_stock_levels, check_restock_schedule, get_low_stock_items, reserve_stock, commit_stock,
+            release_stock, get_reorder_forecast, get_inventory_summary, recompute_stock_statuses,
+        ],
+        **agent_callbacks()
+    )
 
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+def create_app(agent=None):
+    """A2A app serving the agent"""
+    from google.adk.a2a.utils.agent_to_a2a import to_a2a
+
+    # Apply stock, price and tracking changes made by other processes (CHANGE_BUS_SOCKET)
+    start_client()
+    return instrument_app(to_a2a(agent or get_agent(), port=PORT), "inventory_agent")
+
+
+@functools.cache
+def get_agent():
+    return create_agent()
+
 
+@functools.cache
+def get_app():
+    return create_app()
+
+
+def __getattr__(name):
+    # Built on first access: ``agent`` for the ADK loader, ``app`` for uvicorn workers
+    if name in ("agent", "inventory_agent"):
+        return get_agent()
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    from agents.common.serving import run_agent
 
-print("🌐 Inventory A2A server ready on port 8002")
\ No newline at end of file
+    print("🚀 Starting Inventory Agent (Mock)...")
+    run_agent(get_app, "agents.inventory_agent.agent:app", port=PORT)
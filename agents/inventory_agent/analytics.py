@@ -0,0 +1,242 @@
+# Bulk inventory analytics over every SKU at once, vectorized with NumPy
+#
+#   snap = snapshot()                           # the current store's inventory as arrays
+#   snap.derived_statuses()                     # status of every SKU from stock/reserved/reorder_level
+#   snap.forecast(limit=10)                     # SKUs that run out soonest, stockout dates
+#   snap.summary(by="brand")                    # totals per category or brand
+#   recompute_statuses(apply=True)              # write derived statuses back where they differ
+#
+# The stored status field is whatever the data source said (MOCK_INVENTORY hard-codes
+# it); here it is recomputed with the same rule as mock_data.inventory_index.derive_status.
+# Days of cover are available units / daily_sales; a SKU that doesn't sell never
+# runs out. Everything after snapshot() is whole-column arithmetic, so a million
+# SKUs take tens of milliseconds (python -m benchmarks.inventory_analytics).
+from datetime import date
+
+import numpy as np
+
+from mock_data.store import data_version, get_store
+
+# Status codes are indexes into STATUS_NAMES; -1 is a missing or unknown stored status
+STATUS_NAMES = ("in_stock", "low_stock", "out_of_stock")
+IN_STOCK, LOW_STOCK, OUT_OF_STOCK = range(len(STATUS_NAMES))
+GROUP_FIELDS = ("category", "brand", "category_key")
+UNKNOWN_GROUP = "unknown"
+
+# (id(store), field) -> (catalog version, sorted product ids, group codes, labels)
+_group_cache = {}
+
+
+def factorize(values):
+    """``(codes, labels)``: an int32 code per value and the distinct values in first-seen order"""
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+def _dates(values):
+    """datetime64[D] array from ISO date strings (None -> NaT), parsing each distinct date once"""
+    codes, labels = factorize(values)
+    parsed = np.array([label or "NaT" for label in labels], dtype="datetime64[D]")
+    return parsed[codes] if len(labels) else np.array([], dtype="datetime64[D]")
+
+
+def _today(today=None):
+    return np.datetime64(today or date.today(), "D")
+
+
+def _iso(value):
+    return None if np.isnat(value) else str(value)
+
+
+def _product_groups(store, field):
+    """Sorted product ids and their group codes for ``field``, cached per catalog version"""
+    if field not in GROUP_FIELDS:
+        raise ValueError(f"Can't group by {field!r}, use one of: {', '.join(GROUP_FIELDS)}")
+    key = (id(store), field)
+    version = data_version("catalog")
+    cached = _group_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1:]
+    columns = store.product_columns([field])
+    ids = np.asarray(columns["id"], dtype=np.int64)
+    codes, labels = factorize(columns[field])
+    order = np.argsort(ids, kind="stable")
+    groups = (ids[order], codes[order], [label or UNKNOWN_GROUP for label in labels])
+    _group_cache[key] = (version, *groups)
+    return groups
+
+
+class InventorySnapshot:
+    """The inventory of every SKU as row-aligned NumPy arrays"""
+
+    def __init__(self, columns, store=None):
+        self.store = store
+        self.product_ids = np.array(columns["product_id"], dtype=np.int64)
+        self.stock = np.array(columns["stock"], dtype=np.int64)
+        self.reserved = np.array(columns["reserved"], dtype=np.int64)
+        self.reorder_level = np.array(columns["reorder_level"], dtype=np.int64)
+        self.daily_sales = np.array(columns["daily_sales"], dtype=np.float64)
+        self.available = self.stock - self.reserved
+        self._status_column = columns["status"]
+        self._restock_column = columns["next_restock"]
+        self._next_restock = None
+        self._stored_statuses = None
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def derived_statuses(self):
+        """Status code of every SKU from stock, reserved and reorder_level"""
+        codes = np.full(len(self), IN_STOCK, dtype=np.int8)
+        codes[self.available <= self.reorder_level] = LOW_STOCK
+        codes[self.available <= 0] = OUT_OF_STOCK
+        return codes
+
+    def stored_statuses(self):
+        """Status code of every SKU as stored (-1 when missing or unknown)"""
+        if self._stored_statuses is None:
+            codes, labels = factorize(self._status_column)
+            known = {name: code for code, name in enumerate(STATUS_NAMES)}
+            mapping = np.array([known.get(label, -1) for label in labels], dtype=np.int8)
+            self._stored_statuses = mapping[codes] if len(labels) else np.array([], dtype=np.int8)
+        return self._stored_statuses
+
+    def next_restock(self):
+        """Next restock date of every SKU (NaT when none is booked)"""
+        if self._next_restock is None:
+            self._next_restock = _dates(self._restock_column)
+        return self._next_restock
+
+    def days_of_cover(self):
+        """Days until the available units are sold at the current daily_sales (inf if nothing sells)"""
+        cover = np.full(len(self), np.inf)
+        selling = self.daily_sales > 0
+        np.divide(np.maximum(self.available, 0), self.daily_sales, out=cover, where=selling)
+        return cover
+
+    def stockout_dates(self, today=None):
+        """Date each SKU runs out at its current sales rate (NaT if it never does)"""
+        cover = self.days_of_cover()
+        finite = np.isfinite(cover)
+        days = np.where(finite, np.floor(cover), 0).astype(np.int64)
+        dates = _today(today) + days.astype("timedelta64[D]")
+        dates[~finite] = np.datetime64("NaT")
+        return dates
+
+    def at_risk(self, today=None):
+        """SKUs that run out before their next restock (or that sell and have none booked)"""
+        stockout = self.stockout_dates(today)
+        restock = self.next_restock()
+        return ~np.isnat(stockout) & (np.isnat(restock) | (stockout < restock))
+
+    def forecast(self, limit=10, today=None):
+        """The ``limit`` selling SKUs with the fewest days of cover, with projected stockout dates"""
+        cover = self.days_of_cover()
+        stockout = self.stockout_dates(today)
+        restock = self.next_restock()
+        at_risk = ~np.isnat(stockout) & (np.isnat(restock) | (stockout < restock))
+
+        rows = np.flatnonzero(np.isfinite(cover))
+        limit = max(0, limit)
+        if limit < len(rows):
+            rows = rows[np.argpartition(cover[rows], limit - 1)[:limit]] if limit else rows[:0]
+        rows = rows[np.lexsort((self.product_ids[rows], cover[rows]))]
+
+        return {
+            "skus": len(self),
+            "selling": int(np.count_nonzero(self.daily_sales > 0)),
+            "at_risk": int(np.count_nonzero(at_risk)),
+            "items": [
+                {
+                    "product_id": int(self.product_ids[row]),
+                    "available": int(self.available[row]),
+                    "daily_sales": float(self.daily_sales[row]),
+                    "days_of_cover": round(float(cover[row]), 1),
+                    "stockout_date": _iso(stockout[row]),
+                    "next_restock": _iso(restock[row]),
+                    "runs_out_before_restock": bool(at_risk[row]),
+                }
+                for row in rows.tolist()
+            ],
+        }
+
+    def summary(self, by="category", today=None):
+        """Totals per category or brand, groups with the fewest days of cover first"""
+        product_ids, product_codes, labels = _product_groups(self.store or get_store(), by)
+        labels = labels + [UNKNOWN_GROUP]
+        # Each SKU's product, by binary search over the sorted catalog ids
+        position = np.minimum(np.searchsorted(product_ids, self.product_ids), max(len(product_ids) - 1, 0))
+        if len(product_ids):
+            found = product_ids[position] == self.product_ids
+            groups = np.where(found, product_codes[position], len(labels) - 1)
+        else:
+            groups = np.full(len(self), len(labels) - 1)
+
+        def total(weights=None):
+            return np.bincount(groups, weights=weights, minlength=len(labels))
+
+        statuses = self.derived_statuses()
+        skus = total()
+        stock = total(self.stock)
+        available = total(np.maximum(self.available, 0))
+        daily_sales = total(self.daily_sales)
+        low_stock = total(statuses == LOW_STOCK)
+        out_of_stock = total(statuses == OUT_OF_STOCK)
+        at_risk = total(self.at_risk(today))
+
+        rows = []
+        for code in np.flatnonzero(skus).tolist():
+            rows.append({
+                "group": labels[code],
+                "skus": int(skus[code]),
+                "stock": int(stock[code]),
+                "available": int(available[code]),
+                "low_stock": int(low_stock[code]),
+                "out_of_stock": int(out_of_stock[code]),
+                "at_risk": int(at_risk[code]),
+                "daily_sales": round(float(daily_sales[code]), 2),
+                "days_of_cover": round(float(available[code] / daily_sales[code]), 1) if daily_sales[code] > 0 else None,
+            })
+        rows.sort(key=lambda row: (row["days_of_cover"] is None, row["days_of_cover"] or 0, row["group"]))
+        return rows
+
+
+def snapshot(store=None):
+    """Snapshot of the whole inventory of ``store`` (default: the configured store)"""
+    store = store or get_store()
+    return InventorySnapshot(store.inventory_columns(), store)
+
+
+def recompute_statuses(store=None, apply=False, sample=10):
+    """Derive every SKU's status in one pass; with ``apply``, write back the ones that differ.
+
+    Returns counts per derived status, the number of SKUs whose stored status is
+    wrong and up to ``sample`` of those changes.
+    """
+    store = store or get_store()
+    snap = snapshot(store)
+    derived = snap.derived_statuses()
+    stored = snap.stored_statuses()
+    changed = np.flatnonzero(derived != stored)
+
+    if apply:
+        # Only the rows that change are written (and fire a change notification)
+        for row in changed.tolist():
+            store.update_inventory(int(snap.product_ids[row]), status=STATUS_NAMES[derived[row]])
+
+    counts = np.bincount(derived, minlength=len(STATUS_NAMES))
+    return {
+        "skus": len(snap),
+        "statuses": {name: int(count) for name, count in zip(STATUS_NAMES, counts)},
+        "changed": len(changed),
+        "changes": [
+            {
+                "product_id": int(snap.product_ids[row]),
+                "stored": STATUS_NAMES[stored[row]] if stored[row] >= 0 else None,
+                "derived": STATUS_NAMES[derived[row]],
+            }
+            for row in changed[:sample].tolist()
+        ],
+        "applied": bool(apply),
+    }
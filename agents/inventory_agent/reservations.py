@@ -0,0 +1,419 @@
+# Stock reservations: reserve -> commit (sold) or release, with expiry
+#
+#   reservation = reserve_stock(product_id, 2, idempotency_key="order-42")
+#   commit_reservation(reservation.reservation_id)     # stock and reserved go down
+#   release_reservation(reservation.reservation_id)    # reserved goes down
+#
+# A reservation only succeeds while stock - reserved covers it, so stock is never
+# oversold. The in-memory store is guarded by one lock per SKU; the SQLite store
+# uses a conditional UPDATE, which stays atomic across worker processes.
+# Reservations not committed or released within their TTL expire and give their
+# units back: a background thread sweeps for them once a reservation manager
+# exists, so stock reads stop counting them soon after. Retrying reserve_stock with the same idempotency key returns the
+# original reservation instead of reserving again. Every change recomputes the
+# inventory status against the reorder level.
+#
+# Settings (environment variables):
+#   RESERVATION_TTL        seconds before an open reservation expires (default 900)
+#   RESERVATION_RETENTION  seconds finished reservations are kept for idempotent retries (default 86400)
+#   RESERVATION_SWEEP      seconds between sweeps for expired reservations (default 1, 0 turns it off)
+import heapq
+import os
+import sys
+import threading
+import time
+import uuid
+
+from mock_data.inventory_index import derive_status
+from mock_data.store import ReadOnlyStoreError, SQLiteStore, get_store, notify_change
+
+ACTIVE = "active"
+COMMITTED = "committed"
+RELEASED = "released"
+EXPIRED = "expired"
+
+
+class ReservationError(Exception):
+    """Raised when a reservation can't be made or changed"""
+
+
+class InsufficientStockError(ReservationError):
+    """Raised when fewer units are available than requested"""
+
+
+class ReservationNotFoundError(ReservationError):
+    """Raised for an unknown reservation id or product"""
+
+
+class Reservation:
+    """Units of one product held for a checkout"""
+
+    __slots__ = ("reservation_id", "product_id", "quantity", "state", "expires_at", "idempotency_key", "updated_at")
+
+    def __init__(self, reservation_id, product_id, quantity, state, expires_at, idempotency_key=None, updated_at=None):
+        self.reservation_id = reservation_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.state = state
+        self.expires_at = expires_at
+        self.idempotency_key = idempotency_key
+        self.updated_at = updated_at
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _check_quantity(quantity):
+    if not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError(f"quantity must be a positive integer, got {quantity!r}")
+
+
+class InMemoryReservations:
+    """Reservations over an in-process store, serialized per SKU"""
+
+    def __init__(self, store, ttl=900.0, retention=86400.0, clock=time.time):
+        self.store = store
+        self.ttl = ttl
+        self.retention = retention
+        self.clock = clock
+        self.reservations = {}
+        self.by_key = {}
+        # (deadline, reservation id): expiry for active reservations, purge for finished ones
+        self._deadlines = []
+        self._lock = threading.Lock()
+
+    def _sku_lock(self, product_id):
+        # The store's, so changes from other processes (mock_data.change_bus) wait for it too
+        return self.store.sku_lock(product_id)
+
+    def _adjust(self, product_id, stock_delta, reserved_delta):
+        """Change stock/reserved of a product (caller holds its SKU lock)"""
+        record = self.store.get_inventory_status(product_id)
+        stock = record['stock'] + stock_delta
+        reserved = record['reserved'] + reserved_delta
+        self.store.update_inventory(
+            product_id, stock=stock, reserved=reserved,
+            status=derive_status(stock, reserved, record['reorder_level']),
+        )
+
+    def _schedule(self, reservation, deadline):
+        with self._lock:
+            heapq.heappush(self._deadlines, (deadline, reservation.reservation_id))
+
+    def reserve(self, product_id, quantity, ttl=None, idempotency_key=None):
+        _check_quantity(quantity)
+        self.expire()
+        if idempotency_key is not None and idempotency_key in self.by_key:
+            return self.reservations[self.by_key[idempotency_key]]
+
+        now = self.clock()
+        reservation = Reservation(
+            uuid.uuid4().hex, product_id, quantity, ACTIVE, now + (ttl or self.ttl), idempotency_key, now
+        )
+        with self._sku_lock(product_id):
+            if idempotency_key is not None and idempotency_key in self.by_key:
+                return self.reservations[self.by_key[idempotency_key]]
+            record = self.store.get_inventory_status(product_id)
+            if record is None:
+                raise ReservationNotFoundError(f"No inventory for product {product_id}")
+            available = record['stock'] - record['reserved']
+            if available < quantity:
+                raise InsufficientStockError(f"Only {max(available, 0)} units of product {product_id} available")
+            with self._lock:
+                if idempotency_key is not None:
+                    existing = self.by_key.setdefault(idempotency_key, reservation.reservation_id)
+                    if existing != reservation.reservation_id:
+                        # The same key was used concurrently for another product
+                        return self.reservations[existing]
+                self.reservations[reservation.reservation_id] = reservation
+            self._adjust(product_id, 0, quantity)
+        self._schedule(reservation, reservation.expires_at)
+        return reservation
+
+    def _finish(self, reservation_id, state, stock_delta_sign):
+        self.expire()
+        reservation = self.reservations.get(reservation_id)
+        if reservation is None:
+            raise ReservationNotFoundError(f"Unknown reservation {reservation_id}")
+        with self._sku_lock(reservation.product_id):
+            if reservation.state == state:
+                return reservation
+            if reservation.state != ACTIVE:
+                raise ReservationError(f"Reservation {reservation_id} is already {reservation.state}")
+            self._adjust(reservation.product_id, stock_delta_sign * reservation.quantity, -reservation.quantity)
+            reservation.state = state
+            reservation.updated_at = self.clock()
+        self._schedule(reservation, reservation.updated_at + self.retention)
+        return reservation
+
+    def commit(self, reservation_id):
+        return self._finish(reservation_id, COMMITTED, -1)
+
+    def release(self, reservation_id):
+        return self._finish(reservation_id, RELEASED, 0)
+
+    def get(self, reservation_id):
+        return self.reservations.get(reservation_id)
+
+    def expire(self):
+        """Release active reservations past their TTL and forget old finished ones"""
+        now = self.clock()
+        expired = 0
+        while self._deadlines and self._deadlines[0][0] <= now:
+            with self._lock:
+                if not self._deadlines or self._deadlines[0][0] > now:
+                    break
+                _, reservation_id = heapq.heappop(self._deadlines)
+            reservation = self.reservations.get(reservation_id)
+            if reservation is None:
+                continue
+            with self._sku_lock(reservation.product_id):
+                if reservation.state == ACTIVE and reservation.expires_at <= now:
+                    self._adjust(reservation.product_id, 0, -reservation.quantity)
+                    reservation.state = EXPIRED
+                    reservation.updated_at = now
+                    expired += 1
+                    self._schedule(reservation, now + self.retention)
+                    continue
+            if reservation.state != ACTIVE and reservation.updated_at + self.retention <= now:
+                with self._lock:
+                    self.reservations.pop(reservation_id, None)
+                    if reservation.idempotency_key is not None:
+                        self.by_key.pop(reservation.idempotency_key, None)
+        return expired
+
+
+RESERVATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_state_expiry ON reservations (state, expires_at);
+"""
+
+RESERVATION_COLUMNS = "reservation_id, product_id, quantity, state, expires_at, idempotency_key, updated_at"
+
+# New status for the row being updated, given the new stock and reserved expressions
+STATUS_SQL = (
+    "CASE WHEN ({stock}) - ({reserved}) <= 0 THEN 'out_of_stock' "
+    "WHEN ({stock}) - ({reserved}) <= reorder_level THEN 'low_stock' ELSE 'in_stock' END"
+)
+
+
+class SQLiteReservations:
+    """Reservations in the SQLite store, atomic across threads and worker processes"""
+
+    def __init__(self, store, ttl=900.0, retention=86400.0, clock=time.time):
+        self.store = store
+        self.ttl = ttl
+        self.retention = retention
+        self.clock = clock
+        with store.connect() as conn:
+            conn.executescript(RESERVATION_SCHEMA)
+        self._next_sweep = 0.0
+
+    def _transaction(self):
+        conn = self.store.connect()
+        # Take the write lock up front, so concurrent writers queue instead of deadlocking
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def _get(self, conn, reservation_id):
+        row = conn.execute(
+            f"SELECT {RESERVATION_COLUMNS} FROM reservations WHERE reservation_id = ?", (reservation_id,)
+        ).fetchone()
+        return Reservation(*row) if row else None
+
+    def _by_key(self, conn, idempotency_key):
+        row = conn.execute(
+            f"SELECT {RESERVATION_COLUMNS} FROM reservations WHERE idempotency_key = ?", (idempotency_key,)
+        ).fetchone()
+        return Reservation(*row) if row else None
+
+    def _adjust(self, conn, product_id, stock_delta, reserved_delta, require_available=None):
+        """Change stock/reserved of a product; with ``require_available`` only if that many units are free"""
+        stock = f"stock + {int(stock_delta)}"
+        reserved = f"reserved + {int(reserved_delta)}"
+        sql = (
+            f"UPDATE inventory SET stock = {stock}, reserved = {reserved}, "
+            f"status = {STATUS_SQL.format(stock=stock, reserved=reserved)} WHERE product_id = ?"
+        )
+        params = [product_id]
+        if require_available is not None:
+            sql += " AND stock - reserved >= ?"
+            params.append(require_available)
+        return conn.execute(sql, params).rowcount == 1
+
+    def reserve(self, product_id, quantity, ttl=None, idempotency_key=None):
+        _check_quantity(quantity)
+        self.expire()
+        now = self.clock()
+        conn = self._transaction()
+        try:
+            if idempotency_key is not None:
+                existing = self._by_key(conn, idempotency_key)
+                if existing is not None:
+                    conn.rollback()
+                    return existing
+            if not self._adjust(conn, product_id, 0, quantity, require_available=quantity):
+                row = conn.execute(
+                    "SELECT stock - reserved FROM inventory WHERE product_id = ?", (product_id,)
+                ).fetchone()
+                if row is None:
+                    raise ReservationNotFoundError(f"No inventory for product {product_id}")
+                raise InsufficientStockError(f"Only {max(row[0], 0)} units of product {product_id} available")
+            reservation = Reservation(
+                uuid.uuid4().hex, product_id, quantity, ACTIVE, now + (ttl or self.ttl), idempotency_key, now
+            )
+            conn.execute(
+                f"INSERT INTO reservations ({RESERVATION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (reservation.reservation_id, product_id, quantity, ACTIVE, reservation.expires_at,
+                 idempotency_key, now),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        notify_change("inventory", product_id)
+        return reservation
+
+    def _finish(self, reservation_id, state, stock_delta_sign):
+        self.expire()
+        conn = self._transaction()
+        try:
+            reservation = self._get(conn, reservation_id)
+            if reservation is None:
+                raise ReservationNotFoundError(f"Unknown reservation {reservation_id}")
+            if reservation.state == state:
+                conn.rollback()
+                return reservation
+            if reservation.state != ACTIVE:
+                raise ReservationError(f"Reservation {reservation_id} is already {reservation.state}")
+            self._adjust(conn, reservation.product_id, stock_delta_sign * reservation.quantity, -reservation.quantity)
+            reservation.state = state
+            reservation.updated_at = self.clock()
+            conn.execute(
+                "UPDATE reservations SET state = ?, updated_at = ? WHERE reservation_id = ?",
+                (state, reservation.updated_at, reservation_id),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        notify_change("inventory", reservation.product_id)
+        return reservation
+
+    def commit(self, reservation_id):
+        return self._finish(reservation_id, COMMITTED, -1)
+
+    def release(self, reservation_id):
+        return self._finish(reservation_id, RELEASED, 0)
+
+    def get(self, reservation_id):
+        return self._get(self.store.connect(), reservation_id)
+
+    def expire(self):
+        """Release active reservations past their TTL and delete old finished ones"""
+        now = self.clock()
+        conn = self.store.connect()
+        # Cheap check first, so the hot path doesn't take the write lock
+        row = conn.execute(
+            "SELECT 1 FROM reservations WHERE state = ? AND expires_at <= ? LIMIT 1", (ACTIVE, now)
+        ).fetchone()
+        if row is None and now < self._next_sweep:
+            return 0
+        conn = self._transaction()
+        try:
+            expired = conn.execute(
+                "SELECT reservation_id, product_id, quantity FROM reservations WHERE state = ? AND expires_at <= ?",
+                (ACTIVE, now),
+            ).fetchall()
+            for reservation_id, product_id, quantity in expired:
+                self._adjust(conn, product_id, 0, -quantity)
+                conn.execute(
+                    "UPDATE reservations SET state = ?, updated_at = ? WHERE reservation_id = ?",
+                    (EXPIRED, now, reservation_id),
+                )
+            if now >= self._next_sweep:
+                conn.execute(
+                    "DELETE FROM reservations WHERE state != ? AND updated_at <= ?", (ACTIVE, now - self.retention)
+                )
+                self._next_sweep = now + 60
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        for product_id in {product_id for _, product_id, _ in expired}:
+            notify_change("inventory", product_id)
+        return len(expired)
+
+
+def create_reservations(store=None):
+    """Reservation manager matching the store backend"""
+    store = store or get_store()
+    ttl = float(os.environ.get("RESERVATION_TTL", 900))
+    retention = float(os.environ.get("RESERVATION_RETENTION", 86400))
+    if getattr(store, "read_only", False):
+        raise ReadOnlyStoreError(f"{type(store).__name__} is read-only, reservations need a writable store")
+    if isinstance(store, SQLiteStore):
+        return SQLiteReservations(store, ttl, retention)
+    return InMemoryReservations(store, ttl, retention)
+
+
+_reservations = None
+_reservations_lock = threading.Lock()
+_sweeper = None
+
+
+def _sweep(interval):
+    """Expire reservations every ``interval`` seconds, so reads don't wait for the next reservation"""
+    while True:
+        time.sleep(interval)
+        try:
+            _reservations.expire()
+        except Exception as exc:
+            print(f"⚠️ Reservation sweep failed: {exc}", file=sys.stderr)
+
+
+def get_reservations():
+    """Process-wide reservation manager for the current store"""
+    global _reservations, _sweeper
+    store = get_store()
+    if _reservations is None or _reservations.store is not store:
+        with _reservations_lock:
+            if _reservations is None or _reservations.store is not store:
+                _reservations = create_reservations(store)
+            interval = float(os.environ.get("RESERVATION_SWEEP", 1))
+            if _sweeper is None and interval > 0:
+                _sweeper = threading.Thread(target=_sweep, args=(interval,), name="reservation-sweeper", daemon=True)
+                _sweeper.start()
+    return _reservations
+
+
+def reserve_stock(product_id, quantity, ttl=None, idempotency_key=None):
+    """Hold ``quantity`` units of a product, raising InsufficientStockError if they aren't available"""
+    return get_reservations().reserve(product_id, quantity, ttl, idempotency_key)
+
+
+def commit_reservation(reservation_id):
+    """Turn a reservation into a sale (stock and reserved both go down)"""
+    return get_reservations().commit(reservation_id)
+
+
+def release_reservation(reservation_id):
+    """Give a reservation's units back"""
+    return get_reservations().release(reservation_id)
+
+
+def get_reservation(reservation_id):
+    return get_reservations().get(reservation_id)
+
+
+def expire_reservations():
+    """Release every reservation past its TTL; returns how many expired"""
+    return get_reservations().expire()
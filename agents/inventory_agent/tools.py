@@ -0,0 +1,226 @@
+# Inventory agent tools (importable without the ADK agent stack)
+#
+# Tools build compact dicts; agents.common.presentation renders them as text
+# unless TOOL_OUTPUT=json.
+import time
+
+from agents.common.batch import batch_items
+from agents.common.presentation import STOCK_STATUS_LABELS, presented, table
+from agents.common.tool_cache import cached_tool
+from agents.inventory_agent import reservations
+from mock_data.sample_data import (
+    find_product, find_products, get_product, get_inventory_status, get_inventory_statuses,
+    get_flagged_inventory, count_flagged_inventory,
+)
+from mock_data.store import ReadOnlyStoreError
+
+# Most products a reorder forecast lists
+FORECAST_LIMIT = 50
+NUMPY_MISSING = "Inventory analytics need NumPy (pip install numpy)."
+
+
+@presented("stock_level")
+@cached_tool(ttl=30, depends_on=("inventory", "catalog"))
+def check_stock_level(product_name: str) -> dict:
+    """Check current stock levels for a product"""
+    product = find_product(product_name)
+
+    if not product:
+        return {"error": f"Product '{product_name}' not found in catalog."}
+
+    inventory = get_inventory_status(product['id'])
+
+    if not inventory:
+        return {"error": f"No inventory data found for {product['name']}"}
+
+    return {
+        "product": product['name'],
+        "stock": inventory['stock'],
+        "reserved": inventory['reserved'],
+        "available": inventory['stock'] - inventory['reserved'],
+        "status": inventory['status'],
+        "reorder_level": inventory['reorder_level'],
+        "next_restock": inventory['next_restock'],
+    }
+
+# Lists aren't hashable, so batch tools skip the result cache; they're a single lookup pass anyway
+@presented("stock_levels")
+def check_stock_levels(product_names: list[str]) -> dict:
+    """Check stock levels for several products at once (e.g. every item in a cart)"""
+    names, skipped = batch_items(product_names)
+    if not names:
+        return {"error": "No product names given."}
+    products = find_products(names)
+    inventories = get_inventory_statuses([product['id'] for product in products if product])
+
+    items = []
+    for name, product in zip(names, products):
+        if not product:
+            items.append({"query": name, "error": "not found in catalog"})
+            continue
+        inventory = inventories.get(product['id'])
+        if not inventory:
+            items.append({"product": product['name'], "error": "no inventory data"})
+            continue
+        item = {
+            "product": product['name'],
+            "available": inventory['stock'] - inventory['reserved'],
+            "status": inventory['status'],
+        }
+        if inventory['status'] in STOCK_STATUS_LABELS:
+            item["next_restock"] = inventory['next_restock']
+        items.append(item)
+    data = {"items": table(items)}
+    if skipped:
+        data["skipped"] = skipped
+    return data
+
+@presented("restock_schedule")
+@cached_tool(ttl=300, depends_on=("inventory", "catalog"))
+def check_restock_schedule(product_name: str) -> dict:
+    """Check when a product will be restocked"""
+    product = find_product(product_name)
+
+    if not product:
+        return {"error": f"Product '{product_name}' not found."}
+
+    inventory = get_inventory_status(product['id'])
+
+    if not inventory:
+        return {"error": f"No restock information available for {product['name']}"}
+
+    return {
+        "product": product['name'],
+        "next_restock": inventory['next_restock'],
+        "reorder_level": inventory['reorder_level'],
+        "stock": inventory['stock'],
+    }
+
+@presented("low_stock_items")
+@cached_tool(ttl=60, maxsize=64, depends_on=("inventory", "catalog"))
+def get_low_stock_items(page: int = 1, page_size: int = 20, most_urgent: int = 0) -> dict:
+    """Get list of items with low stock, paged, or the N most urgent by next restock date"""
+    total = count_flagged_inventory()
+    if not total:
+        return {"total": 0}
+
+    data = {"total": total}
+    if most_urgent > 0:
+        flagged = get_flagged_inventory(most_urgent=most_urgent)
+        data["most_urgent"] = most_urgent
+    else:
+        page_size = max(1, page_size)
+        pages = (total + page_size - 1) // page_size
+        page = min(max(1, page), pages)
+        flagged = get_flagged_inventory(offset=(page - 1) * page_size, limit=page_size)
+        data.update(page=page, pages=pages)
+
+    items = []
+    for product_id, inventory in flagged:
+        product = get_product(product_id)
+        items.append({
+            "product": product['name'] if product else f"Product #{product_id}",
+            "stock": inventory['stock'],
+            "status": inventory['status'],
+            "next_restock": inventory['next_restock'],
+        })
+    data["items"] = table(items)
+    return data
+
+
+def _analytics():
+    """The NumPy analytics module, imported on first use so the other tools work without NumPy"""
+    from agents.inventory_agent import analytics
+
+    return analytics
+
+
+def _product_name(product_id):
+    product = get_product(product_id)
+    return product['name'] if product else f"Product #{product_id}"
+
+
+@presented("reorder_forecast")
+@cached_tool(ttl=60, maxsize=16, depends_on=("inventory", "catalog"))
+def get_reorder_forecast(limit: int = 10) -> dict:
+    """Forecast which products run out soonest at their current sales rate, with projected stockout dates"""
+    try:
+        analytics = _analytics()
+    except ImportError:
+        return {"error": NUMPY_MISSING}
+    forecast = analytics.snapshot().forecast(limit=min(max(1, limit), FORECAST_LIMIT))
+    items = []
+    for item in forecast['items']:
+        product_id = item.pop('product_id')
+        items.append({"product": _product_name(product_id), **item})
+    forecast["items"] = table(items)
+    return forecast
+
+
+@presented("inventory_summary")
+@cached_tool(ttl=60, maxsize=16, depends_on=("inventory", "catalog"))
+def get_inventory_summary(group_by: str = "category") -> dict:
+    """Summarize stock, sales and stockout risk across the whole inventory, per product category or brand"""
+    group_by = group_by.strip().lower()
+    if group_by not in ("category", "brand"):
+        return {"error": f"Can't group inventory by '{group_by}'.", "hint": "Group by category or brand."}
+    try:
+        analytics = _analytics()
+    except ImportError:
+        return {"error": NUMPY_MISSING}
+    return {"group_by": group_by, "groups": table(analytics.snapshot().summary(by=group_by))}
+
+
+@presented("status_recompute")
+def recompute_stock_statuses(apply: bool = False) -> dict:
+    """Recompute every product's stock status from stock, reserved units and reorder level; apply=True saves the changes"""
+    try:
+        result = _analytics().recompute_statuses(apply=apply)
+    except ImportError:
+        return {"error": NUMPY_MISSING}
+    except ReadOnlyStoreError as exc:
+        return {"error": f"Stock statuses can't be updated: {exc}"}
+    changes = []
+    for change in result['changes']:
+        product_id = change.pop('product_id')
+        changes.append({"product": _product_name(product_id), **change})
+    result["changes"] = table(changes)
+    return result
+
+
+@presented("reservation")
+def reserve_stock(product_name: str, quantity: int = 1, idempotency_key: str = "") -> dict:
+    """Reserve units of a product for a checkout (expires unless committed or released)"""
+    product = find_product(product_name)
+    if not product:
+        return {"error": f"Product '{product_name}' not found in catalog."}
+    try:
+        reservation = reservations.reserve_stock(product['id'], quantity, idempotency_key=idempotency_key or None)
+    except (reservations.ReservationError, ReadOnlyStoreError, ValueError) as exc:
+        return {"error": f"Could not reserve {quantity} x {product['name']}: {exc}"}
+    return {
+        "reservation_id": reservation.reservation_id,
+        "product": product['name'],
+        "quantity": reservation.quantity,
+        "expires_in_minutes": max(1, round((reservation.expires_at - time.time()) / 60)),
+    }
+
+
+@presented("reservation_update")
+def commit_stock(reservation_id: str) -> dict:
+    """Complete a reservation: the reserved units are sold and leave stock"""
+    try:
+        reservation = reservations.commit_reservation(reservation_id)
+    except (reservations.ReservationError, ReadOnlyStoreError) as exc:
+        return {"error": str(exc)}
+    return {"reservation_id": reservation_id, "state": reservation.state, "quantity": reservation.quantity}
+
+
+@presented("reservation_update")
+def release_stock(reservation_id: str) -> dict:
+    """Cancel a reservation and return its units to available stock"""
+    try:
+        reservation = reservations.release_reservation(reservation_id)
+    except (reservations.ReservationError, ReadOnlyStoreError) as exc:
+        return {"error": str(exc)}
+    return {"reservation_id": reservation_id, "state": reservation.state, "quantity": reservation.quantity}
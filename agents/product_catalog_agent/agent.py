@@ -1,81 +1,24 @@
+import functools
 import os
 
 from dotenv import load_dotenv
-from google.adk.agents import LlmAgent
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
-from google.adk.models.google_llm import Gemini
-from google.genai import types
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from mock_data.sample_data import find_product, search_products
+from agents.common.model_scheduler import scheduled_gemini
+from agents.common.presentation import agent_instruction
+from agents.common.tracing import agent_callbacks, instrument_app
+from agents.product_catalog_agent.tools import get_product_details, get_products_details, search_products_tool, list_categories
+from mock_data.change_bus import start_client
 
 load_dotenv()
 
-print("🚀 Starting Product Catalog Agent (Mock)...")
+PORT = 8001
 
-def get_product_details(product_name: str) -> str:
-    """Get detailed product information from mock data"""
-    product = find_product(product_name)
-    
-    if product:
-        features = "\n".join([f"  • {feature}" for feature in product.get('features', [])])
-        return f"""
-📱 **{product['name']}** - ${product['price']}
-🏷️  Brand: {product['brand']}
-📂 Category: {product['category']}
-
-📝 Description: {product['description']}
-
-⚙️ Specifications: {product['specifications']}
-
-✨ Features:
-{features}
-
-💡 Need stock information? Ask our inventory agent!
-"""
-    else:
-        # Search for similar products
-        similar = search_products(product_name)
-        if similar:
-            suggestions = "\n".join([f"  • {p['name']} - ${p['price']}" for p in similar[:3]])
-            return f"❌ Product '{product_name}' not found.\n\n🔍 Similar products:\n{suggestions}"
-        else:
-            return f"❌ Product '{product_name}' not found in our catalog."
-
-def search_products_tool(query: str, category: str = "") -> str:
-    """Search products in mock catalog"""
-    results = search_products(query, category)
-    
-    if results:
-        product_list = "\n".join([
-            f"  • {p['name']} (${p['price']}) - {p['description'][:80]}..." 
-            for p in results[:5]
-        ])
-        return f"🔍 Found {len(results)} products:\n{product_list}"
-    else:
-        categories = ", ".join(["electronics", "audio", "tablets"])
-        return f"❌ No products found for '{query}'.\n\n📂 Available categories: {categories}"
-
-def list_categories() -> str:
-    """List all available product categories"""
-    categories = ["📱 Electronics", "🎧 Audio", "📟 Tablets"]
-    return "🛍️ Available Categories:\n" + "\n".join([f"  • {cat}" for cat in categories])
-
-# Create Product Catalog Agent
-product_catalog_agent = LlmAgent(
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        api_key=os.environ.get("GOOGLE_API_KEY")
-    ),
-    name="product_catalog_agent",
-    description="Provides detailed product information, specifications, and search capabilities using mock data.",
-    instruction="""
+INSTRUCTION = """
     You are a friendly product catalog specialist using mock demonstration data.
     
     Your capabilities:
     • Get detailed product information with specs and features
+    • Compare or summarise several products in one call with get_products_details
     • Search for products by name or category  
     • List available product categories
     
@@ -84,20 +27,53 @@ product_catalog_agent = LlmAgent(
     
     Always be helpful and suggest similar products if exact match not found.
     Mention that this is demo data for testing purposes.
-    """,
-    tools=[get_product_details, search_products_tool, list_categories]
-)
+    """
 
-print("✅ Product Catalog Agent created!")
 
-# Create A2A app
-app = to_a2a(product_catalog_agent, port=8001)
-agent = product_catalog_agent
+def create_agent():
+    """Build the Product Catalog LlmAgent (loads ADK and the Gemini client on first call)"""
+    from google.adk.agents import LlmAgent
 
+    return LlmAgent(
+        model=scheduled_gemini("gemini-2.5-flash-lite", api_key=os.environ.get("GOOGLE_API_KEY")),
+        name="product_catalog_agent",
+        description="Provides detailed product information, specifications, and search capabilities using mock data.",
+        instruction=agent_instruction(INSTRUCTION),
+        tools=[get_product_details, get_products_details, search_products_tool, list_categories],
+        **agent_callbacks()
+    )
+
+
+def create_app(agent=None):
+    """A2A app serving the agent"""
+    from google.adk.a2a.utils.agent_to_a2a import to_a2a
+
+    # Apply stock, price and tracking changes made by other processes (CHANGE_BUS_SOCKET)
+    start_client()
+    return instrument_app(to_a2a(agent or get_agent(), port=PORT), "product_catalog_agent")
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
 
+@functools.cache
+def get_agent():
+    return create_agent()
+
+
+@functools.cache
+def get_app():
+    return create_app()
+
+
+def __getattr__(name):
+    # Built on first access: ``agent`` for the ADK loader, ``app`` for uvicorn workers
+    if name in ("agent", "product_catalog_agent"):
+        return get_agent()
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    from agents.common.serving import run_agent
 
-print("🌐 Product Catalog A2A server ready on port 8001")
\ No newline at end of file
+    print("🚀 Starting Product Catalog Agent (Mock)...")
+    run_agent(get_app, "agents.product_catalog_agent.agent:app", port=PORT)
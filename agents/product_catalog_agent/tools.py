@@ -0,0 +1,73 @@
+# Product Catalog agent tools (importable without the ADK agent stack)
+#
+# Tools build compact dicts; agents.common.presentation renders them as text
+# unless TOOL_OUTPUT=json.
+from agents.common.batch import batch_items
+from agents.common.presentation import presented, table
+from agents.common.tool_cache import cached_tool
+from mock_data.sample_data import find_product, find_products, search_products, count_products, list_categories as catalog_categories
+
+DETAIL_FIELDS = ("name", "price", "brand", "category", "description", "specifications", "features")
+SUMMARY_FIELDS = ("name", "price", "brand", "category", "specifications")
+
+
+@presented("product_details")
+@cached_tool(ttl=300, depends_on=("catalog",))
+def get_product_details(product_name: str) -> dict:
+    """Get detailed product information from mock data"""
+    product = find_product(product_name)
+
+    if product:
+        return {field: product.get(field) for field in DETAIL_FIELDS}
+
+    # Search for similar products
+    similar = search_products(product_name, limit=3)
+    if similar:
+        return {
+            "error": f"Product '{product_name}' not found.",
+            "similar": [{"name": p['name'], "price": p['price']} for p in similar],
+        }
+    return {"error": f"Product '{product_name}' not found in our catalog."}
+
+# Lists aren't hashable, so batch tools skip the result cache; they're a single lookup pass anyway
+@presented("products_details")
+def get_products_details(product_names: list[str]) -> dict:
+    """Get key details (price, brand, category, specs) for several products at once"""
+    names, skipped = batch_items(product_names)
+    if not names:
+        return {"error": "No product names given."}
+
+    items = []
+    for name, product in zip(names, find_products(names)):
+        if product:
+            items.append({field: product.get(field) for field in SUMMARY_FIELDS})
+            continue
+        item = {"query": name, "error": "not found"}
+        similar = search_products(name, limit=1)
+        if similar:
+            item["suggestion"] = similar[0]['name']
+        items.append(item)
+    data = {"items": table(items)}
+    if skipped:
+        data["skipped"] = skipped
+    return data
+
+@presented("product_search")
+@cached_tool(ttl=300, depends_on=("catalog",))
+def search_products_tool(query: str, category: str = "") -> dict:
+    """Search products in mock catalog"""
+    results = search_products(query, category, limit=5)
+
+    if results:
+        total = len(results) if len(results) < 5 else count_products(query, category)
+        return {
+            "total": total,
+            "results": table([{"name": p['name'], "price": p['price'], "description": p['description'][:80]} for p in results]),
+        }
+    return {"error": f"No products found for '{query}'.", "categories": catalog_categories()}
+
+@presented("categories")
+@cached_tool(ttl=3600, maxsize=1, depends_on=("catalog",))
+def list_categories() -> dict:
+    """List all available product categories"""
+    return {"categories": catalog_categories()}
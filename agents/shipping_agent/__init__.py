@@ -1 +1,9 @@
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # The ADK loader reads ``agent`` from here; loaded on first access, so the
+    # shipping tools and the rate engine import without the ADK agent and its A2A app
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
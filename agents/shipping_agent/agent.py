@@ -1,109 +1,35 @@
+import functools
 import os
+
 from dotenv import load_dotenv
-from google.adk.agents import LlmAgent
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
-from google.adk.models.google_llm import Gemini
-from google.genai import types
-from datetime import datetime, timedelta
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from mock_data.sample_data import MOCK_SHIPPING_OPTIONS, MOCK_TRACKING
 
-load_dotenv()
+from agents.common.model_scheduler import scheduled_gemini
+from agents.common.presentation import agent_instruction
+from agents.common.tracing import agent_callbacks, instrument_app
+from agents.shipping_agent.tools import (
+    get_shipping_estimates, get_shipping_quotes, track_package, track_packages, list_packages, get_shipping_options,
+    calculate_free_shipping_eligibility,
+)
+from mock_data.change_bus import start_client
 
-print("🚀 Starting Shipping Agent (Mock)...")
+load_dotenv()
 
-def get_shipping_estimates(zip_code: str, shipping_method: str = "standard") -> str:
-    """Get shipping cost and delivery estimates"""
-    method = MOCK_SHIPPING_OPTIONS.get(shipping_method.lower())
-    
-    if not method:
-        available_methods = ", ".join([m.title() for m in MOCK_SHIPPING_OPTIONS.keys()])
-        return f"❌ Shipping method '{shipping_method}' not available.\n\n🚚 Available methods: {available_methods}"
-    
-    # Calculate delivery date (mock)
-    delivery_date = datetime.now() + timedelta(days=method['days'])
-    
-    return f"""
-🚚 **Shipping to {zip_code}**
-📦 Method: {shipping_method.title()} ({method['carrier']})
-💰 Cost: ${method['cost']}
-⏱️ Delivery Time: {method['days']} business day{'s' if method['days'] != 1 else ''}
-📅 Expected Delivery: {delivery_date.strftime('%A, %B %d, %Y')}
-📝 {method['description']}
-"""
-
-def track_package(tracking_number: str) -> str:
-    """Track a package using tracking number"""
-    package = MOCK_TRACKING.get(tracking_number.upper())
-    
-    if package:
-        status_emojis = {
-            "processing": "📦",
-            "in_transit": "🚚",
-            "delivered": "✅"
-        }
-        
-        status_descriptions = {
-            "processing": "Your package is being prepared for shipment",
-            "in_transit": "Your package is on the way to its destination",
-            "delivered": "Your package has been successfully delivered"
-        }
-        
-        emoji = status_emojis.get(package['status'], '📦')
-        description = status_descriptions.get(package['status'], '')
-        
-        return f"""
-{emoji} **Package Tracking: {tracking_number.upper()}**
-📊 Status: {package['status'].replace('_', ' ').title()}
-{description}
-📍 Current Location: {package['location']}
-📅 Last Update: {package['timestamp']}
-🚚 Carrier: {package['carrier']}
-📦 Estimated Delivery: {package.get('estimated_delivery', 'N/A')}
-"""
-    else:
-        return f"❌ Tracking number '{tracking_number}' not found.\n\n💡 Please verify your tracking number or contact support."
-
-def get_shipping_options() -> str:
-    """Get all available shipping options"""
-    options = []
-    for method, details in MOCK_SHIPPING_OPTIONS.items():
-        options.append(
-            f"  • **{method.title()}**: ${details['cost']} - {details['days']} day{'s' if details['days'] != 1 else ''} via {details['carrier']}\n    {details['description']}"
-        )
-    
-    return "🚚 **Available Shipping Options**\n\n" + "\n\n".join(options)
+PORT = 8003
 
-def calculate_free_shipping_eligibility(order_total: float) -> str:
-    """Check if order qualifies for free shipping"""
-    free_shipping_minimum = 35.00
-    
-    if order_total >= free_shipping_minimum:
-        return f"🎉 Congratulations! Your order of ${order_total:.2f} qualifies for FREE shipping!"
-    else:
-        needed = free_shipping_minimum - order_total
-        return f"📦 Add ${needed:.2f} more to your order to qualify for FREE shipping!"
-
-# Create Shipping Agent
-shipping_agent = LlmAgent(
-    model=Gemini(
-        model="gemini-2.5-flash-lite",
-        api_key=os.environ.get("GOOGLE_API_KEY")
-    ),
-    name="shipping_agent", 
-    description="Provides shipping estimates, delivery tracking, and shipping options using mock data.",
-    instruction="""
+INSTRUCTION = """
     You are a shipping and delivery specialist using demonstration data.
     
     Your capabilities:
-    • Provide shipping cost estimates and delivery dates
-    • Track packages using tracking numbers
+    • Provide shipping cost estimates and delivery dates; cost and delivery time depend
+      on the destination zone, and dates skip weekends and carrier holidays
+      (use get_shipping_quotes to compare every method for one or more ZIP codes)
+    • Track packages using tracking numbers (use track_packages for several at once);
+      for a partial or mistyped number, offer the suggested matches
+    • List packages in a status and/or with a carrier (list_packages)
     • Explain available shipping options and carriers
     • Check free shipping eligibility
     
-    Shipping Methods Available:
+    Shipping Methods Available (prices and days for zone 4, a typical distance):
     • Standard (5 days, $4.99)
     • Expedited (2 days, $12.99) 
     • Overnight (1 day, $24.99)
@@ -114,20 +40,56 @@ shipping_agent = LlmAgent(
     Always provide clear delivery estimates and tracking information.
     Use emojis to make the information more engaging.
     Mention that this is demo shipping data.
-    """,
-    tools=[get_shipping_estimates, track_package, get_shipping_options, calculate_free_shipping_eligibility]
-)
+    """
 
-print("✅ Shipping Agent created!")
 
-# Create A2A app
-app = to_a2a(shipping_agent, port=8003)
-agent = shipping_agent
+def create_agent():
+    """Build the Shipping LlmAgent (loads ADK and the Gemini client on first call)"""
+    from google.adk.agents import LlmAgent
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8003)
+    return LlmAgent(
+        model=scheduled_gemini("gemini-2.5-flash-lite", api_key=os.environ.get("GOOGLE_API_KEY")),
+        name="shipping_agent",
+        description="Provides shipping estimates, delivery tracking, and shipping options using mock data.",
+        instruction=agent_instruction(INSTRUCTION),
+        tools=[
+            get_shipping_estimates, get_shipping_quotes, track_package, track_packages, list_packages,
+            get_shipping_options, calculate_free_shipping_eligibility,
+        ],
+        **agent_callbacks()
+    )
+
+
+def create_app(agent=None):
+    """A2A app serving the agent"""
+    from google.adk.a2a.utils.agent_to_a2a import to_a2a
+
+    # Apply stock, price and tracking changes made by other processes (CHANGE_BUS_SOCKET)
+    start_client()
+    return instrument_app(to_a2a(agent or get_agent(), port=PORT), "shipping_agent")
+
+
+@functools.cache
+def get_agent():
+    return create_agent()
 
 
+@functools.cache
+def get_app():
+    return create_app()
+
+
+def __getattr__(name):
+    # Built on first access: ``agent`` for the ADK loader, ``app`` for uvicorn workers
+    if name in ("agent", "shipping_agent"):
+        return get_agent()
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    from agents.common.serving import run_agent
 
-print("🌐 Shipping A2A server ready on port 8003")
\ No newline at end of file
+    print("🚀 Starting Shipping Agent (Mock)...")
+    run_agent(get_app, "agents.shipping_agent.agent:app", port=PORT)
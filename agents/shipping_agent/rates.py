@@ -0,0 +1,287 @@
+# Shipping rate engine: zone by ZIP prefix, carrier rate matrices, business-day calendars
+#
+#   engine = get_rate_engine()
+#   engine.quote("94105", "standard")            # one method to one ZIP
+#   engine.quote_many(["94105", "10001"])        # every shipping option to many ZIPs
+#
+# Everything a quote needs is precomputed when the engine is built, so a quote is a
+# few index lookups:
+#   zones      array('B') of 1000 entries, the zone of each 3-digit ZIP prefix as
+#              seen from the warehouse. It's a demo model: distance between the
+#              centroids of the ten ZIP areas (first digit), bucketed into zones
+#              2-8 like carrier zone charts. Zone 9 is Alaska, Hawaii, Puerto Rico
+#              and the Pacific territories.
+#   costs      per method, the option's cost scaled by its carrier's zone multipliers
+#   transit    per method, business days per zone (the option's days are for zone 4)
+#   calendars  per carrier, the business days of the next CALENDAR_DAYS days
+#              (weekends and the holidays that carrier observes are skipped) with
+#              an index from every day to the next business day, so adding N
+#              business days is two array reads
+#
+#   SHIPPING_ORIGIN_ZIP  ZIP code of the warehouse orders ship from (default 43215)
+import math
+import os
+import re
+import threading
+from array import array
+from datetime import date, timedelta
+
+from mock_data.sample_data import list_shipping_options
+from mock_data.store import data_version
+
+DEFAULT_ORIGIN_ZIP = "43215"
+CALENDAR_DAYS = 800
+# Calendars start this many days back, so quotes for recent ship dates still work
+CALENDAR_LOOKBACK = 7
+ZIP_RE = re.compile(r"^(\d{3})\d{2}(?:-?\d{4})?$")
+
+UNKNOWN_ZONE = 0
+NONCONTIGUOUS_ZONE = 9
+# Centroid (lat, lon) of each ZIP area, by first digit
+AREA_CENTROIDS = (
+    (42.0, -72.0),   # 0: New England, New Jersey
+    (41.5, -76.0),   # 1: New York, Pennsylvania, Delaware
+    (37.0, -78.5),   # 2: DC, Maryland, Virginias, Carolinas
+    (32.5, -84.5),   # 3: Florida, Georgia, Alabama, Tennessee, Mississippi
+    (40.5, -84.5),   # 4: Indiana, Kentucky, Michigan, Ohio
+    (45.0, -94.0),   # 5: Upper Midwest, Montana
+    (40.0, -93.0),   # 6: Illinois, Missouri, Kansas, Nebraska
+    (32.0, -95.0),   # 7: Texas, Oklahoma, Arkansas, Louisiana
+    (39.0, -109.0),  # 8: Mountain states
+    (38.5, -121.0),  # 9: Pacific coast
+)
+# (max miles, zone) between the warehouse's area and a destination area
+ZONE_BANDS = ((150, 2), (300, 3), (600, 4), (1000, 5), (1400, 6), (1800, 7))
+NONCONTIGUOUS_PREFIXES = (*range(6, 10), *range(967, 970), *range(995, 1000))
+# ZIP prefixes not assigned to any area
+UNASSIGNED_PREFIXES = range(0, 5)
+
+# Cost multiplier per zone (index 0-9) for each carrier; zone 4 is the listed price
+ZONE_MULTIPLIERS = {
+    "USPS": (0, 0, 0.80, 0.88, 1.00, 1.10, 1.22, 1.34, 1.48, 2.00),
+    "UPS": (0, 0, 0.78, 0.86, 1.00, 1.14, 1.28, 1.42, 1.58, 2.40),
+    "FEDEX": (0, 0, 0.79, 0.87, 1.00, 1.13, 1.26, 1.40, 1.55, 2.30),
+}
+DEFAULT_MULTIPLIERS = ZONE_MULTIPLIERS["USPS"]
+# Business days added per zone: ground services (3+ days at zone 4) and express ones
+GROUND_TRANSIT = (0, 0, -2, -1, 0, 1, 1, 2, 2, 4)
+EXPRESS_TRANSIT = (0, 0, 0, 0, 0, 0, 0, 0, 0, 1)
+
+ALL_HOLIDAYS = (
+    "new_year", "mlk", "presidents", "memorial", "juneteenth", "independence", "labor", "columbus", "veterans",
+    "thanksgiving", "christmas",
+)
+# The private carriers close on the six big holidays only
+CARRIER_HOLIDAYS = {
+    "USPS": ALL_HOLIDAYS,
+    "UPS": ("new_year", "memorial", "independence", "labor", "thanksgiving", "christmas"),
+    "FEDEX": ("new_year", "memorial", "independence", "labor", "thanksgiving", "christmas"),
+}
+
+
+def zip_prefix(zip_code):
+    """3-digit prefix of a 5-digit (or ZIP+4) code, or None if it isn't one"""
+    match = ZIP_RE.match(str(zip_code).strip())
+    return int(match.group(1)) if match else None
+
+
+def _miles(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 3959 * 2 * math.asin(math.sqrt(h))
+
+
+def build_zone_table(origin_zip):
+    """array('B') of the zone of every 3-digit ZIP prefix, seen from ``origin_zip``"""
+    origin = zip_prefix(origin_zip)
+    if origin is None:
+        raise ValueError(f"Invalid origin ZIP code {origin_zip!r}")
+    origin_area = AREA_CENTROIDS[origin // 100]
+    area_zones = []
+    for centroid in AREA_CENTROIDS:
+        miles = _miles(origin_area, centroid)
+        area_zones.append(next((zone for limit, zone in ZONE_BANDS if miles <= limit), 8))
+
+    zones = array("B", bytes(1000))
+    for prefix in range(1000):
+        # Zone 2 is the warehouse's own prefix, the rest of its area is zone 3
+        zones[prefix] = 2 if prefix == origin else max(3, area_zones[prefix // 100])
+    for prefix in NONCONTIGUOUS_PREFIXES:
+        zones[prefix] = NONCONTIGUOUS_ZONE
+    for prefix in UNASSIGNED_PREFIXES:
+        zones[prefix] = UNKNOWN_ZONE
+    return zones
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th ``weekday`` (0 = Monday) of a month; n = -1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Fixed-date holidays on a weekend are observed on the Friday before or Monday after"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def us_holidays(year):
+    """``{name: observed date}`` of the US federal holidays of a year"""
+    return {
+        "new_year": _observed(date(year, 1, 1)),
+        "mlk": _nth_weekday(year, 1, 0, 3),
+        "presidents": _nth_weekday(year, 2, 0, 3),
+        "memorial": _nth_weekday(year, 5, 0, -1),
+        "juneteenth": _observed(date(year, 6, 19)),
+        "independence": _observed(date(year, 7, 4)),
+        "labor": _nth_weekday(year, 9, 0, 1),
+        "columbus": _nth_weekday(year, 10, 0, 2),
+        "veterans": _observed(date(year, 11, 11)),
+        "thanksgiving": _nth_weekday(year, 11, 3, 4),
+        "christmas": _observed(date(year, 12, 25)),
+    }
+
+
+class BusinessCalendar:
+    """A carrier's business days over a fixed window, with O(1) business-day arithmetic"""
+
+    def __init__(self, holidays, start, days=CALENDAR_DAYS):
+        self.start = start.toordinal()
+        closed = {
+            day.toordinal()
+            for year in range(start.year - 1, (start + timedelta(days=days)).year + 2)
+            for name, day in us_holidays(year).items() if name in holidays
+        }
+        # business: ordinals of the business days; next_business[offset]: index into
+        # business of the first business day on or after start + offset
+        self.business = array("l")
+        self.next_business = array("l")
+        for ordinal in range(self.start, self.start + days):
+            self.next_business.append(len(self.business))
+            if date.fromordinal(ordinal).weekday() < 5 and ordinal not in closed:
+                self.business.append(ordinal)
+        self.iso = [date.fromordinal(ordinal).isoformat() for ordinal in self.business]
+
+    def covers(self, day):
+        return 0 <= day.toordinal() - self.start < len(self.next_business)
+
+    def index_of(self, day):
+        """Index of the first business day on or after ``day`` (the day it ships)"""
+        return self.next_business[day.toordinal() - self.start]
+
+    def add_business_days(self, day, count):
+        """Date ``count`` business days after the day something ships on ``day``, or None past the window"""
+        if not self.covers(day):
+            return None
+        index = self.next_business[day.toordinal() - self.start] + count
+        return date.fromordinal(self.business[index]) if index < len(self.business) else None
+
+
+class RateEngine:
+    """Quotes for every shipping option from precomputed zone, rate, transit and calendar tables"""
+
+    def __init__(self, options, origin_zip=DEFAULT_ORIGIN_ZIP, start=None):
+        start = start or date.today() - timedelta(days=CALENDAR_LOOKBACK)
+        self.origin_zip = origin_zip
+        self.zones = build_zone_table(origin_zip)
+        self.methods = list(options)
+        self.options = options
+        self.costs = {}
+        self.transit = {}
+        self.calendars = {}
+        calendars_by_carrier = {}
+        for method, option in options.items():
+            carrier = (option.get('carrier') or "").upper()
+            multipliers = ZONE_MULTIPLIERS.get(carrier, DEFAULT_MULTIPLIERS)
+            adjust = GROUND_TRANSIT if option['days'] >= 3 else EXPRESS_TRANSIT
+            self.costs[method] = tuple(round(option['cost'] * multiplier, 2) for multiplier in multipliers)
+            self.transit[method] = tuple(max(1, option['days'] + days) for days in adjust)
+            if carrier not in calendars_by_carrier:
+                holidays = CARRIER_HOLIDAYS.get(carrier, ALL_HOLIDAYS)
+                calendars_by_carrier[carrier] = BusinessCalendar(holidays, start)
+            self.calendars[method] = calendars_by_carrier[carrier]
+
+    def covers(self, day):
+        return all(calendar.covers(day) for calendar in self.calendars.values())
+
+    def zone(self, zip_code):
+        """Zone of a ZIP code, or None for an invalid or unassigned one"""
+        prefix = zip_prefix(zip_code)
+        if prefix is None:
+            return None
+        return self.zones[prefix] or None
+
+    def _quote(self, zip_code, zone, method, ship_index):
+        option = self.options[method]
+        days = self.transit[method][zone]
+        calendar = self.calendars[method]
+        index = ship_index[method] + days
+        return {
+            "zip_code": zip_code,
+            "zone": zone,
+            "method": method,
+            "carrier": option['carrier'],
+            "cost": self.costs[method][zone],
+            "days": days,
+            "delivery_date": calendar.iso[index] if index < len(calendar.iso) else None,
+            "description": option['description'],
+        }
+
+    def _ship_index(self, ship_date):
+        ship_date = ship_date or date.today()
+        if not self.covers(ship_date):
+            raise ValueError(f"Ship date {ship_date} is outside the rate calendar")
+        return {method: calendar.index_of(ship_date) for method, calendar in self.calendars.items()}
+
+    def quote(self, zip_code, method, ship_date=None):
+        """Quote of one method to one ZIP code, or None if the ZIP code or method is unknown"""
+        method = method.lower()
+        zone = self.zone(zip_code)
+        if zone is None or method not in self.options:
+            return None
+        return self._quote(str(zip_code).strip(), zone, method, self._ship_index(ship_date))
+
+    def quote_many(self, zip_codes, methods=None, ship_date=None):
+        """Quotes of ``methods`` (default: all) to every ZIP code, ZIP by ZIP; ``{zip_code, error}`` for bad ones"""
+        methods = [method.lower() for method in methods] if methods else self.methods
+        unknown = [method for method in methods if method not in self.options]
+        if unknown:
+            raise ValueError(f"Unknown shipping methods: {', '.join(unknown)}")
+        ship_index = self._ship_index(ship_date)
+        quotes = []
+        for zip_code in zip_codes:
+            zip_code = str(zip_code).strip()
+            zone = self.zone(zip_code)
+            if zone is None:
+                quotes.append({"zip_code": zip_code, "error": "not a valid US ZIP code"})
+                continue
+            for method in methods:
+                quotes.append(self._quote(zip_code, zone, method, ship_index))
+        return quotes
+
+
+# (shipping data version, engine)
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_rate_engine():
+    """Process-wide engine, rebuilt when the shipping options change or the calendar runs short"""
+    global _engine
+    version = data_version("shipping")
+    engine = _engine
+    soon = date.today() + timedelta(days=60)
+    if engine is None or engine[0] != version or not engine[1].covers(soon):
+        with _engine_lock:
+            engine = _engine
+            if engine is None or engine[0] != version or not engine[1].covers(soon):
+                engine = _engine = (version, RateEngine(
+                    list_shipping_options(), os.environ.get("SHIPPING_ORIGIN_ZIP", DEFAULT_ORIGIN_ZIP)
+                ))
+    return engine[1]
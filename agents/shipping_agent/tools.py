@@ -0,0 +1,140 @@
+# Shipping agent tools (importable without the ADK agent stack)
+#
+# Tools build compact dicts; agents.common.presentation renders them as text
+# unless TOOL_OUTPUT=json.
+from agents.common.batch import batch_items
+from agents.common.presentation import presented, table
+from agents.common.tool_cache import cached_tool
+from agents.shipping_agent.rates import get_rate_engine
+from mock_data.sample_data import (
+    find_tracking_numbers, get_package_history, get_shipping_option, list_shipping_options,
+    suggest_tracking_numbers, track_package as find_package, track_packages as find_packages,
+)
+
+FREE_SHIPPING_MINIMUM = 35.00
+PACKAGE_PAGE_SIZE = 20
+
+
+@presented("shipping_estimate")
+@cached_tool(ttl=60, depends_on=("shipping",))
+def get_shipping_estimates(zip_code: str, shipping_method: str = "standard") -> dict:
+    """Get shipping cost and delivery estimates"""
+    method = get_shipping_option(shipping_method)
+
+    if not method:
+        return {
+            "error": f"Shipping method '{shipping_method}' not available.",
+            "methods": list(list_shipping_options()),
+        }
+
+    quote = get_rate_engine().quote(zip_code, shipping_method)
+    if quote is None:
+        return {
+            "error": f"'{zip_code}' is not a valid US ZIP code.",
+            "methods": list(list_shipping_options()),
+        }
+    return quote
+
+# Lists aren't hashable, so batch tools skip the result cache; a quote is a few table lookups anyway
+@presented("shipping_quotes")
+def get_shipping_quotes(zip_codes: list[str]) -> dict:
+    """Quote every shipping method to several ZIP codes at once (cost, business days, delivery date)"""
+    zip_codes, skipped = batch_items(zip_codes)
+    if not zip_codes:
+        return {"error": "No ZIP codes given."}
+    quotes = []
+    for quote in get_rate_engine().quote_many(zip_codes):
+        quote.pop("description", None)
+        quotes.append(quote)
+    data = {"quotes": table(quotes)}
+    if skipped:
+        data["skipped"] = skipped
+    return data
+
+@presented("package")
+@cached_tool(ttl=30, depends_on=("tracking",))
+def track_package(tracking_number: str) -> dict:
+    """Track a package using tracking number"""
+    package = find_package(tracking_number)
+
+    if not package:
+        data = {
+            "error": f"Tracking number '{tracking_number}' not found.",
+            "hint": "Please verify your tracking number or contact support.",
+        }
+        suggestions = suggest_tracking_numbers(tracking_number)
+        if suggestions:
+            data["suggestions"] = suggestions
+        return data
+    data = {"tracking_number": tracking_number.strip().upper(), **package}
+    history = get_package_history(tracking_number)
+    if len(history) > 1:
+        data["history"] = table([
+            {"timestamp": timestamp, "status": status, "location": location} for timestamp, status, location in history
+        ])
+    return data
+
+# Lists aren't hashable, so batch tools skip the result cache; they're a single lookup pass anyway
+@presented("packages")
+def track_packages(tracking_numbers: list[str]) -> dict:
+    """Track several packages at once (e.g. all of a customer's orders)"""
+    numbers, skipped = batch_items(tracking_numbers, key=lambda number: number.strip().upper())
+    if not numbers:
+        return {"error": "No tracking numbers given."}
+    packages = find_packages(numbers)
+
+    items = []
+    for number in numbers:
+        package = packages.get(number)
+        if not package:
+            items.append({"tracking_number": number, "error": "not found"})
+            continue
+        items.append({
+            "tracking_number": number,
+            "status": package['status'],
+            "location": package['location'],
+            "carrier": package['carrier'],
+            "estimated_delivery": package.get('estimated_delivery'),
+        })
+    data = {"items": table(items)}
+    if skipped:
+        data["skipped"] = skipped
+    return data
+
+@presented("package_list")
+@cached_tool(ttl=30, maxsize=64, depends_on=("tracking",))
+def list_packages(status: str = "", carrier: str = "", page: int = 1) -> dict:
+    """List packages with a status (processing, in_transit, delivered, ...) and/or carrier, paged"""
+    if not status.strip() and not carrier.strip():
+        return {"error": "Give a package status or a carrier to list packages for."}
+    numbers = find_tracking_numbers(status or None, carrier or None)
+    data = {"status": status.strip().lower() or None, "carrier": carrier.strip() or None, "total": len(numbers)}
+    if not numbers:
+        return data
+    pages = (len(numbers) + PACKAGE_PAGE_SIZE - 1) // PACKAGE_PAGE_SIZE
+    page = min(max(1, page), pages)
+    packages = find_packages(numbers[(page - 1) * PACKAGE_PAGE_SIZE:page * PACKAGE_PAGE_SIZE])
+    data.update(page=page, pages=pages, items=table([
+        {
+            "tracking_number": number,
+            "status": package['status'],
+            "location": package['location'],
+            "carrier": package['carrier'],
+            "estimated_delivery": package.get('estimated_delivery'),
+        }
+        for number, package in packages.items()
+    ]))
+    return data
+
+@presented("shipping_options")
+@cached_tool(ttl=3600, maxsize=1, depends_on=("shipping",))
+def get_shipping_options() -> dict:
+    """Get all available shipping options"""
+    return {"options": table([{"method": method, **details} for method, details in list_shipping_options().items()])}
+
+@presented("free_shipping")
+def calculate_free_shipping_eligibility(order_total: float) -> dict:
+    """Check if order qualifies for free shipping"""
+    if order_total >= FREE_SHIPPING_MINIMUM:
+        return {"order_total": order_total, "qualifies": True}
+    return {"order_total": order_total, "qualifies": False, "needed": round(FREE_SHIPPING_MINIMUM - order_total, 2)}
@@ -0,0 +1,85 @@
+# Propagation latency of the change bus between processes
+#
+#   python -m benchmarks.change_bus [--subscribers 3] [--events 20000] [--rate 2000]
+#
+# Runs a bus on a temporary socket, starts --subscribers processes (one per
+# specialist agent by default) whose clients record how long each change took
+# from publish() to being handed to them, and publishes --events inventory
+# changes at --rate per second from this process. Applying a change to a store
+# is a dict update on top of this, so this is what "within milliseconds" rests on.
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from mock_data.change_bus import ChangeBusClient, serve_in_thread
+
+
+def subscriber(path, events, ready, results):
+    latencies = []
+
+    def record(event):
+        latencies.append(time.time() - event["sent_at"])
+
+    client = ChangeBusClient(path, apply=record, reload=None, publish_local=False).start()
+    client.connected.wait(5)
+    ready.put(os.getpid())
+    deadline = time.monotonic() + 120
+    while len(latencies) < events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client.close()
+    results.put(latencies)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Change bus propagation latency")
+    parser.add_argument("--subscribers", type=int, default=3)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--rate", type=float, default=2000, help="changes published per second")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "bus.sock")
+    server = serve_in_thread(path, backlog=args.events)
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=subscriber, args=(path, args.events, ready, results))
+        for _ in range(args.subscribers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=30)
+
+    publisher = ChangeBusClient(path, apply=lambda event: None, reload=None, publish_local=False).start()
+    publisher.connected.wait(5)
+    interval = 1 / args.rate
+    started = time.perf_counter()
+    for number in range(args.events):
+        # Paced, so the latency measured is the bus's and not a queue building up
+        ahead = number * interval - (time.perf_counter() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+        publisher.publish("inventory", number % 1000, {"delta": {"reserved": 1}, "set": {"daily_sales": 1.5}})
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _ in processes for latency in results.get(timeout=120))
+    for process in processes:
+        process.join()
+    publisher.close()
+    server.close()
+
+    delivered = len(latencies)
+    print(f"📣 {args.events:,} changes published in {elapsed:.2f}s ({args.events / elapsed:,.0f}/s) "
+          f"to {args.subscribers} subscriber processes, {delivered:,} deliveries")
+    print(f"⏱️  Publish to subscriber: median {1000 * statistics.median(latencies):.2f} ms, "
+          f"p99 {1000 * percentile(latencies, 0.99):.2f} ms, max {1000 * latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
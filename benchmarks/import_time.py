@@ -0,0 +1,99 @@
+# Import-time report per agent module
+#
+#   python benchmarks/import_time.py [--build] [--top 10]
+#
+# Each module is imported in a fresh interpreter under ``python -X importtime``
+# so earlier imports don't hide its cost. The report shows the cumulative
+# import time of every agent and tool module, the heaviest packages it pulls
+# in, and with --build also the time to build the agent / A2A app / runner
+# through its factory functions.
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "agents.product_catalog_agent.tools",
+    "agents.inventory_agent.tools",
+    "agents.shipping_agent.tools",
+    "agents.product_catalog_agent.agent",
+    "agents.inventory_agent.agent",
+    "agents.shipping_agent.agent",
+    "agents.customer_support_agent.agent",
+]
+
+# module -> statement that builds its heavy objects
+BUILDS = {
+    "agents.product_catalog_agent.agent": "module.get_app()",
+    "agents.inventory_agent.agent": "module.get_app()",
+    "agents.shipping_agent.agent": "module.get_app()",
+    "agents.customer_support_agent.agent": "module.get_runner()",
+}
+
+
+def import_times(module):
+    """{imported module: (self_us, cumulative_us)} from ``-X importtime`` for one fresh import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "x")},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def build_time(module, statement):
+    """Seconds spent building an already imported module's agent/app"""
+    code = (
+        "import importlib, time\n"
+        f"module = importlib.import_module({module!r})\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - started)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "x")},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"building {module} failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def heaviest_packages(times, top):
+    """Top-level packages by cumulative import time"""
+    packages = {}
+    for name, (_, cumulative_us) in times.items():
+        if "." not in name:
+            packages[name] = max(packages.get(name, 0), cumulative_us)
+    return sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time per agent module")
+    parser.add_argument("--build", action="store_true", help="also time building agents/apps via their factories")
+    parser.add_argument("--top", type=int, default=5, help="heaviest packages to list per module")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<40} {'import ms':>10}" + (f" {'build ms':>10}" if args.build else ""))
+    for module in MODULES:
+        times = import_times(module)
+        cumulative_ms = times.get(module, (0, 0))[1] / 1000
+        line = f"{module:<40} {cumulative_ms:>10.1f}"
+        if args.build and module in BUILDS:
+            line += f" {1000 * build_time(module, BUILDS[module]):>10.1f}"
+        print(line)
+        for package, cumulative_us in heaviest_packages(times, args.top):
+            print(f"    {package:<36} {cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
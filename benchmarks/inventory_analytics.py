@@ -0,0 +1,92 @@
+# Timing of the vectorized inventory analytics on a synthetic inventory
+#
+#   python -m benchmarks.inventory_analytics [--skus 1000000] [--repeat 5]
+#
+# Fills an in-memory store with --skus inventory rows (stock, reserved, reorder
+# level, sales velocity, restock dates and a stored status that's sometimes
+# stale), then times each step of agents.inventory_agent.analytics. The catalog
+# side (category and brand of each product) is generated as columns instead of
+# indexing a million product records, which isn't what's being measured here.
+import argparse
+import random
+import time
+
+from agents.inventory_agent import analytics
+from mock_data.store import InMemoryStore
+
+BRANDS = ["Apple", "Samsung", "Sony", "Google", "Lenovo", "Dell", "Bose", "LG", "Asus", "Acer"]
+CATEGORIES = ["Smartphone", "Laptop", "Tablet", "Headphones", "Monitor", "Camera", "Speaker", "Watch"]
+STATUSES = ["in_stock", "low_stock", "out_of_stock"]
+
+
+class SyntheticStore(InMemoryStore):
+    """In-memory store whose product labels are generated from the product id"""
+
+    def __init__(self, inventory):
+        super().__init__({}, inventory, {}, {})
+
+    def product_columns(self, fields):
+        ids = self.inventory.product_ids
+        labels = {"brand": BRANDS, "category": CATEGORIES}
+        return {"id": ids, **{name: [labels[name][i % len(labels[name])] for i in ids] for name in fields}}
+
+
+def build_inventory(skus, seed=7):
+    rng = random.Random(seed)
+    dates = [f"2024-12-{day:02d}" for day in range(1, 29)] + [None]
+    inventory = {}
+    for product_id in range(1, skus + 1):
+        stock = rng.randrange(0, 500)
+        reserved = rng.randrange(0, stock + 1) // 4
+        inventory[product_id] = {
+            "stock": stock,
+            "reserved": reserved,
+            "reorder_level": rng.randrange(5, 60),
+            "next_restock": rng.choice(dates),
+            "status": rng.choice(STATUSES),
+            "daily_sales": round(rng.random() * 12, 2) if rng.random() < 0.9 else 0.0,
+        }
+    return inventory
+
+
+def timed(label, func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<32} {1000 * best:>8.1f} ms")
+    return result, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the vectorized inventory analytics")
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per step, the fastest is reported")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    store = SyntheticStore(build_inventory(args.skus))
+    print(f"🏗️  Built {args.skus:,} SKUs in {time.perf_counter() - started:.1f}s\n")
+    # Group labels are cached per catalog version, like in the running agent
+    for field in ("category", "brand"):
+        analytics.snapshot(store).summary(by=field)
+
+    snap, snapshot_time = timed("snapshot (copy the columns)", lambda: analytics.snapshot(store), args.repeat)
+    _, status_time = timed("derive every status", snap.derived_statuses, args.repeat)
+    _, cover_time = timed("days of cover + stockout dates", lambda: snap.stockout_dates(), args.repeat)
+    forecast, forecast_time = timed("reorder forecast (top 10)", lambda: snap.forecast(limit=10), args.repeat)
+    _, category_time = timed("summary by category", lambda: snap.summary(by="category"), args.repeat)
+    _, brand_time = timed("summary by brand", lambda: snap.summary(by="brand"), args.repeat)
+    recompute, recompute_time = timed(
+        "recompute statuses (dry run)", lambda: analytics.recompute_statuses(store), args.repeat
+    )
+
+    total = snapshot_time + status_time + forecast_time + category_time + brand_time
+    print(f"\n⏱️  Snapshot, statuses, forecast and both summaries: {1000 * total:.0f} ms for {args.skus:,} SKUs")
+    print(f"📉 {forecast['at_risk']:,} SKUs run out before their next restock")
+    print(f"🔄 {recompute['changed']:,} stored statuses differ from the derived ones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+# Offline load test: the coordinator and the real A2A specialist apps on a stub model
+#
+#   python -m benchmarks.load_test [--users 16] [--turns 5] [--scenario mixed]
+#                                  [--latency 150] [--jitter 0.25] [--fast-path] [--no-parallel]
+#                                  [--output results.json]
+#
+# Every LlmAgent gets StubLlm instead of Gemini. After --latency ms (give or take
+# --jitter, always the same for the same prompt) it makes the tool call or agent
+# transfer a model would make for the question, then answers with the tool
+# result. The specialist apps from agents/*/agent.py are started on their usual
+# ports with the stub swapped in (the ``serve`` subcommand), and --users concurrent
+# users each ask --turns questions of a scenario through respond(), i.e. the
+# coordinator's runner.run_async (composite order questions fan out to the
+# specialists unless --no-parallel; the fast path is off unless --fast-path).
+#
+# Prints turns per second, latency percentiles per scenario and the resident
+# memory of each process. Needs no API key and no network.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+import warnings
+import zlib
+from collections import namedtuple
+from typing import AsyncGenerator
+from urllib.parse import urlparse
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from agents.common.supervisor import AgentSpec, Supervisor
+from agents.common.tracing import percentile
+from agents.customer_support_agent.fast_path import (
+    RESTOCK_WORDS, SHIPPING_WORDS, STOCK_WORDS, TRACKING_RE, WORD_RE, ZIP_RE,
+)
+from mock_data.sample_data import find_products_in_text, list_shipping_options
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "product": [
+        "Tell me about the MacBook Pro",
+        "What are the specs of the iPhone 15 Pro?",
+        "Compare the iPhone 15 Pro and the Samsung Galaxy S24",
+        "Show me Apple products",
+        "What categories do you have?",
+    ],
+    "stock": [
+        "Is the iPhone 15 Pro in stock?",
+        "When will the iPad Air be restocked?",
+        "Are the iPhone 15 Pro, iPad Air and Sony WH-1000XM5 in stock?",
+        "Which items are running low?",
+    ],
+    "tracking": [
+        "Where is my package TRK123456789?",
+        "Track TRK987654321 please",
+        "What's the status of TRK123456789 and TRK456789123?",
+        "How much is overnight shipping to 94105?",
+        "What shipping options do you have?",
+    ],
+    "order": [
+        "I want to buy the Samsung Galaxy S24 - tell me price, stock, and shipping to 94105",
+        "What does the iPad Air cost and is it in stock?",
+        "I'd like to order the MacBook Pro, can it be delivered to 10001?",
+    ],
+}
+# Users per scenario in a mixed run, in this ratio
+MIX = {"product": 3, "stock": 3, "tracking": 3, "order": 1}
+
+# Words left out when the stub picks a catalog search term
+SEARCH_STOPWORDS = {"show", "me", "products", "product", "do", "you", "sell", "have", "any", "what", "the",
+                    "a", "an", "i", "need", "some", "looking", "for", "find", "items"}
+
+# Answers that came back, but with a specialist missing (see respond())
+UNAVAILABLE_MARK = "unavailable ("
+
+Turn = namedtuple("Turn", "scenario latency first_chunk error")
+
+
+def last_question(llm_request):
+    """The customer's latest question (ADK hands other agents' turns on as quoted "For context:" user parts)"""
+    for content in reversed(llm_request.contents):
+        if content.role != "user":
+            continue
+        for part in reversed(content.parts or ()):
+            if part.text and not part.text.startswith(("For context:", "[")):
+                return part.text
+    return ""
+
+
+def transfer_target(text):
+    """Specialist the coordinator hands a question to"""
+    words = set(WORD_RE.findall(text.lower()))
+    if TRACKING_RE.search(text) or ZIP_RE.search(text) or words & SHIPPING_WORDS:
+        return "shipping_agent"
+    if words & (STOCK_WORDS | RESTOCK_WORDS | {"low"}):
+        return "inventory_agent"
+    return "product_catalog_agent"
+
+
+def tool_call(agent, text):
+    """(tool name, args) the specialist's model would call for the question"""
+    words = set(WORD_RE.findall(text.lower()))
+    if agent == "shipping_agent":
+        numbers = sorted({number.upper() for number in TRACKING_RE.findall(text)})
+        if len(numbers) > 1:
+            return "track_packages", {"tracking_numbers": numbers}
+        if numbers:
+            return "track_package", {"tracking_number": numbers[0]}
+        zip_codes = ZIP_RE.findall(text)
+        if zip_codes:
+            methods = [method for method in list_shipping_options() if method in words]
+            return "get_shipping_estimates", {"zip_code": zip_codes[0], "shipping_method": (methods or ["standard"])[0]}
+        return "get_shipping_options", {}
+
+    names = [product['name'] for product in find_products_in_text(text)]
+    if agent == "inventory_agent":
+        if len(names) > 1:
+            return "check_stock_levels", {"product_names": names}
+        if names and words & RESTOCK_WORDS:
+            return "check_restock_schedule", {"product_name": names[0]}
+        if names:
+            return "check_stock_level", {"product_name": names[0]}
+        return "get_low_stock_items", {}
+
+    if len(names) > 1:
+        return "get_products_details", {"product_names": names}
+    if names:
+        return "get_product_details", {"product_name": names[0]}
+    terms = [word for word in WORD_RE.findall(text.lower()) if word not in SEARCH_STOPWORDS]
+    if "categories" in words or not terms:
+        return "list_categories", {}
+    return "search_products_tool", {"query": terms[-1]}
+
+
+class StubLlm(BaseLlm):
+    """Deterministic stand-in for Gemini: fixed latency, canned tool calls, echoes tool results"""
+
+    agent: str = ""
+    latency: float = 0.15
+    jitter: float = 0.25
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        prompt = "".join(
+            part.text or str(part.function_response.response if part.function_response else "")
+            for content in llm_request.contents for part in content.parts or ()
+        )
+        # Same prompt, same delay: runs are repeatable
+        spread = zlib.crc32(prompt.encode()) / 0xFFFFFFFF * 2 - 1
+        await asyncio.sleep(max(0.0, self.latency * (1 + self.jitter * spread)))
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=len(prompt) // 4, candidates_token_count=16, total_token_count=len(prompt) // 4 + 16,
+        )
+
+        last = llm_request.contents[-1].parts[0] if llm_request.contents and llm_request.contents[-1].parts else None
+        if last is not None and last.function_response:
+            response = last.function_response.response or {}
+            text = response.get("result") if isinstance(response.get("result"), str) else json.dumps(response, ensure_ascii=False)
+            async for chunk in self._reply(text, stream, usage):
+                yield chunk
+            return
+
+        text = last_question(llm_request)
+        if "transfer_to_agent" in llm_request.tools_dict:
+            call = types.FunctionCall(name="transfer_to_agent", args={"agent_name": transfer_target(text)})
+        else:
+            name, args = tool_call(self.agent, text)
+            call = types.FunctionCall(name=name, args=args) if name in llm_request.tools_dict else None
+        if call is None:
+            async for chunk in self._reply("How can I help?", stream, usage):
+                yield chunk
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]), usage_metadata=usage)
+
+    async def _reply(self, text, stream, usage):
+        if stream:
+            # A few partial chunks, then the full text, like SSE streaming
+            step = max(1, len(text) // 3)
+            for start in range(0, len(text), step):
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text[start:start + step])]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), usage_metadata=usage)
+
+
+def stub_model(agent, latency_ms, jitter):
+    return StubLlm(model="stub", agent=agent, latency=latency_ms / 1000, jitter=jitter)
+
+
+def serve(agent_name, latency_ms, jitter):
+    """Run one specialist's A2A app with the stub model (child process of the load test)"""
+    import importlib
+
+    import uvicorn
+
+    module = importlib.import_module(f"agents.{agent_name}.agent")
+    agent = module.create_agent()
+    agent.model = stub_model(agent_name, latency_ms, jitter)
+    uvicorn.run(module.create_app(agent), host="127.0.0.1", port=module.PORT, log_level="warning")
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(description="Serve one specialist with the stub model")
+    parser.add_argument("agent")
+    parser.add_argument("--latency", type=float, default=150.0)
+    parser.add_argument("--jitter", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    serve(args.agent, args.latency, args.jitter)
+
+
+def memory_mb(pid):
+    """(resident, peak resident) memory of a process in MB, from /proc (None off Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def port_in_use(port):
+    with socket.socket() as probe:
+        return probe.connect_ex(("127.0.0.1", port)) == 0
+
+
+async def run_user(index, scenario, turns, seed, runner, fast_path, parallel, results):
+    """One user: a session asking ``turns`` questions of a scenario, one after the other"""
+    from agents.customer_support_agent.agent import respond
+
+    rng = random.Random(seed + index)
+    session_id = f"load_{seed}_{index}"
+    for _ in range(turns):
+        query = rng.choice(SCENARIOS[scenario])
+        started = time.perf_counter()
+        first_chunk = None
+        chunks = []
+        error = None
+        try:
+            async for chunk in respond(runner, query, session_id, f"load_user_{index}", fast_path, parallel):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                chunks.append(chunk)
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+        answer = "".join(chunks)
+        if error is None and (not answer.strip() or UNAVAILABLE_MARK in answer):
+            error = answer.strip() or "empty answer"
+        results.append(Turn(scenario, time.perf_counter() - started, first_chunk, error))
+
+
+def summary(turns):
+    latencies = sorted(turn.latency * 1000 for turn in turns)
+    first_chunks = sorted(turn.first_chunk * 1000 for turn in turns if turn.first_chunk is not None)
+    return {
+        "turns": len(turns),
+        "errors": sum(1 for turn in turns if turn.error),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies, default=0.0),
+        "first_chunk_p50_ms": percentile(first_chunks, 0.50),
+    }
+
+
+async def drive(args, assignments):
+    from agents.customer_support_agent.agent import get_runner
+
+    runner = get_runner()
+    # Warm up (stores, agent cards, connections) outside the measurement
+    warmup = []
+    await asyncio.gather(*(
+        run_user(-1 - position, scenario, 1, args.seed, runner, args.fast_path, args.parallel, warmup)
+        for position, scenario in enumerate(sorted(set(assignments)))
+    ))
+    results = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_user(index, scenario, args.turns, args.seed, runner, args.fast_path, args.parallel, results)
+        for index, scenario in enumerate(assignments)
+    ))
+    return results, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test with a stub model and local A2A servers")
+    parser.add_argument("--users", type=int, default=16, help="concurrent users (one session each)")
+    parser.add_argument("--turns", type=int, default=5, help="questions per user")
+    parser.add_argument("--scenario", choices=["mixed", *SCENARIOS], default="mixed")
+    parser.add_argument("--latency", type=float, default=150.0, help="stub model latency per call in ms")
+    parser.add_argument("--jitter", type=float, default=0.25, help="latency spread, as a fraction of --latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fast-path", action="store_true", help="let the fast path answer simple questions")
+    parser.add_argument("--no-parallel", dest="parallel", action="store_false", help="don't fan order questions out")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Gemini objects are still constructed (then replaced), but never called
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-load-test")
+    os.environ.setdefault("PYTHONWARNINGS", "ignore::UserWarning")
+    warnings.simplefilter("ignore", UserWarning)
+
+    from agents.customer_support_agent.agent import REMOTE_AGENTS, get_agent, get_fanout_runners
+
+    ports = {name: urlparse(card_url).port for name, (card_url, _) in REMOTE_AGENTS.items()}
+    busy = [f"{name} ({port})" for name, port in ports.items() if port_in_use(port)]
+    if busy:
+        sys.exit(f"❌ Ports already in use: {', '.join(busy)}. Stop the running agents first.")
+
+    stub_args = ["--latency", str(args.latency), "--jitter", str(args.jitter)]
+    supervisor = Supervisor(
+        [AgentSpec(name, [sys.executable, "-m", "benchmarks.load_test", "serve", name, *stub_args], port, cwd=ROOT)
+         for name, port in ports.items()],
+        ready_timeout=float(os.environ.get("AGENT_READY_TIMEOUT", 60)), max_restarts=0,
+    )
+    print(f"🚀 Starting {len(ports)} specialist agents with a {args.latency:g} ms stub model...")
+    supervisor.start()
+    try:
+        supervisor.wait_ready()
+        supervisor.report()
+        get_agent().model = stub_model("customer_support_agent", args.latency, args.jitter)
+        get_fanout_runners()
+
+        if args.scenario == "mixed":
+            cycle = [scenario for scenario, share in MIX.items() for _ in range(share)]
+        else:
+            cycle = [args.scenario]
+        assignments = [cycle[index % len(cycle)] for index in range(args.users)]
+        print(f"🏋️ {args.users} users x {args.turns} turns ({args.scenario})...")
+        results, elapsed = asyncio.run(drive(args, assignments))
+
+        memory = {"customer_support_agent (driver)": memory_mb(os.getpid())}
+        for name, agent in supervisor.agents.items():
+            memory[name] = memory_mb(agent.process.pid) if agent.process else None
+    finally:
+        supervisor.shutdown()
+
+    overall = summary(results)
+    print(f"\n🏁 {overall['turns']} turns in {elapsed:.2f}s: {overall['turns'] / elapsed:.1f} turns/s, "
+          f"{overall['errors']} errors")
+    print(f"{'scenario':<12} {'turns':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'1st chunk':>10} {'errors':>6}")
+    by_scenario = {scenario: summary([turn for turn in results if turn.scenario == scenario])
+                   for scenario in dict.fromkeys(assignments)}
+    for scenario, stats in [*by_scenario.items(), ("all", overall)]:
+        print(f"{scenario:<12} {stats['turns']:>6} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+              f"{stats['max_ms']:>8.1f} {stats['first_chunk_p50_ms']:>10.1f} {stats['errors']:>6}")
+    errors = [turn.error for turn in results if turn.error]
+    if errors:
+        print(f"⚠️ First error: {errors[0][:200]}")
+
+    print(f"\n{'process':<34} {'rss MB':>8} {'peak MB':>8}")
+    for name, usage in memory.items():
+        if usage is None:
+            print(f"{name:<34} {'n/a':>8} {'n/a':>8}")
+        else:
+            print(f"{name:<34} {usage[0]:>8.1f} {usage[1]:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "config": vars(args), "elapsed_s": elapsed, "turns_per_s": overall["turns"] / elapsed,
+                "overall": overall, "scenarios": by_scenario,
+                "memory_mb": {name: dict(zip(("rss", "peak"), usage)) if usage else None for name, usage in memory.items()},
+            }, file, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+    else:
+        sys.exit(main())
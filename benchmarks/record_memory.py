@@ -0,0 +1,132 @@
+# Memory of catalog, inventory and tracking rows: plain dicts vs compact records
+#
+#   python -m benchmarks.record_memory [--rows 200000]
+#
+# Builds --rows products, inventory rows and tracking entries in two layouts and
+# measures what each one keeps allocated, with tracemalloc:
+#   dicts    - the MOCK_* layout, one dict per row
+#   records  - ProductRecord / PackageRecord (slots, interned strings) and
+#              InventoryTable (array columns), as the in-memory store holds them
+# Rows are parsed from text lines, so every string is a fresh object, as it is
+# after loading a CSV or JSONL file. It also times a scan that reads one field
+# of every row through the usual row['field'] access.
+import argparse
+import gc
+import time
+import tracemalloc
+
+from mock_data.records import InventoryTable, PackageRecord, ProductRecord
+
+BRANDS = ["Apple", "Samsung", "Sony", "Google", "Lenovo", "Dell", "Bose", "LG", "Asus", "Acer"]
+CATEGORIES = ["Smartphone", "Laptop", "Tablet", "Headphones", "Monitor", "Camera", "Speaker", "Watch"]
+FEATURES = ["5G", "Touch ID", "Face ID", "USB-C", "Wireless Charging", "Noise Canceling", "Bluetooth 5.3", "Wi-Fi 7"]
+STATUSES = ["in_stock", "in_stock", "in_stock", "low_stock", "out_of_stock"]
+PACKAGE_STATUSES = ["processing", "in_transit", "out_for_delivery", "delivered"]
+LOCATIONS = ["Warehouse", "Local distribution center", "Regional hub", "Customer's doorstep"]
+CARRIERS = ["UPS", "FedEx", "USPS", "DHL"]
+
+
+def product_lines(rows):
+    for i in range(1, rows + 1):
+        features = ";".join(FEATURES[(i + k) % len(FEATURES)] for k in range(3))
+        yield (f"{i}|Product {i}|{BRANDS[i % len(BRANDS)]}|{100 + i % 1900}.99|{CATEGORIES[i % len(CATEGORIES)]}|"
+               f"Model {i} with everything you need|{64 * (1 + i % 8)}GB, {i % 7 + 5}\" display|{features}")
+
+
+def inventory_lines(rows):
+    for i in range(1, rows + 1):
+        yield f"{i}|{(i * 37) % 900}|{i % 13}|{10 + i % 40}|2024-12-{1 + i % 28:02d}|{STATUSES[i % len(STATUSES)]}"
+
+
+def tracking_lines(rows):
+    for i in range(rows):
+        yield (f"TRK{100000000 + i}|{PACKAGE_STATUSES[i % 4]}|{LOCATIONS[i % 4]}|2024-11-{1 + i % 28:02d} "
+               f"{i % 24:02d}:{i % 60:02d}:00|2024-12-{1 + i % 28:02d}|{CARRIERS[i % 4]}")
+
+
+def product_fields(line):
+    pid, name, brand, price, category, description, specifications, features = line.split("|")
+    return {
+        "id": int(pid), "name": name, "brand": brand, "price": float(price), "category": category,
+        "description": description, "specifications": specifications, "features": features.split(";"),
+    }
+
+
+def inventory_fields(line):
+    pid, stock, reserved, reorder_level, next_restock, status = line.split("|")
+    return int(pid), {
+        "stock": int(stock), "reserved": int(reserved), "reorder_level": int(reorder_level),
+        "next_restock": next_restock, "status": status,
+    }
+
+
+def package_fields(line):
+    number, status, location, timestamp, estimated_delivery, carrier = line.split("|")
+    return number, {
+        "status": status, "location": location, "timestamp": timestamp,
+        "estimated_delivery": estimated_delivery, "carrier": carrier,
+    }
+
+
+LAYOUTS = {
+    "dicts": {
+        "products": lambda rows: {p["id"]: p for p in map(product_fields, product_lines(rows))},
+        "inventory": lambda rows: dict(map(inventory_fields, inventory_lines(rows))),
+        "tracking": lambda rows: dict(map(package_fields, tracking_lines(rows))),
+    },
+    "records": {
+        "products": lambda rows: {p["id"]: ProductRecord(**p) for p in map(product_fields, product_lines(rows))},
+        "inventory": lambda rows: InventoryTable(dict(map(inventory_fields, inventory_lines(rows)))),
+        "tracking": lambda rows: {
+            number: PackageRecord(**fields) for number, fields in map(package_fields, tracking_lines(rows))
+        },
+    },
+}
+SCANNED_FIELD = {"products": "price", "inventory": "stock", "tracking": "status"}
+
+
+def measure(build, rows):
+    """(bytes kept allocated, build seconds, the data)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    data = build(rows)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    kept = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, elapsed, data
+
+
+def scan(data, field):
+    """Seconds to read ``field`` of every row"""
+    started = time.perf_counter()
+    for _, row in data.items():
+        row[field]
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory of dict rows vs compact records")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows per table")
+    args = parser.parse_args(argv)
+
+    print(f"{'table':<10} {'layout':<8} {'MB':>8} {'bytes/row':>10} {'build s':>8} {'scan ms':>8}")
+    totals = {}
+    for table in ("products", "inventory", "tracking"):
+        for layout, builders in LAYOUTS.items():
+            kept, build_time, data = measure(builders[table], args.rows)
+            scan_time = scan(data, SCANNED_FIELD[table])
+            del data
+            totals[layout] = totals.get(layout, 0) + kept
+            print(f"{table:<10} {layout:<8} {kept / 2 ** 20:>8.1f} {kept / args.rows:>10.0f} "
+                  f"{build_time:>8.2f} {1000 * scan_time:>8.1f}")
+
+    saved = 1 - totals["records"] / totals["dicts"]
+    print(f"\nAll three tables, {args.rows:,} rows each: dicts {totals['dicts'] / 2 ** 20:.1f} MB, "
+          f"records {totals['records'] / 2 ** 20:.1f} MB ({saved:.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Contention benchmark for stock reservations
+#
+#   python -m benchmarks.reservation_contention [--threads 32] [--attempts 5000] [--skus 3] [--stock 1000]
+#
+# Many threads reserve (and then commit or release) units of a few hot SKUs at
+# once, on the in-memory and the SQLite backends. The run fails if any SKU ends
+# up oversold or its counters don't add up; otherwise it prints reservations per
+# second and how many attempts were turned away for lack of stock.
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from agents.inventory_agent.reservations import InsufficientStockError, create_reservations
+from mock_data.store import InMemoryStore, SQLiteStore
+
+
+def hot_inventory(skus, stock):
+    return {
+        product_id: {"stock": stock, "reserved": 0, "reorder_level": stock // 10, "next_restock": None, "status": "in_stock"}
+        for product_id in range(1, skus + 1)
+    }
+
+
+def make_store(backend, skus, stock, directory):
+    if backend == "memory":
+        return InMemoryStore({}, hot_inventory(skus, stock), {}, {})
+    store = SQLiteStore(os.path.join(directory, "reservations.db"))
+    for product_id, record in hot_inventory(skus, stock).items():
+        store.update_inventory(product_id, **record)
+    return store
+
+
+def run(backend, threads, attempts, skus, stock, directory):
+    store = make_store(backend, skus, stock, directory)
+    manager = create_reservations(store)
+    counts = {"reserved": 0, "committed": 0, "released": 0, "rejected": 0}
+    sold = {product_id: 0 for product_id in range(1, skus + 1)}
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = dict.fromkeys(counts, 0)
+        local_sold = dict.fromkeys(sold, 0)
+        start.wait()
+        for attempt in range(attempts // threads):
+            product_id = rng.randint(1, skus)
+            quantity = rng.randint(1, 3)
+            try:
+                reservation = manager.reserve(product_id, quantity, idempotency_key=f"{seed}-{attempt}")
+            except InsufficientStockError:
+                local["rejected"] += 1
+                continue
+            local["reserved"] += 1
+            if rng.random() < 0.7:
+                manager.commit(reservation.reservation_id)
+                local["committed"] += 1
+                local_sold[product_id] += quantity
+            else:
+                manager.release(reservation.reservation_id)
+                local["released"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+            for key, value in local_sold.items():
+                sold[key] += value
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    for product_id, units in sold.items():
+        record = store.get_inventory_status(product_id)
+        if record['stock'] < 0 or record['reserved'] != 0 or record['stock'] != stock - units:
+            raise AssertionError(f"{backend}: SKU {product_id} inconsistent: {record}, sold {units} of {stock}")
+    store.close()
+
+    operations = counts["reserved"] + counts["rejected"]
+    print(
+        f"{backend:<7} {operations / elapsed:>10.0f} reserve/s  "
+        f"{counts['reserved']} reserved ({counts['committed']} committed, {counts['released']} released), "
+        f"{counts['rejected']} rejected, {sum(sold.values())}/{skus * stock} units sold, no oversell"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent reservation benchmark on hot SKUs")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=5000, help="reservation attempts in total")
+    parser.add_argument("--skus", type=int, default=3, help="number of hot products")
+    parser.add_argument("--stock", type=int, default=1000, help="starting stock per product")
+    parser.add_argument("--backend", choices=("memory", "sqlite", "both"), default="both")
+    args = parser.parse_args(argv)
+
+    backends = ("memory", "sqlite") if args.backend == "both" else (args.backend,)
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            run(backend, args.threads, args.attempts, args.skus, args.stock, directory)
+
+
+if __name__ == "__main__":
+    main()
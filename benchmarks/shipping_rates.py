@@ -0,0 +1,52 @@
+# Quotes per second of the shipping rate engine
+#
+#   python -m benchmarks.shipping_rates [--zips 100000]
+#
+# Builds the engine (zone table, rate matrices, carrier calendars) and quotes every
+# shipping option to --zips random ZIP codes: once through quote_many() in one
+# batch, and once with a quote() call per ZIP code and method.
+import argparse
+import random
+import time
+
+from agents.shipping_agent.rates import RateEngine
+from mock_data.sample_data import MOCK_SHIPPING_OPTIONS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shipping rate engine throughput")
+    parser.add_argument("--zips", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    engine = RateEngine(MOCK_SHIPPING_OPTIONS)
+    print(f"🏗️  Engine built in {1000 * (time.perf_counter() - started):.1f} ms "
+          f"({len(engine.methods)} methods, {len(set(map(id, engine.calendars.values())))} carrier calendars)")
+
+    rng = random.Random(args.seed)
+    zip_codes = [f"{rng.randrange(5, 1000):03d}{rng.randrange(100):02d}" for _ in range(args.zips)]
+
+    started = time.perf_counter()
+    quotes = engine.quote_many(zip_codes)
+    batch = time.perf_counter() - started
+    print(f"📦 quote_many: {len(quotes):,} quotes in {1000 * batch:.0f} ms ({len(quotes) / batch:,.0f} quotes/s)")
+
+    started = time.perf_counter()
+    count = 0
+    for zip_code in zip_codes:
+        for method in engine.methods:
+            engine.quote(zip_code, method)
+            count += 1
+    single = time.perf_counter() - started
+    print(f"🔁 quote:      {count:,} quotes in {1000 * single:.0f} ms ({count / single:,.0f} quotes/s)")
+
+    zones = {}
+    for zip_code in zip_codes:
+        zone = engine.zone(zip_code)
+        zones[zone] = zones.get(zone, 0) + 1
+    print("🗺️  ZIP codes per zone: " + ", ".join(f"{zone}: {count:,}" for zone, count in sorted(zones.items())))
+
+
+if __name__ == "__main__":
+    main()
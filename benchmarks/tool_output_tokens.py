@@ -0,0 +1,137 @@
+# Prompt tokens per turn with text vs structured (TOOL_OUTPUT=json) tool outputs
+#
+#   python -m benchmarks.tool_output_tokens [--api] [--model gemini-2.5-flash-lite]
+#
+# Each query in QUERIES is the tool call a specialist makes for it. For both
+# output modes the benchmark builds what that specialist's model reads after the
+# call: its instruction plus the function response (ADK wraps text results as
+# {"result": text} and passes dicts through). Tokens are approximated offline
+# the way BPE tokenizers pre-split text (words with their leading space, numbers
+# in groups of three, runs of punctuation), counting each non-ASCII symbol such as
+# an emoji as two; --api counts them with the Gemini count_tokens endpoint
+# instead (needs GOOGLE_API_KEY).
+#
+# The last line adds the A2A hop: the coordinator's model reads the specialist's
+# reply, assumed to carry the tool result along (rendered text, or terse facts
+# about the size of the JSON when TOOL_OUTPUT=json).
+import argparse
+import json
+import os
+import re
+
+# Pre-tokenizer in the style of the GPT/SentencePiece BPE vocabularies
+TOKEN_RE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+
+# (query, agent, tool, args)
+QUERIES = [
+    ("Is the iPhone 15 Pro in stock?", "inventory_agent", "check_stock_level", ("iPhone 15 Pro",)),
+    ("When is the iPad Air restocked?", "inventory_agent", "check_restock_schedule", ("iPad Air",)),
+    ("Which items are running low?", "inventory_agent", "get_low_stock_items", ()),
+    ("Is everything in my cart available?", "inventory_agent", "check_stock_levels",
+     (["iPhone 15 Pro", "iPad Air", "Sony WH-1000XM5", "MacBook Pro"],)),
+    ("Hold 2 Galaxy S24 for me", "inventory_agent", "reserve_stock", ("Samsung Galaxy S24", 2)),
+    ("Tell me about the MacBook Pro", "product_catalog_agent", "get_product_details", ("MacBook Pro",)),
+    ("Show me Apple products", "product_catalog_agent", "search_products_tool", ("apple",)),
+    ("Compare the iPhone and the Galaxy", "product_catalog_agent", "get_products_details",
+     (["iPhone 15 Pro", "Samsung Galaxy S24"],)),
+    ("What categories do you have?", "product_catalog_agent", "list_categories", ()),
+    ("Do you have the Pixel 9?", "product_catalog_agent", "get_product_details", ("Pixel 9",)),
+    ("How much is overnight shipping to 94105?", "shipping_agent", "get_shipping_estimates", ("94105", "overnight")),
+    ("Where is TRK987654321?", "shipping_agent", "track_package", ("TRK987654321",)),
+    ("Where are all my orders?", "shipping_agent", "track_packages",
+     (["TRK123456789", "TRK987654321", "TRK456789123"],)),
+    ("What shipping options are there?", "shipping_agent", "get_shipping_options", ()),
+    ("Does a $28 order ship free?", "shipping_agent", "calculate_free_shipping_eligibility", (28.0,)),
+]
+
+
+def approximate_tokens(text):
+    tokens = 0
+    for piece in TOKEN_RE.findall(text):
+        # Multi-byte symbols (emoji, bullets) rarely merge, so they count two each
+        symbols = sum(1 for char in piece if ord(char) > 127 and not char.isalnum())
+        tokens += 2 * symbols if symbols else 1
+    return tokens
+
+
+def api_counter(model):
+    from google import genai
+
+    client = genai.Client(api_key=os.environ["GOOGLE_API_KEY"])
+
+    def count(text):
+        return client.models.count_tokens(model=model, contents=text).total_tokens
+
+    return count
+
+
+def specialist(agent_name):
+    """(instruction module, tools module) of a specialist agent"""
+    import importlib
+
+    return (
+        importlib.import_module(f"agents.{agent_name}.agent"),
+        importlib.import_module(f"agents.{agent_name}.tools"),
+    )
+
+
+def turn_prompt(agent_name, tool_name, args, structured):
+    """Instruction + function response the specialist's model reads after the tool call"""
+    from agents.common.presentation import agent_instruction
+
+    os.environ["TOOL_OUTPUT"] = "json" if structured else "text"
+    agent_module, tools_module = specialist(agent_name)
+    result = getattr(tools_module, tool_name)(*args)
+    response = result if isinstance(result, dict) else {"result": result}
+    payload = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+    return agent_instruction(agent_module.INSTRUCTION), payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn, text vs structured tool outputs")
+    parser.add_argument("--api", action="store_true", help="count tokens with the Gemini API instead of offline")
+    parser.add_argument("--model", default="gemini-2.5-flash-lite")
+    args = parser.parse_args(argv)
+    count = api_counter(args.model) if args.api else approximate_tokens
+
+    # Reservations made by the query set shouldn't touch a shared store
+    os.environ["CATALOG_STORE"] = "memory"
+    previous = os.environ.get("TOOL_OUTPUT")
+
+    print(f"{'query':<42} {'tool':<36} {'text':>6} {'json':>6} {'saved':>7}")
+    totals = {"text": 0, "json": 0, "text_response": 0, "json_response": 0}
+    try:
+        for query, agent_name, tool_name, tool_args in QUERIES:
+            row = {}
+            for mode in ("text", "json"):
+                instruction, payload = turn_prompt(agent_name, tool_name, tool_args, mode == "json")
+                response_tokens = count(payload)
+                row[mode] = count(instruction) + response_tokens
+                totals[mode] += row[mode]
+                totals[f"{mode}_response"] += response_tokens
+            saved = 1 - row["json"] / row["text"]
+            print(f"{query[:42]:<42} {tool_name:<36} {row['text']:>6} {row['json']:>6} {saved:>6.0%}")
+    finally:
+        if previous is None:
+            os.environ.pop("TOOL_OUTPUT", None)
+        else:
+            os.environ["TOOL_OUTPUT"] = previous
+
+    turns = len(QUERIES)
+    print(
+        f"\nSpecialist prompt tokens per turn: text {totals['text'] / turns:.0f}, json {totals['json'] / turns:.0f} "
+        f"({1 - totals['json'] / totals['text']:.0%} fewer)"
+    )
+    print(
+        f"Tool response tokens per turn: text {totals['text_response'] / turns:.0f}, "
+        f"json {totals['json_response'] / turns:.0f} ({1 - totals['json_response'] / totals['text_response']:.0%} fewer)"
+    )
+    with_hop = {mode: totals[mode] + totals[f"{mode}_response"] for mode in ("text", "json")}
+    print(
+        f"Including the hop to the coordinator: text {with_hop['text'] / turns:.0f}, "
+        f"json {with_hop['json'] / turns:.0f} ({1 - with_hop['json'] / with_hop['text']:.0%} fewer)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Throughput of the tracking store: event ingestion and lookups
+#
+#   python -m benchmarks.tracking_events [--packages 200000] [--events-per-package 6]
+#
+# Streams status events for --packages packages (up to --events-per-package each,
+# as JSONL lines, some late and some repeated, like a real carrier feed) into a
+# TrackingStore and reports events/s and the memory it keeps per package. Then times the
+# lookups: exact, prefix, fuzzy (one typo) and the status / carrier listings.
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from mock_data.tracking_store import TrackingStore
+
+STATUSES = ["processing", "in_transit", "in_transit", "out_for_delivery", "delivered"]
+LOCATIONS = ["Warehouse", "Regional hub", "Local distribution center", "Delivery van", "Customer's doorstep"]
+CARRIERS = ["UPS", "FedEx", "USPS", "DHL"]
+
+
+def event_lines(packages, per_package, seed=11):
+    """JSONL events, in waves so packages interleave; each package gets 1..per_package events"""
+    rng = random.Random(seed)
+    numbers = [f"TRK{rng.randrange(10 ** 9):09d}" for _ in range(packages)]
+    steps = {number: rng.randint(1, per_package) for number in numbers}
+    for step in range(per_package):
+        for number in numbers:
+            if step >= steps[number]:
+                continue
+            # A late event now and then: it carries an earlier step's timestamp
+            shown = step - 1 if step and rng.random() < 0.05 else step
+            stage = min(shown, len(STATUSES) - 1)
+            yield json.dumps({
+                "tracking_number": number,
+                "status": STATUSES[stage],
+                "location": LOCATIONS[stage],
+                "timestamp": f"2024-11-{10 + shown:02d} {int(number[-2:]) % 24:02d}:00:00",
+                "carrier": CARRIERS[int(number[-1]) % len(CARRIERS)],
+            })
+
+
+def timed(label, func, repeat=200):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    print(f"  {label:<34} {1e6 * (time.perf_counter() - started) / repeat:>9.1f} µs")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tracking store ingestion and lookup throughput")
+    parser.add_argument("--packages", type=int, default=200_000)
+    parser.add_argument("--events-per-package", type=int, default=6)
+    parser.add_argument("--history", type=int, default=4, help="events kept per package")
+    args = parser.parse_args(argv)
+
+    store = TrackingStore(history_limit=args.history)
+    started = time.perf_counter()
+    applied = store.ingest_lines(event_lines(args.packages, args.events_per_package), notify=False)
+    elapsed = time.perf_counter() - started
+    total = applied + store.ignored
+    print(f"📥 {total:,} events in {elapsed:.1f}s ({total / elapsed:,.0f}/s): "
+          f"{applied:,} applied, {store.ignored:,} repeats ignored")
+
+    # Memory on a smaller run, tracemalloc slows ingestion down a lot
+    sample = min(args.packages, 20_000)
+    tracemalloc.start()
+    sampled = TrackingStore(history_limit=args.history)
+    sampled.ingest_lines(event_lines(sample, args.events_per_package), notify=False)
+    kept = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"💾 {kept / len(sampled):.0f} bytes per package with up to {args.history} events of history, "
+          f"about {kept / len(sampled) * len(store) / 2 ** 20:.0f} MB for {len(store):,} packages\n")
+    del sampled
+
+    # The first lookup merges the numbers that arrived since the last one into the sorted arrays
+    store.with_prefix("TRK")
+    number = next(iter(store.packages))
+    typo = number[:-1] + ("0" if number[-1] != "0" else "1")
+    timed("get (exact)", lambda: store.get(number))
+    timed("with_prefix (7 chars)", lambda: store.with_prefix(number[:7]))
+    swapped = number[:-3] + number[-2] + number[-3] + number[-1]
+    timed("similar (wrong last digit)", lambda: store.similar(typo), repeat=20)
+    timed("similar (swapped digits)", lambda: store.similar(swapped), repeat=20)
+    in_transit = timed("numbers_in(status='in_transit')", lambda: store.numbers_in("in_transit"), repeat=5)
+    timed("numbers_in(status, carrier)", lambda: store.numbers_in("out_for_delivery", "UPS"), repeat=5)
+    print(f"\n🚚 {len(in_transit):,} packages in transit; per status: {store.counts()}")
+
+
+if __name__ == "__main__":
+    main()
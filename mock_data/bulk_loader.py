@@ -0,0 +1,280 @@
+# Streaming bulk importer for catalog data
+#
+#   python -m mock_data.bulk_loader --db catalog.db --products products.jsonl --inventory stock.csv
+#   python -m mock_data.bulk_loader --db catalog.db --seed-mock --columnar catalog.col [--check]
+#
+# Records are read one line at a time and written in batches, so files larger
+# than memory can be imported. Product loads of more than one batch rebuild the
+# SQLite search index once at the end instead of row by row. The columnar
+# export streams sorted rows out of SQLite, which does the sorting on disk.
+# --check then runs the same lookups on both and fails if the columnar file
+# answers any of them differently.
+import argparse
+import csv
+import json
+import os
+from itertools import islice
+
+from mock_data.columnar import write_columnar
+from mock_data.store import (
+    INVENTORY_TABLE,
+    PRODUCT_NAME_TABLE,
+    PRODUCT_TABLE,
+    SHIPPING_TABLE,
+    TRACKING_TABLE,
+    MmapStore,
+    SQLiteStore,
+    inventory_row,
+    product_row,
+    shipping_row,
+    tracking_row,
+)
+
+BATCH_SIZE = 1000
+
+
+def iter_records(path):
+    """Yield dict records from a .csv or .jsonl/.ndjson file, one at a time"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as handle:
+        if extension == ".csv":
+            yield from csv.DictReader(handle)
+        elif extension in (".jsonl", ".ndjson"):
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file type '{extension}' (expected .csv or .jsonl)")
+
+
+def _int(value, default=0):
+    return default if value in (None, "") else int(value)
+
+
+def _float(value, default=0.0):
+    return default if value in (None, "") else float(value)
+
+
+def _features(value):
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return [feature.strip() for feature in value.split("|") if feature.strip()]
+
+
+def product_from_record(record):
+    """``(category_key, product)`` from a CSV/JSONL product record"""
+    product = {
+        "id": _int(record["id"]),
+        "name": record["name"],
+        "brand": record.get("brand") or "",
+        "price": _float(record.get("price")),
+        "category": record.get("category") or "",
+        "description": record.get("description") or "",
+        "specifications": record.get("specifications") or "",
+        "features": _features(record.get("features")),
+    }
+    category_key = record.get("category_key") or product["category"] or "uncategorized"
+    return category_key, product
+
+
+def inventory_from_record(record):
+    return _int(record["product_id"]), {
+        "stock": _int(record.get("stock")),
+        "reserved": _int(record.get("reserved")),
+        "reorder_level": _int(record.get("reorder_level")),
+        "next_restock": record.get("next_restock") or None,
+        "status": record.get("status") or None,
+        "daily_sales": _float(record.get("daily_sales")),
+    }
+
+
+def shipping_from_record(record):
+    return record["method"], {
+        "cost": _float(record.get("cost")),
+        "days": _int(record.get("days")),
+        "carrier": record.get("carrier") or "",
+        "description": record.get("description") or "",
+    }
+
+
+def tracking_from_record(record):
+    return record["tracking_number"], {
+        "status": record.get("status"),
+        "location": record.get("location"),
+        "timestamp": record.get("timestamp"),
+        "estimated_delivery": record.get("estimated_delivery") or None,
+        "carrier": record.get("carrier"),
+    }
+
+
+# kind -> (insert statement, record parser, row builder)
+IMPORTERS = {
+    "products": (
+        "INSERT OR REPLACE INTO products (id, category_key, name, name_lower, brand, price, category, "
+        "description, specifications, features, search_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        product_from_record,
+        product_row,
+    ),
+    "inventory": (
+        "INSERT OR REPLACE INTO inventory (product_id, stock, reserved, reorder_level, next_restock, status, "
+        "daily_sales) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        inventory_from_record,
+        inventory_row,
+    ),
+    "shipping_options": (
+        "INSERT OR REPLACE INTO shipping_options (method, cost, days, carrier, description) VALUES (?, ?, ?, ?, ?)",
+        shipping_from_record,
+        shipping_row,
+    ),
+    "tracking": (
+        "INSERT OR REPLACE INTO tracking (tracking_number, status, location, timestamp, estimated_delivery, carrier) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        tracking_from_record,
+        tracking_row,
+    ),
+}
+
+
+def import_pairs(store, kind, pairs, batch_size=BATCH_SIZE):
+    """Insert ``(key, record)`` pairs of one kind into a SQLiteStore in batches"""
+    statement, _, build_row = IMPORTERS[kind]
+    conn = store.connect()
+    total = 0
+    paused = False
+    rows = (build_row(key, record) for key, record in pairs)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            if total and kind == "products" and not paused:
+                # More than a batch: rebuilding the search index once beats indexing row by row
+                store.pause_search_index()
+                paused = True
+            with conn:
+                conn.executemany(statement, batch)
+            total += len(batch)
+    finally:
+        if paused:
+            store.resume_search_index()
+    return total
+
+
+def import_file(store, kind, path, batch_size=BATCH_SIZE):
+    """Stream a CSV/JSONL file of ``kind`` records into a SQLiteStore"""
+    _, parse, _ = IMPORTERS[kind]
+    return import_pairs(store, kind, (parse(record) for record in iter_records(path)), batch_size)
+
+
+def seed_mock_data(store):
+    """Copy the MOCK_* demo data into a SQLiteStore"""
+    from mock_data.sample_data import MOCK_INVENTORY, MOCK_PRODUCTS, MOCK_SHIPPING_OPTIONS, MOCK_TRACKING
+
+    import_pairs(store, "products", (
+        (category_key, product) for category_key, products in MOCK_PRODUCTS.items() for product in products
+    ))
+    import_pairs(store, "inventory", MOCK_INVENTORY.items())
+    import_pairs(store, "shipping_options", MOCK_SHIPPING_OPTIONS.items())
+    import_pairs(store, "tracking", MOCK_TRACKING.items())
+
+
+def export_columnar(store, path):
+    """Write a SQLiteStore out as a memory-mapped columnar file"""
+    conn = store.connect()
+    product_rows = conn.execute(
+        "SELECT id, category_key, name, brand, price, category, description, specifications, features, "
+        "search_text FROM products ORDER BY id"
+    )
+    # Position of each product in id order, listed in name order for binary search
+    name_rows = conn.execute(
+        "SELECT name_lower, row FROM (SELECT name_lower, ROW_NUMBER() OVER (ORDER BY id) - 1 AS row "
+        "FROM products) ORDER BY name_lower, row"
+    )
+    inventory_rows = conn.execute(
+        "SELECT product_id, stock, reserved, reorder_level, next_restock, status, daily_sales "
+        "FROM inventory ORDER BY product_id"
+    )
+    shipping_rows = conn.execute(
+        "SELECT method, cost, days, carrier, description FROM shipping_options ORDER BY rowid"
+    )
+    tracking_rows = conn.execute(
+        "SELECT tracking_number, status, location, timestamp, estimated_delivery, carrier "
+        "FROM tracking ORDER BY tracking_number"
+    )
+    write_columnar(path, {
+        "products": (PRODUCT_TABLE, product_rows),
+        "product_names": (PRODUCT_NAME_TABLE, name_rows),
+        "inventory": (INVENTORY_TABLE, inventory_rows),
+        "shipping_options": (SHIPPING_TABLE, shipping_rows),
+        "tracking": (TRACKING_TABLE, tracking_rows),
+    })
+
+
+def _seam_queries(values, width=3):
+    """Tail of each value joined to the head of the next: text that exists only across a row boundary"""
+    return [f"{left[-width:]}{right[:width]}" for left, right in zip(values, values[1:]) if left and right]
+
+
+def check_columnar(store, path):
+    """Queries whose answers differ between a SQLiteStore and the columnar file exported from it"""
+    mapped = MmapStore(path)
+    try:
+        conn = store.connect()
+        names = [row[0] for row in conn.execute("SELECT name_lower FROM products ORDER BY name_lower, id")]
+        texts = [row[0] for row in conn.execute("SELECT search_text FROM products ORDER BY id")]
+        # Whole names and substrings must match; queries across two rows' strings must not
+        queries = names + [name[1:-1] for name in names] + _seam_queries(names) + _seam_queries(texts)
+        mismatches = []
+        for query in dict.fromkeys(query for query in queries if query.strip()):
+            expected, found = store.find_product(query), mapped.find_product(query)
+            if (expected and expected['id']) != (found and found['id']):
+                mismatches.append(f"find_product({query!r})")
+            expected = [product['id'] for product in store.search_products(query)]
+            found = [product['id'] for product in mapped.search_products(query)]
+            if expected != found:
+                mismatches.append(f"search_products({query!r})")
+        return mismatches
+    finally:
+        mapped.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load catalog data into SQLite and/or a columnar file")
+    parser.add_argument("--db", required=True, help="SQLite database to create or update")
+    parser.add_argument("--seed-mock", action="store_true", help="import the built-in demo data")
+    for kind in IMPORTERS:
+        parser.add_argument(f"--{kind.replace('_', '-')}", dest=kind, action="append", default=[],
+                            metavar="FILE", help=f"CSV/JSONL file of {kind} records")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--columnar", metavar="FILE", help="also export a memory-mapped columnar file")
+    parser.add_argument("--check", action="store_true",
+                        help="check that lookups on the columnar file give the same answers as SQLite")
+    args = parser.parse_args(argv)
+
+    store = SQLiteStore(args.db)
+    if args.seed_mock:
+        seed_mock_data(store)
+        print("🌱 Seeded demo data")
+    for kind in IMPORTERS:
+        for path in getattr(args, kind):
+            count = import_file(store, kind, path, args.batch_size)
+            print(f"📥 Imported {count} {kind} records from {path}")
+    if args.columnar:
+        export_columnar(store, args.columnar)
+        print(f"🗂️ Wrote columnar catalog to {args.columnar}")
+        if args.check:
+            mismatches = check_columnar(store, args.columnar)
+            if mismatches:
+                store.close()
+                raise SystemExit("❌ Columnar lookups differ from SQLite: " + ", ".join(mismatches[:20]))
+            print("✅ Columnar lookups match SQLite")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# Prebuilt search index over the product catalog
+import heapq
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# The same tokens with their positions in the original text
+WORD_SPAN_RE = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+NGRAM_SIZE = 3
+# Words that make a different model of a product when added to its name ("iPhone 15 Pro Max")
+MODEL_WORDS = {"max", "plus", "mini", "ultra", "pro", "air", "lite", "se", "fe", "xl", "edge", "fold", "flip"}
+
+# Score weights per indexed field (higher = more relevant)
+FIELD_WEIGHTS = {
+    "name": 8.0,
+    "brand": 4.0,
+    "category": 3.0,
+    "description": 1.0,
+}
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    """Character n-grams of a lowercase string"""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def product_fields(product):
+    """Lowercased searchable fields of a product"""
+    return {
+        "name": product['name'].lower(),
+        "brand": (product.get('brand') or '').lower(),
+        "category": (product.get('category') or '').lower(),
+        "description": (product.get('description') or '').lower(),
+    }
+
+
+def match_fields(fields, query_lower, query_tokens):
+    """Whether searchable fields match a query (substring, or every token present)"""
+    if any(query_lower in text for text in fields.values()):
+        return True
+    if not query_tokens:
+        return False
+    field_tokens = set()
+    for text in fields.values():
+        field_tokens.update(tokenize(text))
+    return all(token in field_tokens for token in query_tokens)
+
+
+def score_fields(fields, query_lower, query_tokens):
+    """Relevance score of searchable fields for a query"""
+    score = 0.0
+    if fields["name"] == query_lower:
+        score += 100.0
+    elif fields["name"].startswith(query_lower):
+        score += 20.0
+    for field, weight in FIELD_WEIGHTS.items():
+        if query_lower in fields[field]:
+            score += weight
+        field_tokens = set(tokenize(fields[field]))
+        score += weight * sum(1 for token in query_tokens if token in field_tokens)
+    return score
+
+
+def _extends_name(text, spans, name_tokens):
+    """Whether a name-like token sits right next to the product name's tokens in ``text``"""
+    for position, (token, start, end) in enumerate(spans):
+        if token not in name_tokens:
+            continue
+        if position + 1 < len(spans):
+            after, after_start, _ = spans[position + 1]
+            # A number, a model word or a capitalized word straight after the name
+            if after not in name_tokens and text[end:after_start].isspace() and (
+                    any(char.isdigit() for char in after) or after in MODEL_WORDS or text[after_start].isupper()):
+                return True
+        if position:
+            before, _, before_end = spans[position - 1]
+            if before not in name_tokens and before in MODEL_WORDS and text[before_end:start].isspace():
+                return True
+    return False
+
+
+class CatalogIndex:
+    """Inverted token/n-gram index with exact-name and id lookups.
+
+    Built once from the ``MOCK_PRODUCTS`` layout ({category_key: [product, ...]}),
+    so lookups only touch the products that share tokens or n-grams with the query.
+    """
+
+    def __init__(self, catalog=None):
+        self.by_id = {}
+        self.by_name = {}
+        self.category_of = {}
+        self.categories = []
+        self._fields = {}
+        self._tokens = {}
+        self._grams = {}
+        if catalog:
+            for category_key, products in catalog.items():
+                for product in products:
+                    self.add(product, category_key)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, product, category_key):
+        """Index a single product under a catalog category key"""
+        product_id = product['id']
+        if product_id in self.by_id:
+            self.remove(product_id)
+
+        category_key = category_key.lower()
+        if category_key not in self.categories:
+            self.categories.append(category_key)
+
+        fields = product_fields(product)
+        self.by_id[product_id] = product
+        self.by_name[fields["name"]] = product
+        self.category_of[product_id] = category_key
+        self._fields[product_id] = fields
+
+        for field, text in fields.items():
+            for token in tokenize(text):
+                self._tokens.setdefault(token, {}).setdefault(product_id, set()).add(field)
+            for gram in ngrams(text):
+                self._grams.setdefault(gram, set()).add(product_id)
+
+    def remove(self, product_id):
+        """Drop a product and all of its postings"""
+        fields = self._fields.pop(product_id, None)
+        if fields is None:
+            return
+        del self.by_id[product_id]
+        self.category_of.pop(product_id, None)
+        named = self.by_name.get(fields["name"])
+        if named is not None and named['id'] == product_id:
+            del self.by_name[fields["name"]]
+
+        for text in fields.values():
+            for token in tokenize(text):
+                postings = self._tokens.get(token)
+                if postings is not None:
+                    postings.pop(product_id, None)
+                    if not postings:
+                        del self._tokens[token]
+            for gram in ngrams(text):
+                postings = self._grams.get(gram)
+                if postings is not None:
+                    postings.discard(product_id)
+                    if not postings:
+                        del self._grams[gram]
+
+    def get(self, product_id):
+        """Product by id"""
+        return self.by_id.get(product_id)
+
+    def _substring_candidates(self, text):
+        """Ids whose indexed fields may contain ``text`` as a substring"""
+        if len(text) < NGRAM_SIZE:
+            # Too short for the n-gram index, verify every product instead
+            return set(self.by_id)
+        postings = sorted((self._grams.get(g, ()) for g in ngrams(text)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def find(self, name):
+        """Best product whose name contains ``name`` (case-insensitive)"""
+        name_lower = name.lower().strip()
+        if not name_lower:
+            return None
+        exact = self.by_name.get(name_lower)
+        if exact is not None:
+            return exact
+
+        matches = [
+            product_id for product_id in self._substring_candidates(name_lower)
+            if name_lower in self._fields[product_id]["name"]
+        ]
+        if not matches:
+            return None
+        # Prefer the shortest name, i.e. the closest match to the query
+        return self.by_id[min(matches, key=lambda pid: (len(self._fields[pid]["name"]), pid))]
+
+    def _score(self, product_id, query_lower, query_tokens):
+        fields = self._fields[product_id]
+        score = 0.0
+        if fields["name"] == query_lower:
+            score += 100.0
+        elif fields["name"].startswith(query_lower):
+            score += 20.0
+        for field, weight in FIELD_WEIGHTS.items():
+            if query_lower in fields[field]:
+                score += weight
+        for token in query_tokens:
+            for field in self._tokens.get(token, {}).get(product_id, ()):
+                score += FIELD_WEIGHTS[field]
+        return score
+
+    def _matches(self, query_lower, query_tokens, category):
+        """Ids of products matching the query, before ranking"""
+        candidates = {
+            product_id for product_id in self._substring_candidates(query_lower)
+            if any(query_lower in text for text in self._fields[product_id].values())
+        }
+        if query_tokens:
+            token_postings = sorted((self._tokens.get(t, {}) for t in query_tokens), key=len)
+            token_matches = set(token_postings[0])
+            for posting in token_postings[1:]:
+                token_matches &= posting.keys()
+            candidates |= token_matches
+
+        if category:
+            category_key = category.lower()
+            candidates = {pid for pid in candidates if self.category_of[pid] == category_key}
+        return candidates
+
+    def search(self, query, category=None, limit=None):
+        """Ranked products matching ``query``, optionally within a category.
+
+        A product matches when the whole query is a substring of its name, brand,
+        category or description, or when every query token appears in it.
+        """
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query_lower)
+        candidates = self._matches(query_lower, query_tokens, category)
+
+        scored = ((self._score(pid, query_lower, query_tokens), pid) for pid in candidates)
+        if limit is not None:
+            ranked = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        else:
+            ranked = sorted(scored, key=lambda item: (-item[0], item[1]))
+        return [self.by_id[pid] for _, pid in ranked]
+
+    def mentions(self, text):
+        """Products named in free text, best matches first.
+
+        A product is mentioned when its full name appears in the text, or when every
+        alphabetic token of its name does ("is the iPad Air in stock?"). Only the
+        products sharing a name token with the text are checked, and a name contained
+        in a longer matched name ("iPhone 15 Pro" inside "iPhone 15 Pro Max") is dropped.
+        A name extended by a model-like word the catalog doesn't have ("iPhone 15 Pro
+        Max", "MacBook Pro 16") names some other product, so it isn't a mention.
+        """
+        text_lower = text.lower()
+        text_tokens = set(tokenize(text_lower))
+        spans = [(match.group().lower(), match.start(), match.end()) for match in WORD_SPAN_RE.finditer(text)]
+        candidates = set()
+        for token in text_tokens:
+            for product_id, fields in self._tokens.get(token, {}).items():
+                if "name" in fields:
+                    candidates.add(product_id)
+
+        scored = []
+        for product_id in candidates:
+            name = self._fields[product_id]["name"]
+            name_tokens = tokenize(name)
+            words = [token for token in name_tokens if not token.isdigit()]
+            if name in text_lower:
+                score = (1, len(name_tokens))
+            elif words and all(token in text_tokens for token in words):
+                score = (0, sum(1 for token in name_tokens if token in text_tokens))
+            else:
+                continue
+            if _extends_name(text, spans, set(name_tokens)):
+                continue
+            scored.append((score, product_id))
+
+        names = {product_id: self._fields[product_id]["name"] for _, product_id in scored}
+        kept = [
+            (score, product_id) for score, product_id in scored
+            if not any(other != product_id and names[product_id] in names[other] for other in names)
+        ]
+        kept.sort(key=lambda item: (-item[0][0], -item[0][1], item[1]))
+        return [self.by_id[product_id] for _, product_id in kept]
+
+    def count(self, query, category=None):
+        """Number of products matching ``query`` without ranking them"""
+        query_lower = query.lower().strip()
+        return len(self._matches(query_lower, tokenize(query_lower), category))
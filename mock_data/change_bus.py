@@ -0,0 +1,556 @@
+# Change bus: pushes catalog, stock and tracking changes to every running agent process
+#
+# Every agent process holds its own indexes and caches over the data (and, with
+# the default memory backend, its own copy of the data), so a write in one
+# process used to be invisible to the others. The bus is a small local pub/sub
+# over a Unix socket:
+#
+#   - one bus process is the single writer of the change log: it gives every
+#     change the next version number, keeps the last CHANGE_BUS_BACKLOG changes
+#     and broadcasts each one to all subscribers
+#   - every agent process runs a ChangeBusClient thread that publishes its own
+#     writes (from mock_data.store change notifications) and applies everyone
+#     else's, in version order, through CatalogStore.apply_remote_change /
+#     TrackingStore.apply. Those update the in-process indexes and fire the usual
+#     notify_change, so tool and response caches drop exactly what changed.
+#
+# Messages are JSON lines. Stock and reserved units travel as deltas, applied
+# under the same per-SKU lock as reservations, so concurrent changes in several
+# processes add up instead of overwriting each other; the other inventory
+# fields, catalog products and tracking entries travel as their new values.
+# (Separate in-memory copies still can't stop two processes from reserving the
+# same last units: multi-worker agents use the shared SQLite store for that.)
+#   {"type": "event", "version": 42, "epoch": "...", "domain": "inventory", "key": 1,
+#    "record": {"delta": {"reserved": 2}, "set": {}}, "origin": "...", "sent_at": 1729250000.123}
+#
+# A client that reconnects asks for the changes after the last version it
+# applied and gets them from the backlog; one that finds a gap in the versions
+# asks again. When the backlog doesn't reach back far enough (or the bus was
+# restarted) the client reloads its data from the source and the bus sends every
+# record changed so far, with its deltas summed, which it keeps besides the backlog.
+#
+#   CHANGE_BUS_SOCKET   socket path; unset turns the bus off
+#   CHANGE_BUS_BACKLOG  changes kept for replay (default 10000)
+#
+# Run with:
+#   python -m mock_data.change_bus serve                   the bus (start_system.py starts one itself)
+#   python -m mock_data.change_bus publish changes.jsonl   apply and broadcast changes, one JSON per line:
+#       {"domain": "inventory", "key": 1, "record": {"stock": 3}}
+#       {"domain": "catalog", "key": 2, "record": {"price": 899.99}}
+#       {"domain": "tracking", "key": "TRK123456789", "record": {"status": "delivered", ...}}
+#   python -m mock_data.change_bus watch                   print changes as they arrive
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+from mock_data.store import add_change_listener, get_store, notify_change, remove_change_listener, set_store
+
+DOMAINS = ("catalog", "inventory", "tracking")
+DEFAULT_BACKLOG = 10_000
+# A subscriber this far behind is disconnected; it reconnects and replays from the backlog
+MAX_SUBSCRIBER_BUFFER = 8 * 2 ** 20
+
+# Set while this thread applies a change from the bus, so it isn't published back
+_applying = threading.local()
+
+
+def bus_path():
+    """Socket path from CHANGE_BUS_SOCKET, or None when the bus is off"""
+    return os.environ.get("CHANGE_BUS_SOCKET", "").strip() or None
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def _hashable(key):
+    return json.dumps(key) if isinstance(key, (list, dict)) else key
+
+
+class ChangeBusServer:
+    """The single writer of the change log: versions, keeps and broadcasts changes"""
+
+    def __init__(self, path, backlog=DEFAULT_BACKLOG):
+        self.path = path
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        # (version, encoded event)
+        self.backlog = deque(maxlen=backlog)
+        # (domain, key) -> every change to it folded into one, to bring a client up to date without the full log
+        self.latest = {}
+        self.subscribers = set()
+        self._handlers = set()
+        self.published = 0
+        self.dropped = 0
+        self._server = None
+        self._loop = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.remove(self.path)  # left over from a bus that didn't shut down cleanly
+            else:
+                raise RuntimeError(f"A change bus is already running on {self.path}")
+            finally:
+                probe.close()
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+
+    async def serve_forever(self):
+        """Serve until SIGINT / SIGTERM (main thread only)"""
+        await self.start()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self._loop.add_signal_handler(signum, stop.set)
+        await stop.wait()
+        self._server.close()
+        for writer in list(self.subscribers):
+            writer.close()
+        # Let the connection handlers see the end of their streams rather than being cancelled
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def close(self):
+        if self._server is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._server.close)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def _handle(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                kind = message.get("type")
+                if kind == "publish":
+                    self._publish(message)
+                elif kind in ("subscribe", "replay"):
+                    self.subscribers.add(writer)
+                    self._replay(writer, message.get("since"), message.get("epoch"))
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    # It stopped reading (a publisher on its way out): keep reading what it sent
+                    self.subscribers.discard(writer)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def _publish(self, message):
+        self.version += 1
+        self.published += 1
+        change = {
+            "type": "event", "version": self.version, "epoch": self.epoch,
+            "domain": message["domain"], "key": message["key"], "record": message.get("record"),
+            "origin": message.get("origin"), "sent_at": message.get("sent_at"),
+        }
+        event = _encode(change)
+        self.backlog.append((self.version, event))
+        latest_key = change["domain"], _hashable(change["key"])
+        self.latest[latest_key] = _fold(self.latest.get(latest_key), change)
+        for writer in list(self.subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                self.dropped += 1
+                self.subscribers.discard(writer)
+                writer.close()
+            else:
+                writer.write(event)
+
+    def _replay(self, writer, since, epoch=None):
+        """Hello, then every kept change after ``since``, or a reset and every changed record"""
+        # No await in here, so nothing is broadcast in between and the stream stays in order
+        writer.write(_encode({"type": "hello", "version": self.version, "epoch": self.epoch}))
+        restarted = epoch is not None and epoch != self.epoch
+        if since is None or (since >= self.version and not restarted):
+            return
+        oldest = self.backlog[0][0] if self.backlog else self.version + 1
+        if restarted or since + 1 < oldest:
+            # The client starts over from its data source; these bring it up to self.version
+            changes = sorted(self.latest.values(), key=lambda change: change["version"])
+            writer.write(_encode({"type": "reset", "version": self.version, "epoch": self.epoch,
+                                  "records": len(changes)}))
+            for change in changes:
+                writer.write(_encode({**change, "type": "snapshot"}))
+            return
+        for version, event in self.backlog:
+            if version > since:
+                writer.write(event)
+
+    def stats(self):
+        return {"version": self.version, "subscribers": len(self.subscribers), "records": len(self.latest),
+                "published": self.published, "dropped_subscribers": self.dropped}
+
+
+def _fold(previous, change):
+    """One change equivalent to ``previous`` followed by ``change``"""
+    if change["domain"] != "inventory" or not previous or not previous["record"] or not change["record"]:
+        return change
+    old, new = previous["record"], change["record"]
+    delta = dict(old.get("delta") or {})
+    for field, amount in (new.get("delta") or {}).items():
+        delta[field] = delta.get(field, 0) + amount
+    values = {**(old.get("set") or {}), **(new.get("set") or {})}
+    if "status" not in (new.get("set") or {}):
+        values.pop("status", None)  # derived from the numbers again
+    return {**change, "record": {"delta": delta, "set": values}}
+
+
+def serve_in_thread(path=None, backlog=None):
+    """Run a ChangeBusServer on a daemon thread's event loop; returns once it accepts connections"""
+    path = path or bus_path()
+    if backlog is None:
+        backlog = int(os.environ.get("CHANGE_BUS_BACKLOG", DEFAULT_BACKLOG))
+    server = ChangeBusServer(path, backlog)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    failed = []
+
+    def run():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(server.start())
+        except Exception as exc:
+            failed.append(exc)
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="change-bus", daemon=True).start()
+    started.wait()
+    if failed:
+        raise failed[0]
+    return server
+
+
+def record_of(domain, key, store=None):
+    """A changed record as sent on the bus: new state, or the unsent inventory delta (None if nothing to send)"""
+    store = store or get_store()
+    if domain == "inventory":
+        return store.take_inventory_change(key)
+    if domain == "catalog":
+        product = store.get_product(key)
+        if product is None:
+            return None
+        return {"product": dict(product), "category_key": store.get_product_category(key)}
+    if domain == "tracking":
+        from mock_data.tracking_store import get_tracking_store
+
+        package = get_tracking_store().get(key)
+        return dict(package) if package is not None else None
+    return None
+
+
+def apply_event(event):
+    """Apply a change from the bus to this process's store, indexes and caches"""
+    domain, key, record = event["domain"], event["key"], event.get("record")
+    _applying.active = True
+    try:
+        if domain == "tracking":
+            from mock_data.tracking_store import get_tracking_store
+
+            if record is None or not get_tracking_store().apply({"tracking_number": key, **record}):
+                notify_change(domain, key)
+        else:
+            get_store().apply_remote_change(domain, key, record)
+    finally:
+        _applying.active = False
+
+
+def reload_data():
+    """Start over from the data source, for when changes were missed and can't be replayed"""
+    from mock_data.tracking_store import reset_tracking_store
+
+    _applying.active = True
+    try:
+        store = get_store()
+        reloaded = store.reloaded()
+        if reloaded is not store:
+            set_store(reloaded)
+        # Tracking state is per process whatever the backend
+        reset_tracking_store()
+        for domain in DOMAINS:
+            notify_change(domain)
+    finally:
+        _applying.active = False
+
+
+class ChangeBusClient:
+    """Publishes this process's changes and applies the other processes' in bus order, on a daemon thread"""
+
+    def __init__(self, path=None, apply=apply_event, reload=reload_data, publish_local=True):
+        self.path = path or bus_path()
+        self.apply = apply
+        self.reload = reload
+        self.publish_local = publish_local
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Last version applied, and the bus epoch it belongs to
+        self.version = 0
+        self.epoch = None
+        self.applied = 0
+        self.published = 0
+        self.resyncs = 0
+        self.resets = 0
+        self.errors = 0
+        self.connected = threading.Event()
+        # Set once everything the bus had when we connected has been applied
+        self.synced = threading.Event()
+        self._target = None
+        self._resyncing = False
+        # Latest-state records still to come after a reset
+        self._snapshot_left = 0
+        self._sock = None
+        self._pending = deque(maxlen=DEFAULT_BACKLOG)
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.publish_local:
+            add_change_listener(self._on_change)
+        self._thread = threading.Thread(target=self._run, name="change-bus-client", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout=2.0):
+        """Stop after the bus has read everything sent so far"""
+        self._stop.set()
+        if self.publish_local:
+            remove_change_listener(self._on_change)
+        sock = self._sock
+        if sock is not None:
+            try:
+                # The bus closes its end once it reads to the end, which ends the reader thread
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _on_change(self, domain, key):
+        if getattr(_applying, "active", False) or key is None or domain not in DOMAINS:
+            return
+        record = record_of(domain, key)
+        if record is None and domain == "inventory":
+            return  # taken and sent with an earlier notification
+        self.publish(domain, key, record)
+
+    def publish(self, domain, key, record):
+        """Send a change to the bus (queued while disconnected)"""
+        line = _encode({"type": "publish", "domain": domain, "key": key, "record": record,
+                        "origin": self.origin, "sent_at": time.time()})
+        with self._send_lock:
+            if self._sock is not None:
+                try:
+                    self._sock.sendall(line)
+                    self.published += 1
+                    return
+                except OSError:
+                    pass
+            self._pending.append(line)
+
+    def _send(self, message):
+        with self._send_lock:
+            self._sock.sendall(_encode(message))
+
+    def _run(self):
+        delay = 0.05
+        while not self._stop.is_set():
+            sock = socket.socket(socket.AF_UNIX)
+            try:
+                sock.connect(self.path)
+                with self._send_lock:
+                    self._sock = sock
+                    # Everything after the last version applied, from the start on the first connect
+                    sock.sendall(_encode({"type": "subscribe", "since": self.version, "epoch": self.epoch}))
+                    while self._pending:
+                        sock.sendall(self._pending.popleft())
+                        self.published += 1
+                self.connected.set()
+                delay = 0.05
+                for line in sock.makefile("rb"):
+                    self._handle(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            finally:
+                with self._send_lock:
+                    self._sock = None
+                self.connected.clear()
+                sock.close()
+            self._stop.wait(delay)
+            delay = min(delay * 2, 2.0)
+
+    def _handle(self, message):
+        kind = message.get("type")
+        if kind == "hello":
+            # A new bus (its versions start over) follows up with a reset
+            restarted = self.epoch is not None and message["epoch"] != self.epoch
+            self.epoch = message["epoch"]
+            self._target = message["version"]
+            if self.version >= self._target and not restarted:
+                self.synced.set()
+        elif kind == "reset":
+            self._reset(message["version"], message.get("records", 0))
+        elif kind == "snapshot":
+            self._apply(message)
+            self._snapshot_left -= 1
+            if self._snapshot_left <= 0:
+                self.synced.set()
+        elif kind == "event":
+            version = message["version"]
+            if version <= self.version:
+                return  # already applied (a replay overlapping the live stream)
+            if version != self.version + 1:
+                # Missed changes: ask for them, later events come again with the replay
+                if not self._resyncing:
+                    self._resyncing = True
+                    self.resyncs += 1
+                    self._send({"type": "replay", "since": self.version})
+                return
+            self._resyncing = False
+            self.version = version
+            if message.get("origin") != self.origin:
+                self._apply(message)
+            if self._target is not None and self.version >= self._target and self._snapshot_left <= 0:
+                self.synced.set()
+
+    def _apply(self, message):
+        try:
+            self.apply(message)
+            self.applied += 1
+        except Exception as exc:
+            self.errors += 1
+            print(f"⚠️ Change bus: could not apply {message['domain']} {message['key']!r}: {exc}", file=sys.stderr)
+
+    def _reset(self, version, records):
+        """Reload from the data source; the bus sends each changed record next, our own changes included"""
+        self.resets += 1
+        self.version = version
+        self._resyncing = False
+        self._snapshot_left = records
+        if self.reload is not None:
+            self.reload()
+        if not records:
+            self.synced.set()
+
+    def stats(self):
+        return {"connected": self.connected.is_set(), "version": self.version, "applied": self.applied,
+                "published": self.published, "pending": len(self._pending), "resyncs": self.resyncs,
+                "resets": self.resets, "errors": self.errors}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def start_client():
+    """Process-wide ChangeBusClient, started on first call; None when CHANGE_BUS_SOCKET is unset"""
+    global _client
+    if _client is None and bus_path():
+        with _client_lock:
+            if _client is None:
+                _client = ChangeBusClient().start()
+    return _client
+
+
+def bus_stats():
+    """Counters of this process's client, or None when the bus is off"""
+    return _client.stats() if _client is not None else None
+
+
+def _connected_client(args):
+    client = ChangeBusClient(args.socket).start()
+    if not client.connected.wait(args.timeout):
+        client.close()
+        sys.exit(f"❌ No change bus on {client.path}")
+    return client
+
+
+def _publish_changes(args):
+    """Apply each change to this process's store and let the client broadcast it"""
+    from mock_data.tracking_store import get_tracking_store
+
+    client = _connected_client(args)
+    # Catch up first, so the records sent out include everyone's earlier changes
+    client.synced.wait(args.timeout)
+    store = get_store()
+    count = 0
+    with open(args.file, encoding="utf-8") if args.file != "-" else sys.stdin as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            change = json.loads(line)
+            domain, key, record = change["domain"], change["key"], change.get("record") or {}
+            if domain == "inventory":
+                store.update_inventory(key, **record)
+            elif domain == "catalog":
+                product = store.get_product(key)
+                product = {**(dict(product) if product is not None else {"id": key}), **record}
+                product.pop("category_key", None)
+                store.upsert_product(product, record.get("category_key") or store.get_product_category(key))
+            elif domain == "tracking":
+                get_tracking_store().apply({"tracking_number": key, **record})
+            else:
+                raise ValueError(f"Unknown domain {domain!r}")
+            count += 1
+    client.close()
+    print(f"📣 Published {count} changes ({client.published} sent to {client.path})")
+
+
+def _watch(args):
+    def show(event):
+        latency = f"{1000 * (time.time() - event['sent_at']):.2f} ms" if event.get("sent_at") else "?"
+        print(f"v{event['version']} {event['domain']} {event['key']!r} ({latency}): {json.dumps(event['record'])}")
+
+    client = ChangeBusClient(args.socket, apply=show, reload=None, publish_local=False)
+    client.start()
+    print(f"👀 Watching {client.path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local change bus between agent processes")
+    parser.add_argument("--socket", default=bus_path(), help="socket path (default CHANGE_BUS_SOCKET)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for the bus")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the bus")
+    serve.add_argument("--backlog", type=int, default=int(os.environ.get("CHANGE_BUS_BACKLOG", DEFAULT_BACKLOG)))
+    publish = commands.add_parser("publish", help="apply and broadcast JSONL changes")
+    publish.add_argument("file", help="JSONL file of changes, - for stdin")
+    commands.add_parser("watch", help="print changes as they arrive")
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("set CHANGE_BUS_SOCKET or pass --socket")
+
+    if args.command == "serve":
+        server = ChangeBusServer(args.socket, args.backlog)
+        print(f"🚌 Change bus on {args.socket}")
+        try:
+            asyncio.run(server.serve_forever())
+        finally:
+            server.close()
+    elif args.command == "publish":
+        _publish_changes(args)
+    else:
+        _watch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# Read-only, memory-mapped columnar file format for catalog data
+#
+# Layout: MAGIC | uint64 header length | JSON header | 8-byte aligned column data.
+# Numeric columns are packed int64 ("q") or float64 ("d") arrays. String columns
+# are an int64 offsets array (rows + 1 entries) followed by a UTF-8 blob, so a
+# column can be searched in place with mmap.find() and decoded one row at a time.
+import array
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+
+MAGIC = b"ECOMCOL1"
+ALIGNMENT = 8
+CHUNK_ROWS = 4096
+
+
+def _pad(size):
+    return -size % ALIGNMENT
+
+
+class _TableWriter:
+    """Streams rows of one table into per-column spill files"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = 0
+        self._spills = {}
+        self._pending = {}
+        self._blob_sizes = {}
+        for name, kind in columns:
+            if kind == "str":
+                self._spills[name] = (tempfile.TemporaryFile(), tempfile.TemporaryFile())
+                self._pending[name] = (array.array("q", [0]), [])
+                self._blob_sizes[name] = 0
+            else:
+                self._spills[name] = tempfile.TemporaryFile()
+                self._pending[name] = array.array(kind)
+
+    def append(self, row):
+        for (name, kind), value in zip(self.columns, row):
+            if kind == "str":
+                offsets, chunks = self._pending[name]
+                data = ("" if value is None else str(value)).encode("utf-8")
+                self._blob_sizes[name] += len(data)
+                offsets.append(self._blob_sizes[name])
+                chunks.append(data)
+            else:
+                self._pending[name].append(value or 0)
+        self.rows += 1
+        if self.rows % CHUNK_ROWS == 0:
+            self._flush()
+
+    def _flush(self):
+        for name, kind in self.columns:
+            if kind == "str":
+                offsets, chunks = self._pending[name]
+                offsets_file, blob_file = self._spills[name]
+                offsets.tofile(offsets_file)
+                blob_file.write(b"".join(chunks))
+                self._pending[name] = (array.array("q"), [])
+            else:
+                self._pending[name].tofile(self._spills[name])
+                self._pending[name] = array.array(kind)
+
+    def spill_files(self):
+        """(column name, kind, [(part name, spill file, size), ...])"""
+        self._flush()
+        for name, kind in self.columns:
+            if kind == "str":
+                offsets_file, blob_file = self._spills[name]
+                parts = [
+                    ("offsets", offsets_file, (self.rows + 1) * 8),
+                    ("data", blob_file, self._blob_sizes[name]),
+                ]
+            else:
+                parts = [("data", self._spills[name], self.rows * 8)]
+            yield name, kind, parts
+
+    def close(self):
+        for spill in self._spills.values():
+            for handle in (spill if isinstance(spill, tuple) else (spill,)):
+                handle.close()
+
+
+def write_columnar(path, tables):
+    """Write ``{table: (columns, rows)}`` to ``path``.
+
+    ``columns`` is a list of ``(name, kind)`` with kind ``"q"``, ``"d"`` or ``"str"``;
+    ``rows`` may be any iterable of tuples, it is consumed once and spilled to disk
+    column by column, so the input never has to fit in memory.
+    """
+    writers = {}
+    try:
+        for table, (columns, rows) in tables.items():
+            writer = _TableWriter(columns)
+            writers[table] = writer
+            for row in rows:
+                writer.append(row)
+
+        header = {"tables": {}}
+        layout = []
+        position = 0
+        for table, writer in writers.items():
+            table_header = {"rows": writer.rows, "columns": {}}
+            for name, kind, parts in writer.spill_files():
+                column = {"kind": kind}
+                for part, handle, size in parts:
+                    column[part] = [position, size]
+                    layout.append((handle, size))
+                    position += size + _pad(size)
+                table_header["columns"][name] = column
+            header["tables"][table] = table_header
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        with open(path, "wb") as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<Q", len(header_bytes)))
+            out.write(header_bytes)
+            out.write(b"\0" * _pad(len(MAGIC) + 8 + len(header_bytes)))
+            for handle, size in layout:
+                handle.seek(0)
+                shutil.copyfileobj(handle, out)
+                out.write(b"\0" * _pad(size))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+class StringColumn:
+    """UTF-8 string column decoded lazily from the mapped file"""
+
+    def __init__(self, mm, offsets, start, size):
+        self._mm = mm
+        self.offsets = offsets
+        self.start = start
+        self.size = size
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, row):
+        return self._mm[self.start + self.offsets[row]:self.start + self.offsets[row + 1]]
+
+    def __getitem__(self, row):
+        return self.raw(row).decode("utf-8")
+
+    def bisect_left(self, value):
+        """First row whose value is >= ``value`` (column must be sorted)"""
+        needle = value.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < needle:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_rows(self, needle):
+        """Rows containing ``needle`` as a substring, found with mmap.find()"""
+        needle = needle.encode("utf-8")
+        if not needle:
+            yield from range(len(self))
+            return
+        end = self.start + self.size
+        position = self._mm.find(needle, self.start, end)
+        while position != -1:
+            row = _bisect_right(self.offsets, position - self.start) - 1
+            # The blob is every row back to back: a hit running past the row's end
+            # is the tail of one row plus the head of the next, not a match
+            if position + len(needle) <= self.start + self.offsets[row + 1]:
+                yield row
+            position = self._mm.find(needle, self.start + self.offsets[row + 1], end)
+
+
+def _bisect_right(values, target):
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if target < values[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class ColumnarFile:
+    """Memory-mapped reader for files written by ``write_columnar``.
+
+    Pages are shared through the OS page cache, so several processes opening the
+    same file do not each hold a private copy of the data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._buffer = None
+        self._views = []
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar catalog file")
+        (header_size,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(self._mm[header_start:header_start + header_size])
+        self._data_start = header_start + header_size + _pad(header_start + header_size)
+        self._buffer = memoryview(self._mm)
+
+    def _view(self, start, size, kind):
+        window = self._buffer[self._data_start + start:self._data_start + start + size]
+        view = window.cast(kind)
+        self._views.extend((view, window))
+        return view
+
+    def rows(self, table):
+        return self.header["tables"][table]["rows"]
+
+    def has_table(self, table):
+        return table in self.header["tables"]
+
+    def has_column(self, table, name):
+        return name in self.header["tables"].get(table, {}).get("columns", {})
+
+    def column(self, table, name):
+        """Numeric memoryview or StringColumn for ``table.name``"""
+        column = self.header["tables"][table]["columns"][name]
+        if column["kind"] == "str":
+            offsets = self._view(*column["offsets"], "q")
+            start, size = column["data"]
+            return StringColumn(self._mm, offsets, self._data_start + start, size)
+        return self._view(*column["data"], column["kind"])
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
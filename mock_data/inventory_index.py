@@ -0,0 +1,73 @@
+# Reverse index from inventory status to product ids
+import heapq
+
+FLAGGED_STATUSES = ("low_stock", "out_of_stock")
+
+
+def derive_status(stock, reserved, reorder_level):
+    """Inventory status from stock that is still available to sell"""
+    available = stock - reserved
+    if available <= 0:
+        return "out_of_stock"
+    if available <= reorder_level:
+        return "low_stock"
+    return "in_stock"
+
+
+def restock_key(item):
+    """Sort key for ``(product_id, inventory)`` pairs: soonest restock first, unknown dates last"""
+    product_id, inventory = item
+    next_restock = inventory.get('next_restock')
+    return (next_restock is None, next_restock or "", product_id)
+
+
+def page_flagged(items, offset=0, limit=None, most_urgent=None):
+    """Order flagged ``(product_id, inventory)`` pairs by id (paged) or by restock urgency"""
+    if most_urgent:
+        return heapq.nsmallest(most_urgent, items, key=restock_key)
+    ordered = sorted(items, key=lambda item: item[0])
+    end = None if limit is None else offset + limit
+    return ordered[offset:end]
+
+
+class InventoryStatusIndex:
+    """Sets of product ids per inventory status, kept current on every update"""
+
+    def __init__(self, inventory=None):
+        self.by_status = {}
+        self.status_of = {}
+        for product_id, record in (inventory or {}).items():
+            self.update(product_id, record.get('status'))
+
+    def update(self, product_id, status):
+        """Move a product id into the set for its new status"""
+        previous = self.status_of.get(product_id)
+        if previous == status and product_id in self.status_of:
+            return
+        if product_id in self.status_of:
+            ids = self.by_status.get(previous)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.by_status[previous]
+        self.status_of[product_id] = status
+        self.by_status.setdefault(status, set()).add(product_id)
+
+    def remove(self, product_id):
+        if product_id in self.status_of:
+            status = self.status_of.pop(product_id)
+            ids = self.by_status.get(status)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.by_status[status]
+
+    def ids(self, statuses=FLAGGED_STATUSES):
+        """Product ids currently in any of ``statuses``"""
+        result = set()
+        for status in statuses:
+            result |= self.by_status.get(status, set())
+        return result
+
+    def count(self, statuses=FLAGGED_STATUSES):
+        return sum(len(self.by_status.get(status, ())) for status in statuses)
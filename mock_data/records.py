@@ -0,0 +1,183 @@
+# Compact record types for catalog, inventory and tracking data
+#
+# Records keep their fields in __slots__ instead of a per-record dict. Repeated
+# strings (brand, category, status, carrier, dates) are interned, so a million
+# rows share one copy of each distinct value. The in-memory store keeps inventory
+# in an InventoryTable: the integer columns are array('q'), daily_sales (units
+# sold per day) is an array('d'), and rows are handed out as small views. Every
+# record is a Mapping (``product['name']``, ``.get()``, ``{**record}``), so code
+# written against the old dicts keeps working.
+import sys
+from array import array
+from collections.abc import Mapping
+
+PRODUCT_FIELDS = ("id", "name", "brand", "price", "category", "description", "specifications", "features")
+INVENTORY_FIELDS = ("stock", "reserved", "reorder_level", "next_restock", "status", "daily_sales")
+PACKAGE_FIELDS = ("status", "location", "timestamp", "estimated_delivery", "carrier")
+INVENTORY_COUNTS = ("stock", "reserved", "reorder_level")
+
+
+def intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Record(Mapping):
+    """Mapping interface over the __slots__ fields of a record"""
+
+    __slots__ = ()
+    FIELDS = ()
+    KEYS = frozenset()
+    INTERNED = frozenset()
+    DEFAULTS = {}
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            self._set(name, fields.get(name, self.DEFAULTS.get(name)))
+
+    @classmethod
+    def from_mapping(cls, data):
+        """Record from a dict (or another record) in the same layout"""
+        if type(data) is cls:
+            return data
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+    def _set(self, name, value):
+        setattr(self, name, intern(value) if name in self.INTERNED else value)
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        self._set(key, value)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def update(self, values=(), **fields):
+        for key, value in dict(values, **fields).items():
+            self[key] = value
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class ProductRecord(Record):
+    """Catalog product; features are a tuple of interned strings"""
+
+    __slots__ = PRODUCT_FIELDS
+    FIELDS = PRODUCT_FIELDS
+    KEYS = frozenset(PRODUCT_FIELDS)
+    INTERNED = frozenset({"brand", "category"})
+
+    def _set(self, name, value):
+        if name == "features":
+            value = tuple(intern(feature) for feature in value or ())
+        super()._set(name, value)
+
+
+class InventoryRecord(Record):
+    """Inventory status of one product (as read from the SQLite / mmap backends)"""
+
+    __slots__ = INVENTORY_FIELDS
+    FIELDS = INVENTORY_FIELDS
+    KEYS = frozenset(INVENTORY_FIELDS)
+    INTERNED = frozenset({"next_restock", "status"})
+    DEFAULTS = {"stock": 0, "reserved": 0, "reorder_level": 0, "daily_sales": 0.0}
+
+
+class PackageRecord(Record):
+    """Tracking entry of one package"""
+
+    __slots__ = PACKAGE_FIELDS
+    FIELDS = PACKAGE_FIELDS
+    KEYS = frozenset(PACKAGE_FIELDS)
+    INTERNED = frozenset({"status", "location", "estimated_delivery", "carrier"})
+
+
+class InventoryRow(Record):
+    """View of one InventoryTable row; reads and writes go to the table's columns"""
+
+    __slots__ = ("table", "row")
+    FIELDS = INVENTORY_FIELDS
+    KEYS = frozenset(INVENTORY_FIELDS)
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self.table.columns[key][self.row]
+
+    def _set(self, name, value):
+        self.table.set(self.row, name, value)
+
+    def as_dict(self):
+        return {name: self[name] for name in self.FIELDS}
+
+
+class InventoryTable:
+    """Inventory keyed by product id, stored column-wise (dict-like: get, items, ``in``)"""
+
+    def __init__(self, inventory=None):
+        self.row_of = {}
+        self.product_ids = array("q")
+        self.columns = {name: array("q") for name in INVENTORY_COUNTS}
+        self.columns["daily_sales"] = array("d")
+        self.columns["next_restock"] = []
+        self.columns["status"] = []
+        for product_id, record in (inventory or {}).items():
+            self.add(product_id, record)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def __contains__(self, product_id):
+        return product_id in self.row_of
+
+    def __getitem__(self, product_id):
+        return InventoryRow(self, self.row_of[product_id])
+
+    def get(self, product_id, default=None):
+        row = self.row_of.get(product_id)
+        return default if row is None else InventoryRow(self, row)
+
+    def items(self):
+        for row, product_id in enumerate(self.product_ids):
+            yield product_id, InventoryRow(self, row)
+
+    def add(self, product_id, record):
+        """Insert or replace a product's row; returns its view"""
+        row = self.row_of.get(product_id)
+        if row is None:
+            row = self.row_of[product_id] = len(self.product_ids)
+            self.product_ids.append(product_id)
+            for name in INVENTORY_COUNTS:
+                self.columns[name].append(0)
+            self.columns["daily_sales"].append(0.0)
+            self.columns["next_restock"].append(None)
+            self.columns["status"].append(None)
+        for name in INVENTORY_FIELDS:
+            self.set(row, name, record.get(name))
+        return InventoryRow(self, row)
+
+    def set(self, row, name, value):
+        if name in INVENTORY_COUNTS:
+            self.columns[name][row] = int(value or 0)
+        elif name == "daily_sales":
+            self.columns[name][row] = float(value or 0)
+        elif name in self.columns:
+            self.columns[name][row] = intern(value)
+        else:
+            raise KeyError(name)
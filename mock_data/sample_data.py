@@ -1,4 +1,8 @@
 # Comprehensive mock data for all agents
+from mock_data.inventory_index import FLAGGED_STATUSES
+from mock_data.store import get_store
+from mock_data.tracking_store import get_tracking_store
+
 MOCK_PRODUCTS = {
     "electronics": [
         {
@@ -59,11 +63,11 @@ MOCK_PRODUCTS = {
 }
 
 MOCK_INVENTORY = {
-    1: {"stock": 8, "reserved": 2, "reorder_level": 5, "next_restock": "2024-11-25", "status": "low_stock"},
-    2: {"stock": 31, "reserved": 5, "reorder_level": 10, "next_restock": "2024-12-01", "status": "in_stock"},
-    3: {"stock": 22, "reserved": 3, "reorder_level": 8, "next_restock": "2024-11-30", "status": "in_stock"},
-    4: {"stock": 67, "reserved": 12, "reorder_level": 20, "next_restock": "2024-12-05", "status": "in_stock"},
-    5: {"stock": 0, "reserved": 0, "reorder_level": 5, "next_restock": "2024-11-28", "status": "out_of_stock"}
+    1: {"stock": 8, "reserved": 2, "reorder_level": 5, "next_restock": "2024-11-25", "status": "low_stock", "daily_sales": 1.5},
+    2: {"stock": 31, "reserved": 5, "reorder_level": 10, "next_restock": "2024-12-01", "status": "in_stock", "daily_sales": 2.0},
+    3: {"stock": 22, "reserved": 3, "reorder_level": 8, "next_restock": "2024-11-30", "status": "in_stock", "daily_sales": 0.8},
+    4: {"stock": 67, "reserved": 12, "reorder_level": 20, "next_restock": "2024-12-05", "status": "in_stock", "daily_sales": 3.0},
+    5: {"stock": 0, "reserved": 0, "reorder_level": 5, "next_restock": "2024-11-28", "status": "out_of_stock", "daily_sales": 1.2}
 }
 
 MOCK_SHIPPING_OPTIONS = {
@@ -97,41 +101,92 @@ MOCK_TRACKING = {
     }
 }
 
-# Helper functions
+# Helper functions (backed by the store selected with CATALOG_STORE, see mock_data.store)
 def find_product(product_name):
     """Find product by name across all categories"""
-    product_name_lower = product_name.lower()
-    for category in MOCK_PRODUCTS.values():
-        for product in category:
-            if product_name_lower in product['name'].lower():
-                return product
-    return None
-
-def search_products(query, category=None):
-    """Search products by query and optional category"""
-    results = []
-    query_lower = query.lower()
-    
-    for cat_name, products in MOCK_PRODUCTS.items():
-        if category and category.lower() != cat_name.lower():
-            continue
-            
-        for product in products:
-            if (query_lower in product['name'].lower() or 
-                query_lower in product['description'].lower() or
-                query_lower in product['brand'].lower()):
-                results.append(product)
-    
-    return results
+    return get_store().find_product(product_name)
+
+def find_products(product_names):
+    """Find several products by name in one pass (None for names not found)"""
+    return get_store().find_products(product_names)
+
+def get_product(product_id):
+    """Get a product by id"""
+    return get_store().get_product(product_id)
+
+def search_products(query, category=None, limit=None):
+    """Search products by query and optional category, best matches first"""
+    return get_store().search_products(query, category, limit)
+
+def count_products(query, category=None):
+    """Count products matching a search without ranking them"""
+    return get_store().count_products(query, category)
+
+def find_products_in_text(text):
+    """Find products mentioned by name in free text"""
+    return get_store().mentioned_products(text)
+
+def list_categories():
+    """List catalog category keys"""
+    return get_store().list_categories()
 
 def get_inventory_status(product_id):
     """Get inventory status for a product"""
-    return MOCK_INVENTORY.get(product_id)
+    return get_store().get_inventory_status(product_id)
+
+def get_inventory_statuses(product_ids):
+    """Get inventory status for several products as {product_id: inventory}"""
+    return get_store().get_inventory_statuses(product_ids)
+
+def iter_inventory():
+    """Iterate over (product_id, inventory) pairs"""
+    return get_store().iter_inventory()
+
+def upsert_product(product, category_key):
+    """Add or replace a catalog product"""
+    return get_store().upsert_product(product, category_key)
+
+def update_inventory(product_id, **changes):
+    """Update inventory fields for a product (keeps the status index current)"""
+    return get_store().update_inventory(product_id, **changes)
+
+def get_flagged_inventory(statuses=FLAGGED_STATUSES, offset=0, limit=None, most_urgent=None):
+    """Get (product_id, inventory) pairs with a low/out-of-stock status"""
+    return get_store().flagged_inventory(statuses, offset, limit, most_urgent)
+
+def count_flagged_inventory(statuses=FLAGGED_STATUSES):
+    """Count products with a low/out-of-stock status"""
+    return get_store().count_flagged(statuses)
 
 def get_shipping_option(method):
     """Get shipping option details"""
-    return MOCK_SHIPPING_OPTIONS.get(method.lower())
+    return get_store().get_shipping_option(method)
+
+def list_shipping_options():
+    """Get all shipping options keyed by method"""
+    return get_store().list_shipping_options()
 
+# Tracking goes through mock_data.tracking_store, which also takes live status events
 def track_package(tracking_number):
     """Track a package"""
-    return MOCK_TRACKING.get(tracking_number.upper())
\ No newline at end of file
+    return get_tracking_store().get(tracking_number)
+
+
+def track_packages(tracking_numbers):
+    """Track several packages as {tracking_number: package}"""
+    return get_tracking_store().get_many(tracking_numbers)
+
+
+def get_package_history(tracking_number):
+    """(timestamp, status, location) events of a package, oldest first"""
+    return get_tracking_store().events_of(tracking_number)
+
+
+def suggest_tracking_numbers(tracking_number, limit=5):
+    """Known tracking numbers for a partial or mistyped one"""
+    return get_tracking_store().suggest(tracking_number, limit)
+
+
+def find_tracking_numbers(status=None, carrier=None):
+    """Sorted tracking numbers of the packages with a status and/or carrier"""
+    return get_tracking_store().numbers_in(status, carrier)
@@ -0,0 +1,1051 @@
+# Data-access layer behind the helper functions in mock_data.sample_data
+#
+# Backends:
+#   memory          - the MOCK_* dicts, indexed in-process (default)
+#   sqlite:<path>   - a SQLite database built by mock_data.bulk_loader
+#   mmap:<path>     - a read-only columnar file, shared between processes via the page cache
+#
+# Pick one with the CATALOG_STORE environment variable. Every backend returns
+# the compact record types of mock_data.records, which read like the old dicts.
+#
+# Product search goes through an index on the memory backend (tokens and
+# trigrams, mock_data.catalog_index) and on SQLite (an FTS5 trigram table kept in
+# sync by triggers; a scan on SQLite builds without it and for queries shorter
+# than three characters). The mmap backend scans its shared search strings.
+import heapq
+import json
+import os
+import sqlite3
+import threading
+
+from mock_data.catalog_index import CatalogIndex, match_fields, product_fields, score_fields, tokenize
+from mock_data.columnar import ColumnarFile
+from mock_data.inventory_index import FLAGGED_STATUSES, InventoryStatusIndex, derive_status, page_flagged
+from mock_data.records import INVENTORY_FIELDS, InventoryRecord, InventoryTable, PackageRecord, ProductRecord
+
+SEARCH_SEPARATOR = "\x1f"
+# Product fields that product_columns() can return
+PRODUCT_COLUMN_FIELDS = ("category_key", "name", "brand", "price", "category")
+INVENTORY_DEFAULTS = {"stock": 0, "reserved": 0, "reorder_level": 0, "next_restock": None, "status": None,
+                      "daily_sales": 0.0}
+# Inventory fields sent to other processes as deltas, so concurrent changes add up
+INVENTORY_COUNTERS = ("stock", "reserved")
+
+
+class ReadOnlyStoreError(Exception):
+    """Raised when writing to a backend that cannot be modified"""
+
+
+# Change listeners, called as callback(domain, key) after every write.
+# Domains: "catalog" (key: product id), "inventory" (product id), "tracking" (tracking number).
+_change_listeners = []
+# Per-domain version counters, bumped on every change
+_data_versions = {}
+
+
+def add_change_listener(callback):
+    """Register a callback fired after catalog/inventory/tracking records change"""
+    _change_listeners.append(callback)
+
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+
+def data_version(domain):
+    """Number of changes seen so far in ``domain``"""
+    return _data_versions.get(domain, 0)
+
+
+def notify_change(domain, key=None):
+    """Tell every listener that a record in ``domain`` changed"""
+    _data_versions[domain] = _data_versions.get(domain, 0) + 1
+    for callback in list(_change_listeners):
+        callback(domain, key)
+
+
+def search_text(product):
+    """Lowercased name/brand/category/description joined for substring search"""
+    return SEARCH_SEPARATOR.join(product_fields(product).values())
+
+
+def _rank(products, query_lower, query_tokens, limit):
+    """Rank candidate products the same way CatalogIndex.search does"""
+    scored = []
+    for product in products:
+        fields = product_fields(product)
+        if match_fields(fields, query_lower, query_tokens):
+            scored.append((score_fields(fields, query_lower, query_tokens), product['id'], product))
+    if limit is not None:
+        ranked = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+    else:
+        ranked = sorted(scored, key=lambda item: (-item[0], item[1]))
+    return [product for _, _, product in ranked]
+
+
+def _check_product_fields(fields):
+    unknown = set(fields) - set(PRODUCT_COLUMN_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown product columns: {', '.join(sorted(unknown))}")
+
+
+class CatalogStore:
+    """Interface shared by all catalog/inventory/shipping/tracking backends"""
+
+    read_only = False
+
+    def find_product(self, name):
+        raise NotImplementedError
+
+    def get_product(self, product_id):
+        raise NotImplementedError
+
+    def get_product_category(self, product_id):
+        """Catalog category key of a product, or None"""
+        for category_key, product in self.iter_products():
+            if product['id'] == product_id:
+                return category_key
+        return None
+
+    def search_products(self, query, category=None, limit=None):
+        raise NotImplementedError
+
+    def count_products(self, query, category=None):
+        return len(self.search_products(query, category))
+
+    def list_categories(self):
+        raise NotImplementedError
+
+    def mentioned_products(self, text):
+        """Products named in free text (see CatalogIndex.mentions)"""
+        index = getattr(self, "_mention_index", None)
+        if index is None:
+            index = CatalogIndex()
+            for category_key, product in self.iter_products():
+                index.add({"id": product['id'], "name": product['name']}, category_key)
+            self._mention_index = index
+        return [self.get_product(product['id']) for product in index.mentions(text)]
+
+    def get_inventory_status(self, product_id):
+        raise NotImplementedError
+
+    def find_products(self, names):
+        """Product (or None) for each name, in the order given"""
+        return [self.find_product(name) for name in names]
+
+    def get_inventory_statuses(self, product_ids):
+        """``{product_id: inventory}`` for the ids that have an inventory record"""
+        found = {}
+        for product_id in product_ids:
+            inventory = self.get_inventory_status(product_id)
+            if inventory is not None:
+                found[product_id] = inventory
+        return found
+
+    def upsert_product(self, product, category_key):
+        """Insert or replace a product record"""
+        raise ReadOnlyStoreError(f"{type(self).__name__} is read-only")
+
+    def update_inventory(self, product_id, **changes):
+        """Apply field changes to one inventory record and return the updated record"""
+        raise ReadOnlyStoreError(f"{type(self).__name__} is read-only")
+
+    def take_inventory_change(self, product_id):
+        """This process's changes to one inventory record since the last call, for mock_data.change_bus"""
+        # Backends shared between processes hold the change already, the record only informs
+        record = self.get_inventory_status(product_id)
+        return {"delta": {}, "set": dict(record)} if record is not None else None
+
+    def reloaded(self):
+        """This store's data as the source has it, for a process that missed changes (see mock_data.change_bus)"""
+        # Backends shared between processes are the source
+        return self
+
+    def apply_remote_change(self, domain, key, record):
+        """Catch up with a change another process made (see mock_data.change_bus)"""
+        # Backends shared between processes already hold the new data, only what
+        # this process derived from it is stale
+        if domain == "catalog":
+            self._mention_index = None
+        notify_change(domain, key)
+
+    def flagged_inventory(self, statuses=FLAGGED_STATUSES, offset=0, limit=None, most_urgent=None):
+        """``(product_id, inventory)`` pairs in ``statuses``, paged by id or top-N by next_restock"""
+        raise NotImplementedError
+
+    def count_flagged(self, statuses=FLAGGED_STATUSES):
+        raise NotImplementedError
+
+    def get_shipping_option(self, method):
+        return self.list_shipping_options().get(method.lower())
+
+    def list_shipping_options(self):
+        raise NotImplementedError
+
+    def iter_products(self):
+        """Yield ``(category_key, product)`` pairs"""
+        raise NotImplementedError
+
+    def iter_inventory(self):
+        """Yield ``(product_id, inventory)`` pairs"""
+        raise NotImplementedError
+
+    def iter_tracking(self):
+        """Yield ``(tracking_number, package)`` pairs; lookups go through mock_data.tracking_store"""
+        raise NotImplementedError
+
+    def inventory_columns(self):
+        """The whole inventory as row-aligned columns: product_id plus every inventory field"""
+        columns = {name: [] for name in ("product_id", *INVENTORY_FIELDS)}
+        for product_id, inventory in self.iter_inventory():
+            columns["product_id"].append(product_id)
+            for name in INVENTORY_FIELDS:
+                columns[name].append(inventory.get(name))
+        return columns
+
+    def product_columns(self, fields):
+        """Product ids and ``fields`` (from PRODUCT_COLUMN_FIELDS) of every product as columns"""
+        _check_product_fields(fields)
+        columns = {name: [] for name in ("id", *fields)}
+        for category_key, product in self.iter_products():
+            columns["id"].append(product['id'])
+            for name in fields:
+                columns[name].append(category_key if name == "category_key" else product.get(name))
+        return columns
+
+    def close(self):
+        pass
+
+
+class InMemoryStore(CatalogStore):
+    """Backend over data in the MOCK_* layout, held as slotted records and an inventory table"""
+
+    def __init__(self, products, inventory, shipping_options, tracking):
+        self.inventory = InventoryTable(inventory)
+        self.shipping_options = shipping_options
+        self.tracking = {number: PackageRecord.from_mapping(package) for number, package in tracking.items()}
+        self.index = CatalogIndex({
+            category_key: [ProductRecord.from_mapping(product) for product in category_products]
+            for category_key, category_products in products.items()
+        })
+        self.status_index = InventoryStatusIndex(self.inventory)
+        self._lock = threading.RLock()
+        self._sku_locks = {}
+        # product id -> {"delta": {...}, "set": {...}} not yet taken by the change bus
+        self._unpublished = {}
+
+    def find_product(self, name):
+        return self.index.find(name)
+
+    def get_product(self, product_id):
+        return self.index.get(product_id)
+
+    def get_product_category(self, product_id):
+        return self.index.category_of.get(product_id)
+
+    def search_products(self, query, category=None, limit=None):
+        return self.index.search(query, category, limit)
+
+    def count_products(self, query, category=None):
+        return self.index.count(query, category)
+
+    def list_categories(self):
+        return list(self.index.categories)
+
+    def mentioned_products(self, text):
+        return self.index.mentions(text)
+
+    def get_inventory_status(self, product_id):
+        return self.inventory.get(product_id)
+
+    def get_inventory_statuses(self, product_ids):
+        inventory = self.inventory
+        return {product_id: inventory[product_id] for product_id in product_ids if product_id in inventory}
+
+    def upsert_product(self, product, category_key):
+        product = ProductRecord.from_mapping(product)
+        with self._lock:
+            self.index.add(product, category_key)
+        notify_change("catalog", product['id'])
+        return product
+
+    def update_inventory(self, product_id, **changes):
+        unknown = set(changes) - set(INVENTORY_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown inventory fields: {', '.join(sorted(unknown))}")
+        with self._lock:
+            record = self.inventory.get(product_id)
+            if record is None:
+                record = self.inventory.add(product_id, INVENTORY_DEFAULTS)
+            before = {field: record.get(field) for field in (*INVENTORY_COUNTERS, *changes)}
+            record.update(changes)
+            self.status_index.update(product_id, record.get('status'))
+            self._note_change(product_id, record, before)
+        notify_change("inventory", product_id)
+        return record
+
+    def sku_lock(self, product_id):
+        """Lock held around read-modify-write changes of one product's inventory"""
+        lock = self._sku_locks.get(product_id)
+        if lock is None:
+            with self._lock:
+                lock = self._sku_locks.setdefault(product_id, threading.Lock())
+        return lock
+
+    def _note_change(self, product_id, record, before):
+        """Add a local write to what take_inventory_change hands out (caller holds the lock)"""
+        change = self._unpublished.setdefault(product_id, {"delta": {}, "set": {}})
+        for field, old in before.items():
+            new = record.get(field)
+            if field in INVENTORY_COUNTERS:
+                change["delta"][field] = change["delta"].get(field, 0) + (new or 0) - (old or 0)
+            elif field != "status" and new != old:
+                change["set"][field] = new
+        # A status that follows from the numbers is derived again on the other side
+        if record.get('status') == derive_status(record['stock'], record['reserved'], record['reorder_level']):
+            change["set"].pop("status", None)
+        else:
+            change["set"]["status"] = record.get('status')
+
+    def take_inventory_change(self, product_id):
+        with self._lock:
+            change = self._unpublished.pop(product_id, None)
+        if change is None:
+            return None
+        change["delta"] = {field: amount for field, amount in change["delta"].items() if amount}
+        return change if change["delta"] or change["set"] else None
+
+    def reloaded(self):
+        # A fresh copy of the MOCK_* data this process started from
+        return create_store("memory")
+
+    def apply_remote_change(self, domain, key, record):
+        # Each process holds its own copy, so the change is applied here too
+        if domain == "catalog" and record:
+            self.upsert_product(record["product"], record["category_key"])
+        elif domain == "inventory" and record:
+            # Under the SKU lock, so it can't land between a reservation's read and write
+            with self.sku_lock(key), self._lock:
+                current = self.inventory.get(key)
+                if current is None:
+                    current = self.inventory.add(key, INVENTORY_DEFAULTS)
+                values = dict(record.get("set") or {})
+                for field, amount in (record.get("delta") or {}).items():
+                    values[field] = (current.get(field) or 0) + amount
+                current.update(values)
+                if "status" not in values:
+                    current['status'] = derive_status(current['stock'], current['reserved'], current['reorder_level'])
+                self.status_index.update(key, current.get('status'))
+            notify_change(domain, key)
+        else:
+            notify_change(domain, key)
+
+    def flagged_inventory(self, statuses=FLAGGED_STATUSES, offset=0, limit=None, most_urgent=None):
+        items = [(product_id, self.inventory[product_id]) for product_id in self.status_index.ids(statuses)]
+        return page_flagged(items, offset, limit, most_urgent)
+
+    def count_flagged(self, statuses=FLAGGED_STATUSES):
+        return self.status_index.count(statuses)
+
+    def get_shipping_option(self, method):
+        return self.shipping_options.get(method.lower())
+
+    def list_shipping_options(self):
+        return dict(self.shipping_options)
+
+    def iter_products(self):
+        for product_id, product in self.index.by_id.items():
+            yield self.index.category_of[product_id], product
+
+    def iter_inventory(self):
+        return self.inventory.items()
+
+    def inventory_columns(self):
+        # Copies of the table's columns (array slices copy their buffer)
+        table = self.inventory
+        return {"product_id": table.product_ids[:], **{name: column[:] for name, column in table.columns.items()}}
+
+    def iter_tracking(self):
+        return iter(self.tracking.items())
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    category_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    brand TEXT,
+    price REAL,
+    category TEXT,
+    description TEXT,
+    specifications TEXT,
+    features TEXT,
+    search_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_name_lower ON products (name_lower);
+CREATE INDEX IF NOT EXISTS products_category_key ON products (category_key);
+CREATE TABLE IF NOT EXISTS inventory (
+    product_id INTEGER PRIMARY KEY,
+    stock INTEGER NOT NULL,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    reorder_level INTEGER NOT NULL DEFAULT 0,
+    next_restock TEXT,
+    status TEXT,
+    daily_sales REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS inventory_status ON inventory (status);
+CREATE TABLE IF NOT EXISTS shipping_options (
+    method TEXT PRIMARY KEY,
+    cost REAL,
+    days INTEGER,
+    carrier TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS tracking (
+    tracking_number TEXT PRIMARY KEY,
+    status TEXT,
+    location TEXT,
+    timestamp TEXT,
+    estimated_delivery TEXT,
+    carrier TEXT
+);
+"""
+
+# Substring index over products.search_text (FTS5 with the trigram tokenizer, SQLite 3.34+)
+SQLITE_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    search_text, content='products', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, search_text) VALUES (new.id, new.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    INSERT INTO products_fts (rowid, search_text) VALUES (new.id, new.search_text);
+END;
+"""
+TRIGRAM = 3
+
+PRODUCT_COLUMNS = "id, category_key, name, brand, price, category, description, specifications, features"
+INVENTORY_COLUMNS = "product_id, stock, reserved, reorder_level, next_restock, status, daily_sales"
+TRACKING_COLUMNS = "tracking_number, status, location, timestamp, estimated_delivery, carrier"
+# Keys per "IN (...)" query, below SQLite's default bound-parameter limit
+SQLITE_BATCH = 500
+
+
+def product_row(category_key, product):
+    """Row for the SQLite products table"""
+    return (
+        product['id'], category_key.lower(), product['name'], product['name'].lower(),
+        product.get('brand'), product.get('price'), product.get('category'),
+        product.get('description'), product.get('specifications'),
+        json.dumps(list(product.get('features') or [])), search_text(product),
+    )
+
+
+def inventory_row(product_id, inventory):
+    return (
+        product_id, inventory['stock'], inventory.get('reserved', 0),
+        inventory.get('reorder_level', 0), inventory.get('next_restock'), inventory.get('status'),
+        inventory.get('daily_sales') or 0.0,
+    )
+
+
+def shipping_row(method, option):
+    return (method.lower(), option['cost'], option['days'], option.get('carrier'), option.get('description'))
+
+
+def tracking_row(tracking_number, package):
+    return (
+        tracking_number.upper(), package.get('status'), package.get('location'),
+        package.get('timestamp'), package.get('estimated_delivery'), package.get('carrier'),
+    )
+
+
+def _product_from_row(row):
+    return ProductRecord(
+        id=row[0],
+        name=row[2],
+        brand=row[3],
+        price=row[4],
+        category=row[5],
+        description=row[6],
+        specifications=row[7],
+        features=json.loads(row[8]) if row[8] else (),
+    )
+
+
+def _inventory_from_row(row):
+    return InventoryRecord(
+        stock=row[1],
+        reserved=row[2],
+        reorder_level=row[3],
+        next_restock=row[4],
+        status=row[5],
+        daily_sales=row[6],
+    )
+
+
+def _tracking_from_row(row):
+    return PackageRecord(
+        status=row[1],
+        location=row[2],
+        timestamp=row[3],
+        estimated_delivery=row[4],
+        carrier=row[5],
+    )
+
+
+def _fts_phrase(text):
+    """FTS5 query for ``text`` as a substring"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _batches(keys):
+    keys = list(dict.fromkeys(keys))
+    for start in range(0, len(keys), SQLITE_BATCH):
+        yield keys[start:start + SQLITE_BATCH]
+
+
+class SQLiteStore(CatalogStore):
+    """Backend over a SQLite database, one connection per thread"""
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self._local = threading.local()
+        if not read_only:
+            with self.connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SQLITE_SCHEMA)
+                # Databases created before sales velocity was tracked
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(inventory)")}
+                if "daily_sales" not in columns:
+                    conn.execute("ALTER TABLE inventory ADD COLUMN daily_sales REAL NOT NULL DEFAULT 0")
+                # Both missing for databases created before the search index, the
+                # triggers alone after a bulk load that didn't finish
+                indexed = conn.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE name IN ('products_fts', 'products_fts_insert')"
+                ).fetchone()[0] == 2
+                try:
+                    conn.executescript(SQLITE_SEARCH_SCHEMA)
+                except sqlite3.OperationalError:
+                    pass  # no FTS5 / trigram tokenizer in this SQLite: search scans
+                else:
+                    if not indexed:
+                        conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+        self._search_index = None
+
+    def connect(self):
+        """Connection for the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                conn = sqlite3.connect(self.path)
+                # So INSERT OR REPLACE fires the delete trigger of the search index
+                conn.execute("PRAGMA recursive_triggers = ON")
+            self._local.conn = conn
+        return conn
+
+    def pause_search_index(self):
+        """Stop indexing product writes one by one, for a bulk load; resume_search_index() catches up"""
+        if self._indexed():
+            with self.connect() as conn:
+                for trigger in ("insert", "delete", "update"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS products_fts_{trigger}")
+
+    def resume_search_index(self):
+        """Rebuild the search index in one pass and index product writes again"""
+        if self._indexed():
+            conn = self.connect()
+            with conn:
+                conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+            conn.executescript(SQLITE_SEARCH_SCHEMA)
+
+    def _indexed(self):
+        """Whether the database has the FTS5 search index"""
+        if self._search_index is None:
+            self._search_index = self.connect().execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+            ).fetchone() is not None
+        return self._search_index
+
+    def find_product(self, name):
+        name_lower = name.lower().strip()
+        if not name_lower:
+            return None
+        conn = self.connect()
+        row = conn.execute(
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE name_lower = ? LIMIT 1", (name_lower,)
+        ).fetchone()
+        if row is None:
+            where, params = "instr(name_lower, ?) > 0", [name_lower]
+            if len(name_lower) >= TRIGRAM and self._indexed():
+                # The name is part of search_text, so the index narrows the rows down
+                where += " AND id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)"
+                params.append(_fts_phrase(name_lower))
+            row = conn.execute(
+                f"SELECT {PRODUCT_COLUMNS} FROM products WHERE {where} ORDER BY length(name_lower), id LIMIT 1",
+                params,
+            ).fetchone()
+        return _product_from_row(row) if row else None
+
+    def get_product(self, product_id):
+        row = self.connect().execute(
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE id = ?", (product_id,)
+        ).fetchone()
+        return _product_from_row(row) if row else None
+
+    def get_product_category(self, product_id):
+        row = self.connect().execute("SELECT category_key FROM products WHERE id = ?", (product_id,)).fetchone()
+        return row[0] if row else None
+
+    def _candidates(self, query_lower, query_tokens, category):
+        indexed = self._indexed()
+        match = "id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)"
+        if indexed and len(query_lower) >= TRIGRAM:
+            clauses, params = [match], [_fts_phrase(query_lower)]
+        else:
+            clauses, params = ["instr(search_text, ?) > 0"], [query_lower]
+        if query_tokens:
+            long_tokens = [token for token in query_tokens if len(token) >= TRIGRAM] if indexed else []
+            short_tokens = [token for token in query_tokens if token not in long_tokens]
+            conditions = ["instr(search_text, ?) > 0" for _ in short_tokens]
+            if long_tokens:
+                conditions.insert(0, match)
+                params.append(" AND ".join(_fts_phrase(token) for token in long_tokens))
+            params.extend(short_tokens)
+            clauses.append("(" + " AND ".join(conditions) + ")")
+        sql = f"SELECT {PRODUCT_COLUMNS} FROM products WHERE ({' OR '.join(clauses)})"
+        if category:
+            sql += " AND category_key = ?"
+            params.append(category.lower())
+        return (_product_from_row(row) for row in self.connect().execute(sql, params))
+
+    def search_products(self, query, category=None, limit=None):
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query_lower)
+        return _rank(self._candidates(query_lower, query_tokens, category), query_lower, query_tokens, limit)
+
+    def count_products(self, query, category=None):
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query_lower)
+        return sum(
+            1 for product in self._candidates(query_lower, query_tokens, category)
+            if match_fields(product_fields(product), query_lower, query_tokens)
+        )
+
+    def list_categories(self):
+        rows = self.connect().execute(
+            "SELECT category_key FROM products GROUP BY category_key ORDER BY min(id)"
+        )
+        return [row[0] for row in rows]
+
+    def get_inventory_status(self, product_id):
+        row = self.connect().execute(
+            f"SELECT {INVENTORY_COLUMNS} FROM inventory WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        return _inventory_from_row(row) if row else None
+
+    def find_products(self, names):
+        # Exact names in one query per batch; only the misses fall back to substring matching
+        lowered = [name.lower().strip() for name in names]
+        exact = {}
+        conn = self.connect()
+        for batch in _batches(name for name in lowered if name):
+            rows = conn.execute(
+                f"SELECT {PRODUCT_COLUMNS}, name_lower FROM products "
+                f"WHERE name_lower IN ({', '.join('?' * len(batch))}) ORDER BY id DESC",
+                batch,
+            )
+            for row in rows:
+                exact[row[-1]] = _product_from_row(row)
+        return [exact[name] if name in exact else self.find_product(name) for name in lowered]
+
+    def get_inventory_statuses(self, product_ids):
+        found = {}
+        conn = self.connect()
+        for batch in _batches(product_ids):
+            rows = conn.execute(
+                f"SELECT {INVENTORY_COLUMNS} FROM inventory WHERE product_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            for row in rows:
+                found[row[0]] = _inventory_from_row(row)
+        return found
+
+    def upsert_product(self, product, category_key):
+        if self.read_only:
+            raise ReadOnlyStoreError(f"{self.path} was opened read-only")
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO products (id, category_key, name, name_lower, brand, price, category, "
+                "description, specifications, features, search_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                product_row(category_key, product),
+            )
+        self._mention_index = None
+        notify_change("catalog", product['id'])
+        return product
+
+    def update_inventory(self, product_id, **changes):
+        if self.read_only:
+            raise ReadOnlyStoreError(f"{self.path} was opened read-only")
+        unknown = set(changes) - set(INVENTORY_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown inventory fields: {', '.join(sorted(unknown))}")
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO inventory (product_id, stock, reserved, reorder_level) VALUES (?, 0, 0, 0)",
+                (product_id,),
+            )
+            if changes:
+                assignments = ", ".join(f"{field} = ?" for field in changes)
+                conn.execute(
+                    f"UPDATE inventory SET {assignments} WHERE product_id = ?", (*changes.values(), product_id)
+                )
+        notify_change("inventory", product_id)
+        return self.get_inventory_status(product_id)
+
+    def flagged_inventory(self, statuses=FLAGGED_STATUSES, offset=0, limit=None, most_urgent=None):
+        placeholders = ", ".join("?" for _ in statuses)
+        sql = f"SELECT {INVENTORY_COLUMNS} FROM inventory WHERE status IN ({placeholders})"
+        if most_urgent:
+            sql += " ORDER BY next_restock IS NULL, next_restock, product_id LIMIT ?"
+            params = (*statuses, most_urgent)
+        else:
+            sql += " ORDER BY product_id LIMIT ? OFFSET ?"
+            params = (*statuses, -1 if limit is None else limit, offset)
+        return [(row[0], _inventory_from_row(row)) for row in self.connect().execute(sql, params)]
+
+    def count_flagged(self, statuses=FLAGGED_STATUSES):
+        placeholders = ", ".join("?" for _ in statuses)
+        row = self.connect().execute(
+            f"SELECT count(*) FROM inventory WHERE status IN ({placeholders})", tuple(statuses)
+        ).fetchone()
+        return row[0]
+
+    def get_shipping_option(self, method):
+        row = self.connect().execute(
+            "SELECT method, cost, days, carrier, description FROM shipping_options WHERE method = ?",
+            (method.lower(),),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"cost": row[1], "days": row[2], "carrier": row[3], "description": row[4]}
+
+    def list_shipping_options(self):
+        rows = self.connect().execute(
+            "SELECT method, cost, days, carrier, description FROM shipping_options ORDER BY rowid"
+        )
+        return {row[0]: {"cost": row[1], "days": row[2], "carrier": row[3], "description": row[4]} for row in rows}
+
+    def iter_products(self, order_by="id"):
+        rows = self.connect().execute(f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY {order_by}")
+        for row in rows:
+            yield row[1], _product_from_row(row)
+
+    def iter_inventory(self):
+        rows = self.connect().execute(f"SELECT {INVENTORY_COLUMNS} FROM inventory ORDER BY product_id")
+        for row in rows:
+            yield row[0], _inventory_from_row(row)
+
+    def inventory_columns(self):
+        # INVENTORY_COLUMNS lists product_id, then the fields in INVENTORY_FIELDS order
+        names = ("product_id", *INVENTORY_FIELDS)
+        rows = self.connect().execute(f"SELECT {INVENTORY_COLUMNS} FROM inventory ORDER BY product_id").fetchall()
+        return dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+
+    def product_columns(self, fields):
+        _check_product_fields(fields)
+        names = ("id", *fields)
+        rows = self.connect().execute(f"SELECT {', '.join(names)} FROM products ORDER BY id").fetchall()
+        return dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+
+    def iter_tracking(self):
+        rows = self.connect().execute(f"SELECT {TRACKING_COLUMNS} FROM tracking ORDER BY tracking_number")
+        for row in rows:
+            yield row[0], _tracking_from_row(row)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Column layout of the memory-mapped catalog file
+PRODUCT_TABLE = [
+    ("id", "q"), ("category_key", "str"), ("name", "str"), ("brand", "str"), ("price", "d"),
+    ("category", "str"), ("description", "str"), ("specifications", "str"), ("features", "str"),
+    ("search_text", "str"),
+]
+PRODUCT_NAME_TABLE = [("name_lower", "str"), ("row", "q")]
+INVENTORY_TABLE = [
+    ("product_id", "q"), ("stock", "q"), ("reserved", "q"), ("reorder_level", "q"),
+    ("next_restock", "str"), ("status", "str"), ("daily_sales", "d"),
+]
+SHIPPING_TABLE = [("method", "str"), ("cost", "d"), ("days", "q"), ("carrier", "str"), ("description", "str")]
+TRACKING_TABLE = [
+    ("tracking_number", "str"), ("status", "str"), ("location", "str"), ("timestamp", "str"),
+    ("estimated_delivery", "str"), ("carrier", "str"),
+]
+
+
+def _bisect_numeric(values, target):
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class MmapStore(CatalogStore):
+    """Read-only backend over a columnar file built by mock_data.bulk_loader.
+
+    Rows are sorted by product id / tracking number, so point lookups are a
+    binary search and substring search runs mmap.find() over the string blobs.
+    """
+
+    read_only = True
+
+    def __init__(self, path):
+        self.file = ColumnarFile(path)
+        self.products = {name: self.file.column("products", name) for name, _ in PRODUCT_TABLE}
+        self.product_names = {name: self.file.column("product_names", name) for name, _ in PRODUCT_NAME_TABLE}
+        # Files written before daily_sales existed lack that column
+        self.inventory = {
+            name: self.file.column("inventory", name) for name, _ in INVENTORY_TABLE
+            if self.file.has_column("inventory", name)
+        }
+        self.tracking = {name: self.file.column("tracking", name) for name, _ in TRACKING_TABLE}
+        self._statuses = None
+        shipping = {name: self.file.column("shipping_options", name) for name, _ in SHIPPING_TABLE}
+        self.shipping_options = {
+            shipping["method"][row]: {
+                "cost": shipping["cost"][row],
+                "days": shipping["days"][row],
+                "carrier": shipping["carrier"][row],
+                "description": shipping["description"][row],
+            }
+            for row in range(self.file.rows("shipping_options"))
+        }
+
+    def _product(self, row):
+        columns = self.products
+        features = columns["features"][row]
+        return ProductRecord(
+            id=columns["id"][row],
+            name=columns["name"][row],
+            brand=columns["brand"][row],
+            price=columns["price"][row],
+            category=columns["category"][row],
+            description=columns["description"][row],
+            specifications=columns["specifications"][row],
+            features=json.loads(features) if features else (),
+        )
+
+    def find_product(self, name):
+        name_lower = name.lower().strip()
+        if not name_lower:
+            return None
+        names = self.product_names["name_lower"]
+        position = names.bisect_left(name_lower)
+        if position < len(names) and names[position] == name_lower:
+            return self._product(self.product_names["row"][position])
+
+        matches = set(names.find_rows(name_lower))
+        if not matches:
+            return None
+        best = min(matches, key=lambda r: (len(names.raw(r)), self.products["id"][self.product_names["row"][r]]))
+        return self._product(self.product_names["row"][best])
+
+    def get_product(self, product_id):
+        ids = self.products["id"]
+        row = _bisect_numeric(ids, product_id)
+        if row < len(ids) and ids[row] == product_id:
+            return self._product(row)
+        return None
+
+    def get_product_category(self, product_id):
+        ids = self.products["id"]
+        row = _bisect_numeric(ids, product_id)
+        if row < len(ids) and ids[row] == product_id:
+            return self.products["category_key"][row]
+        return None
+
+    def _candidate_rows(self, query_lower, query_tokens, category):
+        text = self.products["search_text"]
+        rows = set(text.find_rows(query_lower))
+        if query_tokens:
+            token_rows = None
+            for token in sorted(query_tokens, key=len, reverse=True):
+                found = set(text.find_rows(token))
+                token_rows = found if token_rows is None else token_rows & found
+                if not token_rows:
+                    break
+            rows |= token_rows or set()
+        if category:
+            category_key = category.lower()
+            rows = {row for row in rows if self.products["category_key"][row] == category_key}
+        return rows
+
+    def search_products(self, query, category=None, limit=None):
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query_lower)
+        rows = self._candidate_rows(query_lower, query_tokens, category)
+        return _rank((self._product(row) for row in rows), query_lower, query_tokens, limit)
+
+    def count_products(self, query, category=None):
+        query_lower = query.lower().strip()
+        query_tokens = tokenize(query_lower)
+        return sum(
+            1 for row in self._candidate_rows(query_lower, query_tokens, category)
+            if match_fields(product_fields(self._product(row)), query_lower, query_tokens)
+        )
+
+    def list_categories(self):
+        seen = {}
+        for row in range(self.file.rows("products")):
+            seen.setdefault(self.products["category_key"][row], None)
+        return list(seen)
+
+    def _inventory_row(self, product_id):
+        ids = self.inventory["product_id"]
+        row = _bisect_numeric(ids, product_id)
+        if row < len(ids) and ids[row] == product_id:
+            return row
+        return None
+
+    def _inventory(self, row):
+        columns = self.inventory
+        return InventoryRecord(
+            stock=columns["stock"][row],
+            reserved=columns["reserved"][row],
+            reorder_level=columns["reorder_level"][row],
+            next_restock=columns["next_restock"][row] or None,
+            status=columns["status"][row] or None,
+            daily_sales=columns["daily_sales"][row] if "daily_sales" in columns else 0.0,
+        )
+
+    def get_inventory_status(self, product_id):
+        row = self._inventory_row(product_id)
+        return self._inventory(row) if row is not None else None
+
+    def _status_index(self):
+        """Status -> row index, built on first use from the status column"""
+        if self._statuses is None:
+            statuses = self.inventory["status"]
+            index = InventoryStatusIndex()
+            for row in range(len(statuses)):
+                index.update(row, statuses[row] or None)
+            self._statuses = index
+        return self._statuses
+
+    def flagged_inventory(self, statuses=FLAGGED_STATUSES, offset=0, limit=None, most_urgent=None):
+        product_ids = self.inventory["product_id"]
+        items = [(product_ids[row], self._inventory(row)) for row in self._status_index().ids(statuses)]
+        return page_flagged(items, offset, limit, most_urgent)
+
+    def count_flagged(self, statuses=FLAGGED_STATUSES):
+        return self._status_index().count(statuses)
+
+    def list_shipping_options(self):
+        return dict(self.shipping_options)
+
+    def _package(self, row):
+        columns = self.tracking
+        return PackageRecord(
+            status=columns["status"][row],
+            location=columns["location"][row],
+            timestamp=columns["timestamp"][row],
+            estimated_delivery=columns["estimated_delivery"][row] or None,
+            carrier=columns["carrier"][row],
+        )
+
+    def iter_products(self):
+        for row in range(self.file.rows("products")):
+            yield self.products["category_key"][row], self._product(row)
+
+    def iter_inventory(self):
+        for row in range(self.file.rows("inventory")):
+            yield self.inventory["product_id"][row], self._inventory(row)
+
+    def iter_tracking(self):
+        for row in range(self.file.rows("tracking")):
+            yield self.tracking["tracking_number"][row], self._package(row)
+
+    def inventory_columns(self):
+        # Numeric columns are handed out as memoryviews over the mapped file
+        rows = self.file.rows("inventory")
+        columns = {}
+        for name, kind in INVENTORY_TABLE:
+            column = self.inventory.get(name)
+            if column is None:
+                columns[name] = [0.0] * rows
+            elif kind == "str":
+                columns[name] = [column[row] or None for row in range(rows)]
+            else:
+                columns[name] = column
+        return columns
+
+    def product_columns(self, fields):
+        _check_product_fields(fields)
+        rows = self.file.rows("products")
+        columns = {"id": self.products["id"]}
+        for name in fields:
+            column = self.products[name]
+            columns[name] = column if name == "price" else [column[row] for row in range(rows)]
+        return columns
+
+    def close(self):
+        self.file.close()
+
+
+def create_store(spec=None):
+    """Build a store from a ``memory`` / ``sqlite:<path>`` / ``mmap:<path>`` spec"""
+    spec = spec or os.environ.get("CATALOG_STORE", "memory")
+    backend, _, path = spec.partition(":")
+    backend = backend.lower()
+    if backend == "memory":
+        from mock_data.sample_data import MOCK_INVENTORY, MOCK_PRODUCTS, MOCK_SHIPPING_OPTIONS, MOCK_TRACKING
+
+        return InMemoryStore(MOCK_PRODUCTS, MOCK_INVENTORY, MOCK_SHIPPING_OPTIONS, MOCK_TRACKING)
+    if backend == "sqlite":
+        return SQLiteStore(path)
+    if backend == "mmap":
+        return MmapStore(path)
+    raise ValueError(f"Unknown catalog store backend '{backend}' (expected memory, sqlite or mmap)")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, created on first use from CATALOG_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def set_store(store):
+    """Swap the process-wide store (returns the previous one)"""
+    global _store
+    with _store_lock:
+        previous, _store = _store, store
+    return previous
@@ -0,0 +1,280 @@
+# Tracking store fed by a stream of carrier status events
+#
+# Carriers send status updates as events, one JSON object per line:
+#   {"tracking_number": "TRK123456789", "status": "in_transit", "location": "Regional hub",
+#    "timestamp": "2024-11-19 10:15:00", "carrier": "UPS", "estimated_delivery": "2024-11-21"}
+#
+# Events are applied one at a time as they are read, so a file or socket of any
+# length streams through in constant memory. Every package keeps its latest state
+# (a PackageRecord) and its last TRACKING_HISTORY events as interned tuples. An
+# event that arrives late goes into the history but doesn't roll back the current
+# state, and a repeated event is ignored.
+#
+# Lookups that don't scan every package:
+#   get("TRK123456789")                   exact, a dict lookup
+#   with_prefix("TRK1234")                sorted array of tracking numbers + bisect
+#   similar("TRK12345768")                one typo away, from a prefix range of the sorted
+#                                         numbers and one of the sorted reversed numbers
+#   numbers_in(status=..., carrier=...)   sets per status and per carrier, kept current
+#
+# The process-wide store starts from the catalog store's tracking table and then
+# ingests TRACKING_EVENTS, if set:
+#   TRACKING_EVENTS   JSONL file of status events to ingest on first use
+#   TRACKING_HISTORY  events kept per package (default 20)
+import bisect
+import json
+import os
+import threading
+from itertools import islice
+
+from mock_data.records import PACKAGE_FIELDS, PackageRecord, intern
+from mock_data.store import get_store, notify_change
+
+# Shortest partial number that gets prefix matches (shorter ones match too much)
+MIN_PREFIX = 4
+
+
+def one_typo_apart(a, b):
+    """Whether ``b`` is ``a`` with one character changed, added or dropped, or two neighbours swapped"""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    shortest = min(len(a), len(b))
+    while i < shortest and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    return a[i:] == b[i + 1:]
+
+
+def _prefixed(ordered, prefix):
+    """Items of a sorted list that start with ``prefix``"""
+    start = bisect.bisect_left(ordered, prefix)
+    for index in range(start, len(ordered)):
+        if not ordered[index].startswith(prefix):
+            break
+        yield ordered[index]
+
+
+class PackageIndex:
+    """Tracking numbers per value of one package field (status or carrier), kept current"""
+
+    def __init__(self):
+        self.numbers = {}
+        self.value_of = {}
+
+    def update(self, tracking_number, value):
+        """Move a tracking number into the set for its new value"""
+        if tracking_number in self.value_of:
+            previous = self.value_of[tracking_number]
+            if previous == value:
+                return
+            numbers = self.numbers[previous]
+            numbers.discard(tracking_number)
+            if not numbers:
+                del self.numbers[previous]
+        self.value_of[tracking_number] = value
+        self.numbers.setdefault(value, set()).add(tracking_number)
+
+    def get(self, value):
+        return self.numbers.get(value, set())
+
+    def counts(self):
+        return {value: len(numbers) for value, numbers in self.numbers.items()}
+
+
+def _event_from_package(tracking_number, package):
+    return {"tracking_number": tracking_number, **{name: package.get(name) for name in PACKAGE_FIELDS}}
+
+
+class TrackingStore:
+    """Current state and capped event history per package, with prefix/fuzzy/status/carrier lookups"""
+
+    def __init__(self, history_limit=20):
+        self.history_limit = max(1, history_limit)
+        self.packages = {}
+        self.history = {}
+        self.by_status = PackageIndex()
+        self.by_carrier = PackageIndex()
+        self.events = 0
+        self.ignored = 0
+        self._numbers = []
+        self._reversed = []
+        self._unsorted = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.packages)
+
+    def __contains__(self, tracking_number):
+        return tracking_number.strip().upper() in self.packages
+
+    def apply(self, event, notify=True):
+        """Apply one status event; False if it was a duplicate or had no tracking number"""
+        number = (event.get("tracking_number") or "").strip().upper()
+        if not number:
+            self.ignored += 1
+            return False
+        timestamp = event.get("timestamp") or ""
+        # "" rather than None, so entries with a missing field still sort against the others
+        entry = (intern(timestamp), intern(event.get("status") or ""), intern(event.get("location") or ""))
+        with self._lock:
+            history = self.history.get(number)
+            if history is None:
+                history = self.history[number] = []
+                self._unsorted.append(number)
+            elif entry in history:
+                self.ignored += 1
+                return False
+            position = bisect.bisect_right(history, entry)
+            if position == 0 and len(history) >= self.history_limit:
+                # Older than everything a full history keeps: it would be trimmed right away
+                self.ignored += 1
+                return False
+            history.insert(position, entry)
+            if len(history) > self.history_limit:
+                del history[0]
+            self.events += 1
+
+            package = self.packages.get(number)
+            if package is None:
+                package = self.packages[number] = PackageRecord(**{name: event.get(name) for name in PACKAGE_FIELDS})
+            elif timestamp >= (package['timestamp'] or ""):
+                # Carrier and ETA stay as they were when an event leaves them out
+                package.update({name: event[name] for name in PACKAGE_FIELDS if event.get(name) is not None})
+            self.by_status.update(number, package['status'])
+            self.by_carrier.update(number, (package['carrier'] or "").upper() or None)
+        if notify:
+            notify_change("tracking", number)
+        return True
+
+    def ingest(self, events, notify=True):
+        """Apply an iterable of event dicts as it is consumed; returns how many were applied"""
+        return sum(self.apply(event, notify) for event in events)
+
+    def ingest_lines(self, lines, notify=True):
+        """Apply JSONL events from any iterable of lines (a file, a socket's makefile(), stdin)"""
+        return self.ingest((json.loads(line) for line in lines if line.strip()), notify)
+
+    def ingest_file(self, path, notify=True):
+        with open(path, encoding="utf-8") as handle:
+            return self.ingest_lines(handle, notify)
+
+    def get(self, tracking_number):
+        return self.packages.get(tracking_number.strip().upper())
+
+    def get_many(self, tracking_numbers):
+        """``{tracking_number: package}`` for the numbers that are known"""
+        packages = self.packages
+        numbers = (number.strip().upper() for number in tracking_numbers)
+        return {number: packages[number] for number in numbers if number in packages}
+
+    def events_of(self, tracking_number):
+        """``(timestamp, status, location)`` events of a package, oldest first"""
+        return list(self.history.get(tracking_number.strip().upper(), ()))
+
+    def _sorted_numbers(self):
+        """Sorted tracking numbers and sorted reversed numbers (for suffix lookups)"""
+        # New numbers are merged in on the next lookup, not on every event
+        if self._unsorted:
+            with self._lock:
+                if self._unsorted:
+                    # New lists rather than sorting in place, so concurrent readers see a complete one
+                    self._numbers = sorted(self._numbers + self._unsorted)
+                    self._reversed = sorted(self._reversed + [number[::-1] for number in self._unsorted])
+                    self._unsorted = []
+        return self._numbers, self._reversed
+
+    def with_prefix(self, prefix, limit=10):
+        """Tracking numbers starting with ``prefix``, in order"""
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+        numbers, _ = self._sorted_numbers()
+        return list(islice(_prefixed(numbers, prefix), limit))
+
+    def similar(self, tracking_number, limit=5):
+        """Known numbers one typo away from ``tracking_number`` (a wrong, missing, extra or swapped character)"""
+        number = tracking_number.strip().upper()
+        if len(number) < MIN_PREFIX:
+            return []
+        numbers, reversed_numbers = self._sorted_numbers()
+        # One typo touches at most two neighbouring characters, so the number keeps
+        # either its first `head` or its last `tail` characters: the candidates are
+        # one prefix range of the sorted numbers and one of the reversed ones
+        head = (len(number) - 2) // 2
+        tail = len(number) - 2 - head
+        candidates = set(_prefixed(numbers, number[:head]))
+        candidates.update(candidate[::-1] for candidate in _prefixed(reversed_numbers, number[::-1][:tail]))
+        return sorted(candidate for candidate in candidates if one_typo_apart(number, candidate))[:limit]
+
+    def suggest(self, tracking_number, limit=5):
+        """Known numbers a customer may have meant: prefix matches for partial numbers, else near misses"""
+        number = tracking_number.strip().upper()
+        if len(number) >= MIN_PREFIX:
+            found = self.with_prefix(number, limit)
+            if found:
+                return found
+        return self.similar(number, limit=limit)
+
+    def numbers_in(self, status=None, carrier=None):
+        """Sorted tracking numbers with ``status`` and/or ``carrier`` (either may be None)"""
+        with self._lock:
+            sets = []
+            if status:
+                sets.append(self.by_status.get(status.strip().lower()))
+            if carrier:
+                sets.append(self.by_carrier.get(carrier.strip().upper()))
+            if not sets:
+                return sorted(self.packages)
+            # Walk the smaller set, probe the larger one
+            sets.sort(key=len)
+            return sorted(number for number in sets[0] if all(number in other for other in sets[1:]))
+
+    def counts(self):
+        """Packages per status"""
+        with self._lock:
+            return self.by_status.counts()
+
+
+def create_tracking_store(catalog_store=None, events_path=None, history_limit=None):
+    """Tracking store seeded from a catalog store's tracking table, then fed ``events_path``"""
+    catalog_store = catalog_store or get_store()
+    if history_limit is None:
+        history_limit = int(os.environ.get("TRACKING_HISTORY", "20"))
+    store = TrackingStore(history_limit)
+    store.ingest((_event_from_package(number, package) for number, package in catalog_store.iter_tracking()), notify=False)
+    events_path = events_path if events_path is not None else os.environ.get("TRACKING_EVENTS", "")
+    if events_path:
+        store.ingest_file(events_path, notify=False)
+    return store
+
+
+# (catalog store it was seeded from, tracking store)
+_tracking = (None, None)
+_tracking_lock = threading.Lock()
+
+
+def get_tracking_store():
+    """Process-wide tracking store, rebuilt if the catalog store was swapped"""
+    global _tracking
+    catalog_store = get_store()
+    seeded_from, store = _tracking
+    if store is None or seeded_from is not catalog_store:
+        with _tracking_lock:
+            seeded_from, store = _tracking
+            if store is None or seeded_from is not catalog_store:
+                store = create_tracking_store(catalog_store)
+                _tracking = (catalog_store, store)
+    return store
+
+
+def reset_tracking_store():
+    """Drop the process-wide tracking store; the next get_tracking_store() seeds a new one"""
+    global _tracking
+    with _tracking_lock:
+        _tracking = (None, None)
@@ -1,38 +1,92 @@
+import argparse
 import asyncio
-import subprocess
+import os
+import signal
 import sys
 import time
 
+from agents.common.serving import ensure_shared_store, worker_count
+from agents.common.supervisor import AgentSpec, Supervisor
+from mock_data.change_bus import bus_path, serve_in_thread, start_client
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Specialist A2A servers started by the supervisor (as modules, from the repo root)
+AGENTS = [
+    AgentSpec("product_catalog_agent", [sys.executable, "-m", "agents.product_catalog_agent.agent"], 8001, cwd=ROOT),
+    AgentSpec("inventory_agent", [sys.executable, "-m", "agents.inventory_agent.agent"], 8002, cwd=ROOT),
+    AgentSpec("shipping_agent", [sys.executable, "-m", "agents.shipping_agent.agent"], 8003, cwd=ROOT),
+]
+
 def start_all_agents():
-    """Start all agents and wait for them to be ready"""
-    agents = [
-        "agents/product_catalog_agent/agent.py",
-        "agents/inventory_agent/agent.py", 
-        "agents/shipping_agent/agent.py"
-    ]
-    
-    for agent in agents:
-        subprocess.Popen([sys.executable, agent])
-        time.sleep(2)
-    
-    time.sleep(5)  # Wait for all agents to start
-    print("✅ All agents started!")
+    """Start all agents in parallel and return once every agent card is served"""
+    # With AGENT_WORKERS > 1 seed the shared store once, before any agent starts
+    ensure_shared_store(worker_count())
+    # With CHANGE_BUS_SOCKET set this process runs the change bus the agents connect to
+    if bus_path():
+        serve_in_thread()
+        print(f"🚌 Change bus on {bus_path()}")
+    supervisor = Supervisor(AGENTS, ready_timeout=float(os.environ.get("AGENT_READY_TIMEOUT", 60)))
+    supervisor.start()
+    try:
+        supervisor.wait_ready()
+    except (TimeoutError, RuntimeError):
+        supervisor.shutdown()
+        raise
+    supervisor.report()
+    # Restart agents that crash while the front end is running
+    supervisor.watch()
+    return supervisor
 
 async def chat_with_agent():
     """Chat with the customer support agent"""
-    sys.path.append('agents/customer_support_agent')
-    from agents.customer_support_agent.agent import runner, run_session
+    from agents.customer_support_agent.agent import get_runner, run_session, fast_path_router, response_cache
+    from agents.common.model_scheduler import scheduler_stats
+    from agents.customer_support_agent.http_pool import pool_metrics
     
+    start_client()
     print("💬 Customer Support is ready! Ask me anything about products, stock, or shipping!")
     
-    session_id = 1
+    # One session for the whole chat, so follow-up questions keep their context
+    session_id = f"chat_{int(time.time())}"
     while True:
-        question = input("\nYou: ").strip()
+        # Read input on a worker thread so the event loop (A2A pool, card refreshes) keeps running
+        question = (await asyncio.to_thread(input, "\nYou: ")).strip()
+        if not question:
+            continue
         if question.lower() in ['quit', 'exit']:
+            stats = fast_path_router.stats()
+            print(f"⚡ Fast path answered {stats['hits']} of {stats['hits'] + stats['misses']} questions ({stats['hit_rate']:.0%})")
+            if response_cache is not None:
+                cache_stats = response_cache.stats()
+                print(f"💾 Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})")
+            for host, host_stats in pool_metrics().get("hosts", {}).items():
+                print(f"🔌 {host}: {host_stats['requests']} requests, avg pool wait {host_stats['wait_avg_ms']:.1f} ms")
+            model_stats = scheduler_stats()
+            if model_stats is not None:
+                lane = model_stats["lanes"]["interactive"]
+                print(f"🧮 Model calls: {model_stats['calls']}, avg queue wait {lane['wait_avg_ms']:.1f} ms, "
+                      f"{model_stats['retries']} retries, {model_stats['coalesced']} coalesced")
             break
-        await run_session(runner, question, f"chat_{session_id}")
-        session_id += 1
+        await run_session(get_runner(), question, session_id)
 
 if __name__ == "__main__":
-    start_all_agents()
-    asyncio.run(chat_with_agent())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Start the specialist agents and the customer support front end")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP/WebSocket server instead of the terminal chat")
+    parser.add_argument("--host", help="server host (default SERVER_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="server port (default SERVER_PORT or 8000)")
+    args = parser.parse_args()
+
+    supervisor = start_all_agents()
+    # Stop the agents on SIGTERM too, not only on quit / Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        if args.serve:
+            from agents.customer_support_agent.server import serve
+            serve(args.host, args.port)
+        else:
+            asyncio.run(chat_with_agent())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.shutdown()